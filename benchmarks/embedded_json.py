@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Compare regex + brace-counting extraction of embedded map JSON with the
+# anchor + raw_decode locator in scrapers/embedded_json.py on large pages.
+#
+#   python -m benchmarks.embedded_json --features 2000 --padding 2000000
+
+import argparse
+import json
+import re
+import timeit
+
+from scrapers import embedded_json
+
+
+def make_page(features: int, padding: int) -> str:
+    """Drupal-style page with a geofield map and a Leaflet push, padded with markup."""
+    items = [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [-84.0 - i / 1000, 32.0 + i / 1000]},
+        'properties': {'description': f'<a href="/facility/{i}">Facility {i}</a> {{county}} [state]',
+                       'data': {'facility_type': 'State Prison', 'id': i}},
+    } for i in range(features)]
+    settings = {'geofield_google_map': {'map-1': {'data': {'type': 'FeatureCollection', 'features': items}}}}
+    leaflet = {'map': {'zoom': False}, 'markers': [{'lat': 42.0, 'lng': -71.0, 'title': f'MCI {i}'}
+                                                     for i in range(features)]}
+    filler = '<div class="views-row"><p>Announcement text for visitors.</p></div>\n'
+    head = filler * (padding // len(filler) // 2)
+    return (f"<html><body>{head}"
+            f'<script type="application/json" data-drupal-selector="drupal-settings-json">{json.dumps(settings)}</script>'
+            f"<script>ma.leafletMapData.push({json.dumps(leaflet)});</script>"
+            f"{head}</body></html>")
+
+
+def legacy_features(html_content):
+    # GeorgiaScraper.extract_json_data before the shared locator
+    match = re.search(r'"features":\s*(\[.*?\])\s*\}\s*\}\s*\}', html_content, re.DOTALL)
+    features_json = match.group(1)
+    bracket_count = 0
+    last_valid_pos = 0
+    for i, char in enumerate(features_json):
+        if char == '{':
+            bracket_count += 1
+        elif char == '}':
+            bracket_count -= 1
+            if bracket_count == 0:
+                last_valid_pos = i + 1
+    clean_json = re.sub(r',\s*\]$', ']', features_json[:last_valid_pos] + ']')
+    return json.loads(clean_json)
+
+
+def legacy_leaflet(script_content):
+    # MassachusettsScraper.extract_leaflet_data before the shared locator
+    match = re.search(r'ma\.leafletMapData\.push\(({.*?})\);', script_content, re.DOTALL)
+    return json.loads(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark embedded JSON extraction')
+    parser.add_argument('--features', type=int, default=1000, help='Features in the embedded map data')
+    parser.add_argument('--padding', type=int, default=1000000, help='Characters of markup around the scripts')
+    parser.add_argument('--number', type=int, default=5, help='Extractions per timing run')
+    args = parser.parse_args()
+
+    page = make_page(args.features, args.padding)
+    print(f"Page: {len(page) / 1e6:.1f} MB, {args.features} features")
+
+    cases = [
+        ('features', lambda: legacy_features(page), lambda: embedded_json.find_json_items(page, '"features":')),
+        ('leaflet', lambda: legacy_leaflet(page), lambda: embedded_json.find_json(page, 'ma.leafletMapData.push(')),
+    ]
+    for name, legacy, shared in cases:
+        same = legacy() == shared()
+        timings = [min(timeit.repeat(function, number=args.number, repeat=3)) / args.number * 1000
+                   for function in (legacy, shared)]
+        print(f"{name:>9}: legacy {timings[0]:8.1f} ms  raw_decode {timings[1]:8.1f} ms  "
+              f"({timings[0] / timings[1]:.1f}x, same result: {same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Time every installed HTML parser, with and without partial parsing, on
+# pages recorded with `fetch.py --record-fixtures DIR` (one directory per
+# jurisdiction).
+#
+#   python fetch.py --all --record-fixtures fixtures
+#   python -m benchmarks.html_parsers fixtures
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from scrapers import illinois, michigan, parsing, tennessee, washington
+
+# Jurisdictions whose detail pages are parsed with a strainer
+STRAINERS = {
+    'illinois': illinois.DETAIL_STRAINER,
+    'michigan': michigan.DETAIL_STRAINER,
+    'tennessee': tennessee.DETAIL_STRAINER,
+    'washington': washington.DETAIL_STRAINER,
+}
+
+
+def load_pages(directory):
+    """Bodies of the recorded HTML responses under one jurisdiction's directory."""
+    pages = []
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(root, filename)) as f:
+                meta = json.load(f)
+            headers = {name.lower(): value for name, value in meta.get('headers', {}).items()}
+            if 'html' not in headers.get('content-type', '').lower():
+                continue
+            with open(os.path.join(root, meta['body_file']), 'rb') as f:
+                pages.append(f.read())
+    return pages
+
+
+def parse_all(pages, parser, strainer=None):
+    for page in pages:
+        parsing.make_soup(page, parse_only=strainer, parser=parser).get_text()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML parsers on recorded fixtures')
+    parser.add_argument('fixtures_dir', help='Directory written by fetch.py --record-fixtures')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per parser (best is reported)')
+    args = parser.parse_args()
+
+    jurisdictions = sorted(name for name in os.listdir(args.fixtures_dir)
+                           if os.path.isdir(os.path.join(args.fixtures_dir, name)) and name != 'shared')
+    if not jurisdictions:
+        sys.exit(f"No recorded jurisdictions in {args.fixtures_dir}")
+
+    parsers = parsing.available_parsers()
+    columns = parsers + [f"{name}+strainer" for name in parsers]
+    print(f"{'jurisdiction':<16}{'pages':>6}{'MB':>7}" + ''.join(f"{column:>22}" for column in columns))
+    for jurisdiction in jurisdictions:
+        pages = load_pages(os.path.join(args.fixtures_dir, jurisdiction))
+        if not pages:
+            continue
+        cells = []
+        for name in parsers:
+            seconds = min(timeit.repeat(lambda: parse_all(pages, name), number=1, repeat=args.repeat))
+            cells.append(f"{seconds * 1000:.1f} ms")
+        for name in parsers:
+            strainer = STRAINERS.get(jurisdiction)
+            if strainer is None:
+                cells.append('-')
+                continue
+            seconds = min(timeit.repeat(lambda: parse_all(pages, name, strainer), number=1, repeat=args.repeat))
+            cells.append(f"{seconds * 1000:.1f} ms")
+        size = sum(len(page) for page in pages) / 1e6
+        print(f"{jurisdiction:<16}{len(pages):>6}{size:>7.2f}" + ''.join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
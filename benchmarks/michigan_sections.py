@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Time Michigan facility-section extraction: the old DOTALL patterns over the
+# whole page text against the container lookup plus anchored patterns.
+#
+#   python -m benchmarks.michigan_sections --nav-items 400
+
+import argparse
+import re
+import timeit
+
+from scrapers import parsing
+from scrapers.michigan import DETAIL_STRAINER, MichiganScraper
+
+
+def legacy_extract_facility_section(all_text):
+    # MichiganScraper.extract_facility_section before the structural extractor
+    patterns = [
+        r'([A-Za-z\s]+County.*?)(?=General|Programming|Security|\Z)',
+        r'((?:Acting\s+)?Warden\s+[^\n]+.*?)(?=General|Programming|Security|\Z)',
+        r'(\w+\s+County.*?)(?=General|Programming|Security|\Z)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, all_text, re.DOTALL | re.IGNORECASE)
+        if match:
+            section = match.group(1).strip()
+            if any(keyword in section.lower() for keyword in ['warden', 'superintendent', 'county', 'drive', 'street', 'road']):
+                return section
+    return ''
+
+
+def make_page(nav_items):
+    """michigan.gov-style page: long menus and footer around one facility info block."""
+    nav = ''.join(f"<li><a href='/corrections/page-{i}'>Offender Success and Reentry Services {i}</a></li>\n"
+                  for i in range(nav_items))
+    return (f"<html><head><title>Alger Correctional Facility</title></head><body>"
+            f"<nav><ul>{nav}</ul></nav>"
+            f"<main><div class='rte'>"
+            f"<p>Alger County</p>\n"
+            f"<p><strong>Warden Douglas Tasson</strong><br>\nN6141 Industrial Park Drive<br>\nMunising, MI 49862<br>\n"
+            f"Telephone: 906-387-5000</p>\n"
+            f"<h3>General Information</h3>\n<p>Open: 1990</p>\n<p>Security Level: I, II, IV</p>"
+            f"</div></main><footer><ul>{nav}</ul></footer></body></html>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Michigan facility section extraction')
+    parser.add_argument('--nav-items', type=int, default=300, help='Menu entries before and after the info block')
+    parser.add_argument('--number', type=int, default=20, help='Extractions per timing run')
+    args = parser.parse_args()
+
+    scraper = MichiganScraper()
+    soup = parsing.make_soup(make_page(args.nav_items), parse_only=DETAIL_STRAINER)
+
+    def legacy():
+        return legacy_extract_facility_section(soup.get_text())
+
+    def structural():
+        container = scraper.find_info_container(soup)
+        return scraper.extract_facility_section((container or soup).get_text(), '')
+
+    print(f"Legacy section starts: {legacy()[:60]!r}")
+    print(f"Structural section:    {structural()!r}")
+    timings = [min(timeit.repeat(function, number=args.number, repeat=3)) / args.number * 1000
+               for function in (legacy, structural)]
+    print(f"{args.nav_items} menu entries: legacy {timings[0]:.2f} ms/page, structural {timings[1]:.2f} ms/page "
+          f"({timings[0] / timings[1]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Time facility-name merging: difflib against every indexed name versus the
+# NameIndex, on synthetic names. Half of the queries are another source's
+# spelling of an indexed facility and should match; the other half name a
+# different facility one letter away ("Bacon" for "Macon") and should not.
+#
+#   python -m benchmarks.name_index --facilities 2000
+
+import argparse
+import difflib
+import random
+import time
+
+from scrapers.name_index import NameIndex, normalize_name
+
+SUFFIXES = ['Correctional Center', 'Corrections Center', 'State Prison', 'Correctional Institution',
+            'Work Center', 'Correctional Center for Women', 'Reentry Center', 'Detention Center']
+SPELLINGS = {'Correctional Center': 'Correctional Centre', 'Corrections Center': 'Correctional Complex',
+             'State Prison': 'Prison', 'Work Center': 'Work Ctr', "for Women": "for Women's"}
+
+
+def make_names(count, rng):
+    """Distinct facility names built from random place words."""
+    names = set()
+    while len(names) < count:
+        place = ''.join(rng.choice('bcdfghklmnprstvw') + rng.choice('aeiou') for _ in range(rng.randint(3, 5)))
+        names.add(f"{place.title()} {rng.choice(SUFFIXES)}")
+    return sorted(names)
+
+
+def respell(name, rng):
+    """Another source's spelling of the same facility."""
+    for suffix, variant in SPELLINGS.items():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)] + variant
+            break
+    place, rest = name.split(' ', 1)
+    return f"{place.upper()}, {rest} ({place[:3].upper()})" if rng.random() < 0.5 else f"{place} {rest}"
+
+
+def neighbour(name, names, rng):
+    """A facility not in ``names`` whose place word differs from ``name``'s by one letter."""
+    place, rest = name.split(' ', 1)
+    while True:
+        i = rng.randrange(len(place))
+        other = f"{place[:i]}{rng.choice('bcdfghklmnprstvw')}{place[i + 1:]}".title()
+        if f"{other} {rest}" not in names:
+            return f"{other} {rest}"
+
+
+def difflib_merge(names, queries):
+    normalized = {normalize_name(name): name for name in names}
+    matches = []
+    for query in queries:
+        close = difflib.get_close_matches(normalize_name(query), normalized, n=1, cutoff=0.8)
+        matches.append(normalized[close[0]] if close else None)
+    return matches
+
+
+def index_merge(names, queries):
+    index = NameIndex()
+    for name in names:
+        index.add(name, name)
+    return [index.find(query) for query in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark facility-name merging')
+    parser.add_argument('--facilities', type=int, default=1000, help='Names per source')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed for the synthetic names')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = make_names(args.facilities, rng)
+    known = set(names)
+    queries = [respell(name, rng) for name in names] + [neighbour(name, known, rng) for name in names]
+    expected = names + [None] * len(names)
+
+    for label, merge in (('difflib', difflib_merge), ('NameIndex', index_merge)):
+        start = time.perf_counter()
+        matches = merge(names, queries)
+        elapsed = time.perf_counter() - start
+        correct = sum(1 for want, match in zip(expected, matches) if want and match == want)
+        wrong = sum(1 for want, match in zip(expected, matches) if match is not None and match != want)
+        print(f"{label:>9}: {elapsed * 1000:8.1f} ms, {correct}/{len(names)} respellings matched, "
+              f"{wrong} wrong matches")
+
+
+if __name__ == "__main__":
+    main()
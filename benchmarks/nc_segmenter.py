@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Check the single-pass North Carolina facility segmenter against the old
+# per-facility rescan and time both on large multi-facility counties.
+#
+#   python -m benchmarks.nc_segmenter --facilities 200
+#   python -m benchmarks.nc_segmenter --csv field_map_data.csv   # a saved copy of the NC export
+
+import argparse
+import csv
+import timeit
+
+from scrapers import parsing
+from scrapers.north_carolina import NorthCarolinaScraper
+
+
+def legacy_extract_facility_section(full_text, facility_name):
+    # NorthCarolinaScraper.extract_facility_section before the segmenter
+    start_pos = full_text.find(facility_name)
+    if start_pos == -1:
+        return ""
+    lines = full_text[start_pos:].split('\n')
+    facility_lines = [lines[0]]
+    for i, line in enumerate(lines[1:], 1):
+        line = line.strip()
+        if not line:
+            continue
+        if (line[0].isupper() and
+                'correctional' in line.lower() and
+                line != facility_name and
+                not any(keyword in line.lower() for keyword in ['custody', 'male', 'female', 'rd', 'street', 'ave', 'drive'])):
+            break
+        facility_lines.append(line)
+    return '\n'.join(facility_lines)
+
+
+def legacy_segments(html_content):
+    soup = parsing.make_soup(html_content)
+    for br in soup.find_all('br'):
+        br.replace_with('\n')
+    full_html_text = soup.get_text()
+    segments = []
+    for block in soup.find_all('strong'):
+        facility_name = block.get_text().strip()
+        if not facility_name:
+            continue
+        facility_section = legacy_extract_facility_section(full_html_text, facility_name)
+        if facility_section:
+            segments.append((facility_name, [line.strip() for line in facility_section.split('\n') if line.strip()]))
+    return segments
+
+
+def new_segments(scraper, html_content):
+    return list(scraper.segment_facilities(parsing.make_soup(html_content)))
+
+
+def county_cell(facilities):
+    """County cell shaped like the NC export: name, custody, street, city lines per facility."""
+    parts = []
+    for i in range(facilities):
+        parts.append(f"<p><strong>Facility {i} Correctional Institution</strong>"
+                     f"Medium Custody / Male<br>{100 + i} Prison Camp Rd.<br>Polkton, NC 28135<br>"
+                     f"Correctional Enterprises plant on site</p>")
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify and benchmark the NC facility segmenter')
+    parser.add_argument('--facilities', type=int, default=100, help='Facilities in the synthetic county')
+    parser.add_argument('--csv', help='Saved NC map-data CSV export to verify against')
+    parser.add_argument('--number', type=int, default=5, help='Parses per timing run')
+    args = parser.parse_args()
+
+    scraper = NorthCarolinaScraper()
+    cells = [county_cell(n) for n in (1, 3, 10)]
+    if args.csv:
+        with open(args.csv, newline='') as f:
+            rows = list(csv.reader(f))[1:]
+        cells += [row[2] for row in rows if len(row) >= 5 and row[2].strip()]
+
+    mismatches = 0
+    for cell in cells:
+        old, new = legacy_segments(cell), new_segments(scraper, cell)
+        if old != new:
+            mismatches += 1
+            print(f"Mismatch:\n  legacy: {old}\n  single-pass: {new}")
+    print(f"{len(cells)} county cells compared, {mismatches} mismatches")
+
+    large = county_cell(args.facilities)
+    legacy_time = min(timeit.repeat(lambda: legacy_segments(large), number=args.number, repeat=3)) / args.number
+    new_time = min(timeit.repeat(lambda: new_segments(scraper, large), number=args.number, repeat=3)) / args.number
+    print(f"{args.facilities} facilities in one county: legacy {legacy_time * 1000:.1f} ms, "
+          f"single-pass {new_time * 1000:.1f} ms ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Compare the per-paragraph Texas detail parser with the single-pass label extractor.
+#
+#   python -m benchmarks.texas_details --repeat 200
+
+import argparse
+import re
+import timeit
+
+from bs4 import BeautifulSoup
+
+from scrapers.texas import FACILITY_DETAILS
+
+LEGACY_PATTERNS = {
+    'unit_full_name': r'Unit Full Name:\s*(.+)',
+    'family_liaison': r'Family Liaison Coordinator:\s*(.+)',
+    'date_established': r'Date Unit Established or On Line:\s*(.+)',
+    'total_employees': r'Total Employees:\s*(\d+)',
+    'security_employees': r'Security Employees:\s*(\d+)',
+    'non_security_employees': r'Non-Security Employees:\s*(\d+)',
+    'windham_employees': r'Windham Education Employees:\s*(\d+)',
+    'medical_employees': r'Contract Medical and Mental Health Employees:\s*(.+)',
+    'capacity': r'Capacity:\s*([\d,]+)',
+    'custody_levels': r'Custody Levels Housed:\s*(.+)',
+    'acreage': r'Approximate Acreage:\s*(.+)',
+    'agricultural_ops': r'Agricultural Operations:\s*(.+)',
+    'manufacturing_ops': r'Manufacturing and Logistics Op\.:\s*(.+)',
+    'facility_ops': r'Facility Operations:\s*(.+)',
+    'additional_ops': r'Additional Operations:\s*(.+)',
+    'medical_capabilities': r'Medical Capabilities:\s*(.+)',
+    'educational_programs': r'Educational Programs:\s*(.+)',
+    'additional_programs': r'Additional Programs/Services:\s*(.+)',
+    'community_work': r'Community Work Projects:\s*(.+)',
+    'volunteer_initiatives': r'Volunteer Initiatives:\s*(.+)',
+}
+
+# Shaped like a TDCJ unit page: one label per paragraph plus some prose
+SAMPLE_PAGE = """
+<html><body>
+<p><strong>Senior Warden:</strong> Jane Doe</p>
+<p><strong>Unit Full Name:</strong> James V. Allred Unit</p>
+<p><strong>Family Liaison Coordinator:</strong> John Smith</p>
+<p><strong>Date Unit Established or On Line:</strong> 1995</p>
+<p><strong>Total Employees:</strong> 687</p>
+<p><strong>Security Employees:</strong> 579</p>
+<p><strong>Non-Security Employees:</strong> 108</p>
+<p><strong>Windham Education Employees:</strong> 12</p>
+<p><strong>Contract Medical and Mental Health Employees:</strong> Medical = 64; Mental Health = 9</p>
+<p><strong>Capacity:</strong> 4,438</p>
+<p><strong>Custody Levels Housed:</strong> G1-G5, Safekeeping, Security Detention</p>
+<p><strong>Approximate Acreage:</strong> 460</p>
+<p><strong>Agricultural Operations:</strong> Edible Crops, Feed Crops</p>
+<p><strong>Manufacturing and Logistics Op.:</strong> Textile Mill</p>
+<p><strong>Facility Operations:</strong> Maintenance</p>
+<p><strong>Additional Operations:</strong> Unit Maintenance</p>
+<p><strong>Medical Capabilities:</strong> Outpatient Medical</p>
+<p><strong>Educational Programs:</strong> Literacy, Adult Basic Education, GED</p>
+<p><strong>Additional Programs/Services:</strong> Chaplaincy, Peer Education</p>
+<p><strong>Community Work Projects:</strong> Local ISDs</p>
+<p><strong>Volunteer Initiatives:</strong> Faith-based Programs</p>
+""" + "<p>Visitation information and general announcements for families.</p>\n" * 20 + "</body></html>"
+
+
+def legacy(paragraphs):
+    details = {}
+    for text in paragraphs:
+        patterns = dict(LEGACY_PATTERNS)
+        for key, pattern in patterns.items():
+            match = re.search(pattern, text)
+            if match:
+                details[key] = match.group(1).strip()
+    return details
+
+
+def single_pass(paragraphs):
+    return FACILITY_DETAILS.extract_blocks(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Texas facility detail extraction')
+    parser.add_argument('--repeat', type=int, default=500, help='Pages parsed per timing run')
+    args = parser.parse_args()
+
+    soup = BeautifulSoup(SAMPLE_PAGE, 'html.parser')
+    paragraphs = [p.get_text() for p in soup.find_all('p')]
+
+    old, new = legacy(paragraphs), single_pass(paragraphs)
+    differences = sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+    print(f"Fields that differ: {len(differences)}")
+    for key in differences:
+        print(f"  {key}: legacy={old.get(key)!r} single-pass={new.get(key)!r}")
+
+    print(f"{len(paragraphs)} paragraphs, {len(LEGACY_PATTERNS)} labels, {args.repeat} pages per run")
+    timings = {}
+    for name, function in (('legacy', legacy), ('single-pass', single_pass)):
+        timings[name] = min(timeit.repeat(lambda: function(paragraphs), number=args.repeat, repeat=5))
+        print(f"{name:>12}: {timings[name] / args.repeat * 1e6:8.1f} us/page")
+    print(f"{'speedup':>12}: {timings['legacy'] / timings['single-pass']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
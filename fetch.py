@@ -10,25 +10,70 @@ import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
 from scrapers import FederalScraper, CaliforniaScraper, NewYorkScraper, TexasScraper, IllinoisScraper, FloridaScraper, PennsylvaniaScraper, GeorgiaScraper, NorthCarolinaScraper, MichiganScraper, VirginiaScraper, WashingtonScraper, ArizonaScraper, TennesseeScraper, MassachusettsScraper, IndianaScraper, MarylandScraper, MissouriScraper
+from scrapers import checkpoint, fixtures, geocoding, profiling, ratelimit, stages, tracing
+from prisons import changes, enrich, history, validate
 from s3_upload import S3Uploader
+from workqueue import DISCOVER, open_queue
+from scheduler import DEFAULT_BUDGET, DEFAULT_HISTORY_PATH, DeadlineScheduler, export_allowed, parse_stage_budgets
 
+# Changesets written during this run, by jurisdiction
+CHANGESETS = {}
 
+# Validation failures left after re-geocoding, by jurisdiction
+VALIDATION = {}
+
+
+@stages.stage(stages.EXPORT)
 def export_data(df, jurisdiction, output_dir):
     """Export data to multiple formats"""
+    # Work-queue stage tasks before export hand the scraped data on instead
+    checkpoint.check_stage(stages.EXPORT)
+    
     if df.empty:
         print(f"No data to export for {jurisdiction}")
         return
     
+    # Out of time: leave the last good export in place
+    if not export_allowed():
+        print(f"Skipping export for {jurisdiction}; it ran past its time budget")
+        return
+    
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
+    # Check the whole export at once and re-geocode only the rows with bad coordinates
+    with stages.stage(stages.VALIDATE):
+        flags = validate.validate(df)
+        if flags[validate.REGEOCODE_CHECKS].any(axis=None):
+            with stages.stage(stages.GEOCODE):
+                df = validate.regeocode(df, flags, geocoding.Geocoder().geocode)
+            flags = validate.validate(df)
+        VALIDATION[jurisdiction] = flags
+        print(f"Validation: {validate.describe(flags)}")
+    
+    # County FIPS and congressional district from local boundary files
+    with stages.stage(stages.ENRICH):
+        df = enrich.enrich_facilities(df)
+    
     base_filename = f"{jurisdiction.lower()}_prisons"
     
     # Export to JSON
     json_path = os.path.join(output_dir, f"{base_filename}.json")
+    previous = changes.read_export(json_path)
     df.to_json(json_path, orient='records', indent=2)
     print(f"Exported to: {json_path}")
     
+    # Record what changed since the last export
+    changeset = changes.diff_exports(previous, changes.read_export(json_path), jurisdiction)
+    changes.write_changeset(changeset, changes.changes_path(output_dir, jurisdiction))
+    CHANGESETS[jurisdiction] = changeset
+    print(f"Changes since last export: {changes.describe(changeset)}")
+    
+    # Keep population and capacity over time; the exports only hold the latest values
+    recorded = history.HistoryStore(history.history_path(output_dir)).append(df, jurisdiction.lower())
+    if recorded:
+        print(f"Recorded {recorded} population/capacity values in history")
+    
     # Export to CSV
     csv_path = os.path.join(output_dir, f"{base_filename}.csv")
     df.to_csv(csv_path, index=False)
@@ -256,6 +301,69 @@ def scrape_missouri():
     return pd.DataFrame()
 
 
+# Available scrapers
+SCRAPERS = {
+    'federal': scrape_federal,
+    'california': scrape_california,
+    'texas': scrape_texas,
+    'new_york': scrape_new_york,
+    'illinois': scrape_illinois,
+    'florida': scrape_florida,
+    'pennsylvania': scrape_pennsylvania,
+    'georgia': scrape_georgia,
+    'north_carolina': scrape_north_carolina,
+    'michigan': scrape_michigan,
+    'virginia': scrape_virginia,
+    'washington': scrape_washington,
+    'arizona': scrape_arizona,
+    'tennessee': scrape_tennessee,
+    'massachusetts': scrape_massachusetts,
+    'indiana': scrape_indiana,
+    'maryland': scrape_maryland,
+    'missouri': scrape_missouri
+}
+
+
+def run_jurisdiction(state, resume=False, checkpoint_dir=checkpoint.DEFAULT_CHECKPOINT_DIR):
+    """Scrape and export one jurisdiction, journaling progress for --resume"""
+    with stages.jurisdiction(state), \
+            checkpoint.journal(state, resume=resume, directory=checkpoint_dir) as journal, \
+            stages.stage(stages.SCRAPE):
+        df = SCRAPERS[state]()
+    if journal.replayed:
+        print(f"Resumed {journal.replayed} completed items from checkpoint")
+    
+    # Exported successfully; the next run starts fresh
+    if not df.empty and export_allowed():
+        journal.clear()
+    
+    if not df.empty:
+        print(f"✓ Successfully collected {len(df)} {state} facilities")
+    else:
+        print(f"✗ No data collected for {state}")
+    return df
+
+
+def enqueue_jurisdictions(args):
+    """Add a discover task per requested jurisdiction to the work queue"""
+    queue = open_queue(args.queue)
+    payload = {'upload_s3': args.upload_s3, 'upload_all': args.upload_all,
+               's3_bucket': args.s3_bucket, 'aws_profile': args.aws_profile}
+    
+    for state in [state.strip().lower() for state in args.states.split(',')]:
+        if state not in SCRAPERS:
+            print(f"✗ Unknown jurisdiction: {state}")
+            continue
+        task_id = queue.enqueue(DISCOVER, state, payload)
+        print(f"Queued {state} (task {task_id})")
+    
+    print("\nStart workers with:")
+    print(f"  python workqueue.py worker --queue {args.queue}")
+    if not args.queue.startswith(('http://', 'https://')):
+        print(f"For workers on other nodes, serve the queue: python workqueue.py serve --queue {args.queue} --host 0.0.0.0")
+    print(f"Check progress with: python workqueue.py status --queue {args.queue}")
+
+
 def main():
     """Main function to orchestrate prison data collection"""
     parser = argparse.ArgumentParser(description='Scrape prison data from multiple jurisdictions')
@@ -273,60 +381,84 @@ def main():
                        help='S3 bucket name for uploads')
     parser.add_argument('--aws-profile',
                        help='AWS profile name (overrides AWS_PROFILE_NAME env var)')
+    parser.add_argument('--upload-all',
+                       action='store_true',
+                       help='Upload every jurisdiction, not just those whose data changed in this run')
+    parser.add_argument('--trace-output',
+                       help='Write per-host HTTP timing histograms to this JSON file')
+    parser.add_argument('--profile',
+                       choices=profiling.PROFILE_MODES,
+                       help='Profile the run: cpu (cProfile), wall (sampling, includes network waits) or memory (tracemalloc)')
+    parser.add_argument('--profile-dir',
+                       default='profiles',
+                       help='Directory for per-jurisdiction, per-stage profile output')
+    parser.add_argument('--record-fixtures',
+                       help='Save every HTTP response under this directory for mock_server.py')
+    parser.add_argument('--mock-server',
+                       help=f'Send all requests to a local mock_server.py instance (or set {fixtures.MOCK_SERVER_ENV})')
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Continue interrupted jurisdictions from their checkpoint journals')
+    parser.add_argument('--checkpoint-dir',
+                       default=checkpoint.DEFAULT_CHECKPOINT_DIR,
+                       help='Directory for per-jurisdiction checkpoint journals')
+    parser.add_argument('--budget',
+                       type=float,
+                       default=DEFAULT_BUDGET,
+                       help='Seconds each jurisdiction may run before falling back to its last good export')
+    parser.add_argument('--stage-budget',
+                       help='Per-stage time budgets in seconds, e.g. details=600,geocode=300')
+    parser.add_argument('--run-history',
+                       default=DEFAULT_HISTORY_PATH,
+                       help='JSON file of previous run durations, used to order jurisdictions')
+    parser.add_argument('--queue',
+                       help='Enqueue the jurisdictions for workqueue.py workers instead of scraping (a SQLite queue file or a queue server URL)')
     
     args = parser.parse_args()
     
+    # Queue mode: workers (python workqueue.py worker) do the scraping
+    if args.queue:
+        enqueue_jurisdictions(args)
+        return
+    
+    # Record timings for every HTTP request made by the scrapers
+    tracer = tracing.enable()
+    
+    if args.record_fixtures:
+        fixtures.record_to(args.record_fixtures)
+    fixtures.redirect_to(args.mock_server)
+    
     # Parse requested jurisdictions
     requested_states = [state.strip().lower() for state in args.states.split(',')]
     
-    # Available scrapers
-    scrapers = {
-        'federal': scrape_federal,
-        'california': scrape_california,
-        'texas': scrape_texas,
-        'new_york': scrape_new_york,
-        'illinois': scrape_illinois,
-        'florida': scrape_florida,
-        'pennsylvania': scrape_pennsylvania,
-        'georgia': scrape_georgia,
-        'north_carolina': scrape_north_carolina,
-        'michigan': scrape_michigan,
-        'virginia': scrape_virginia,
-        'washington': scrape_washington,
-        'arizona': scrape_arizona,
-        'tennessee': scrape_tennessee,
-        'massachusetts': scrape_massachusetts,
-        'indiana': scrape_indiana,
-        'maryland': scrape_maryland,
-        'missouri': scrape_missouri
-    }
-    
     print("Prison Data Scraper")
     print("=" * 50)
     print(f"Requested jurisdictions: {', '.join(requested_states)}")
     print(f"Output directory: {args.output_dir}")
     print()
     
-    results = {}
+    profiler = None
+    if args.profile:
+        profiler = profiling.create_profiler(args.profile)
+        profiler.start()
     
+    runnable = []
     for state in requested_states:
-        if state in scrapers:
-            print(f"\n{'='*20} {state.upper()} {'='*20}")
-            try:
-                df = scrapers[state]()
-                results[state] = df
-                
-                if not df.empty:
-                    print(f"✓ Successfully collected {len(df)} {state} facilities")
-                else:
-                    print(f"✗ No data collected for {state}")
-                    
-            except Exception as e:
-                print(f"✗ Error scraping {state}: {e}")
-                results[state] = pd.DataFrame()
+        if state in SCRAPERS:
+            runnable.append(state)
         else:
             print(f"✗ Unknown jurisdiction: {state}")
-            print(f"Available options: {', '.join(scrapers.keys())}")
+            print(f"Available options: {', '.join(SCRAPERS.keys())}")
+    
+    # Shortest expected jurisdictions first, each bounded by its budget
+    scheduler = DeadlineScheduler(budget=args.budget,
+                                  stage_budgets=parse_stage_budgets(args.stage_budget),
+                                  history_path=args.run_history,
+                                  output_dir=args.output_dir)
+    results = scheduler.run(runnable, lambda state: run_jurisdiction(state, args.resume, args.checkpoint_dir))
+    
+    if profiler:
+        profiler.stop()
     
     # Summary
     print(f"\n{'='*20} SUMMARY {'='*20}")
@@ -335,10 +467,48 @@ def main():
         count = len(df) if not df.empty else 0
         total_facilities += count
         status = "✓" if count > 0 else "✗"
+        if scheduler.statuses.get(state) == 'fallback':
+            print(f"↺ {state.capitalize()}: {count} facilities (last good export, out of time)")
+            continue
         print(f"{status} {state.capitalize()}: {count} facilities")
     
     print(f"\nTotal facilities collected: {total_facilities}")
     
+    # What changed since the previous export
+    if CHANGESETS:
+        print(f"\n{'='*20} CHANGES {'='*20}")
+        for jurisdiction, changeset in CHANGESETS.items():
+            print(f"{jurisdiction}: {changes.describe(changeset)}")
+    
+    # Records that failed validation
+    if VALIDATION:
+        print(f"\n{'='*20} VALIDATION {'='*20}")
+        for jurisdiction, flags in VALIDATION.items():
+            print(f"{jurisdiction}: {validate.describe(flags)}")
+    
+    # HTTP timings per host
+    if tracer.hosts:
+        print(f"\n{'='*20} HTTP REQUESTS {'='*20}")
+        for line in tracer.format_summary():
+            print(line)
+        if args.trace_output:
+            tracer.write_json(args.trace_output)
+    
+    # Request rate each host settled on
+    limiter = ratelimit.get_limiter()
+    if limiter and limiter.hosts:
+        print(f"\n{'='*20} REQUEST RATES {'='*20}")
+        for line in limiter.format_summary():
+            print(line)
+    
+    # Profile output per jurisdiction and stage
+    if profiler:
+        print(f"\n{'='*20} PROFILE ({args.profile.upper()}) {'='*20}")
+        for line in profiler.summary_lines():
+            print(line)
+        paths = profiler.write(args.profile_dir)
+        print(f"\nWrote {len(paths)} profile files to: {args.profile_dir}/")
+    
     if total_facilities > 0:
         print(f"\nData exported to: {args.output_dir}/")
         print("Available formats: JSON, CSV, GeoJSON (where coordinates available)")
@@ -349,7 +519,12 @@ def main():
                 print(f"\n{'='*20} S3 UPLOAD {'='*20}")
                 uploader = S3Uploader(bucket_name=args.s3_bucket, profile_name=args.aws_profile)
                 
-                upload_results = uploader.upload_prison_data(args.output_dir)
+                # Only republish jurisdictions whose export changed
+                changed = None
+                if not args.upload_all:
+                    changed = [name for name, changeset in CHANGESETS.items() if changes.has_changes(changeset)]
+                    print(f"Uploading {len(changed)} changed jurisdictions (use --upload-all to upload everything)")
+                upload_results = uploader.upload_prison_data(args.output_dir, jurisdictions=changed)
                 
                 total_uploaded = sum(result['files_uploaded'] for result in upload_results.values())
                 print(f"\nS3 Upload Summary:")
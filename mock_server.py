@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Local mock DOC-site server for offline load and latency testing.
+
+Serves fixtures recorded with ``fetch.py --record-fixtures`` under
+``/<host>/<path>?<query>``, with configurable latency, jitter, injected
+429/503 responses and a bandwidth cap, globally or per host. Scrapers are
+pointed at it with ``--mock-server`` (or the environment variable in
+``scrapers.fixtures.MOCK_SERVER_ENV``). A URL that was not recorded gets a
+404, so an unrecorded ``?page=N`` ends pagination instead of replaying
+another page; ``--path-fallback`` opts in to serving a recording of the
+same path instead.
+
+Example:
+    python mock_server.py --fixtures fixtures --latency 200 --jitter 100 --error-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from scrapers.fixtures import MOCK_SERVER_ENV, load_fixture_index, normalize_url
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MockSettings:
+    """Latency, failure and bandwidth settings for one host (or the default)."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 error_statuses=(429, 503), retry_after: Optional[int] = 1,
+                 bandwidth_kbps: Optional[float] = None):
+        """
+        Initialize mock settings.
+
+        Args:
+            latency_ms: Fixed delay before the response headers are sent
+            jitter_ms: Random extra delay, uniform in [0, jitter_ms]
+            error_rate: Fraction of requests answered with an injected error
+            error_statuses: Status codes to pick from for injected errors
+            retry_after: Retry-After header value for injected errors (None to omit)
+            bandwidth_kbps: Cap on response body throughput in KB/s (None for unlimited)
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.bandwidth_kbps = bandwidth_kbps
+
+    def merged(self, overrides: Dict) -> 'MockSettings':
+        """Return a copy with per-host overrides applied."""
+        values = dict(vars(self))
+        values.update(overrides)
+        return MockSettings(**values)
+
+
+class MockDocServer(ThreadingHTTPServer):
+    """Serve recorded DOC-site fixtures with injectable latency and failures."""
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir: str, settings: MockSettings,
+                 host_settings: Optional[Dict[str, Dict]] = None, seed: Optional[int] = None,
+                 path_fallback: bool = False):
+        super().__init__(address, MockRequestHandler)
+        self.fixtures = load_fixture_index(fixtures_dir)
+        # Opt-in: the first recorded URL of each path in sorted order, so the choice is reproducible
+        self.by_path: Dict[str, Dict] = {}
+        if path_fallback:
+            for key in sorted(self.fixtures):
+                self.by_path.setdefault(key.split('?', 1)[0], self.fixtures[key])
+        self.settings = settings
+        self.host_settings = {host: settings.merged(overrides)
+                              for host, overrides in (host_settings or {}).items()}
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        logger.info(f"Loaded {len(self.fixtures)} fixtures from {fixtures_dir}")
+
+    def settings_for(self, host: str) -> MockSettings:
+        return self.host_settings.get(host, self.settings)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Find a fixture by exact URL, or by path alone if path fallback is enabled."""
+        fixture = self.fixtures.get(key)
+        if fixture is None:
+            fixture = self.by_path.get(key.split('?', 1)[0])
+            if fixture is not None:
+                self.count('path_fallback')
+        return fixture
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] += 1
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Handle ``GET /<host>/<path>?<query>`` against the fixture index."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/__stats':
+            self.send_body(200, json.dumps(dict(self.server.stats), indent=2).encode(),
+                           {'Content-Type': 'application/json'}, None)
+            return
+
+        # Path is /<host>/<path>; rebuild the original URL to find its fixture
+        original = f"https:/{self.path}"
+        host = urlsplit(original).hostname or ''
+        settings = self.server.settings_for(host)
+        self.server.count('requests')
+
+        with self.server.lock:
+            delay = settings.latency_ms + self.server.random.uniform(0, settings.jitter_ms)
+            inject_error = self.server.random.random() < settings.error_rate
+            error_status = self.server.random.choice(settings.error_statuses)
+        time.sleep(delay / 1000)
+
+        if inject_error:
+            self.server.count(f"injected_{error_status}")
+            headers = {'Content-Type': 'text/plain'}
+            if settings.retry_after is not None:
+                headers['Retry-After'] = str(settings.retry_after)
+            self.send_body(error_status, b'Injected error\n', headers, None)
+            return
+
+        fixture = self.server.lookup(normalize_url(original))
+        if not fixture:
+            self.server.count('missing')
+            logger.warning(f"No fixture for {original}")
+            self.send_body(404, b'No fixture recorded for this URL\n', {'Content-Type': 'text/plain'}, None)
+            return
+
+        with open(fixture['body_path'], 'rb') as f:
+            body = f.read()
+        self.server.count('served')
+        self.send_body(fixture.get('status', 200), body, fixture.get('headers', {}), settings.bandwidth_kbps)
+
+    def send_body(self, status: int, body: bytes, headers: Dict, bandwidth_kbps: Optional[float]):
+        """Send a response, throttling the body to the bandwidth cap."""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if not bandwidth_kbps:
+            self.wfile.write(body)
+            return
+        chunk_size = 4096
+        seconds_per_chunk = chunk_size / (bandwidth_kbps * 1024)
+        for start in range(0, len(body), chunk_size):
+            self.wfile.write(body[start:start + chunk_size])
+            time.sleep(seconds_per_chunk)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def main():
+    """Command line interface for the mock DOC-site server."""
+    parser = argparse.ArgumentParser(description='Serve recorded DOC-site fixtures for offline load testing')
+    parser.add_argument('--fixtures', default='fixtures', help='Fixture directory (record with fetch.py --record-fixtures)')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0, help='Fixed latency per request in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='Random extra latency up to this many ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 429/503')
+    parser.add_argument('--error-status', default='429,503', help='Comma-separated status codes to inject')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with injected errors')
+    parser.add_argument('--bandwidth', type=float, help='Response body bandwidth cap in KB/s')
+    parser.add_argument('--host-config', help='JSON file of per-host overrides, e.g. {"www.tdcj.texas.gov": {"latency_ms": 800}}')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible jitter and error injection')
+    parser.add_argument('--path-fallback', action='store_true',
+                        help='Serve a recording of the same path for unrecorded query strings (default: 404)')
+
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        error_statuses=[int(code) for code in args.error_status.split(',')],
+        retry_after=args.retry_after,
+        bandwidth_kbps=args.bandwidth,
+    )
+    host_settings = None
+    if args.host_config:
+        with open(args.host_config) as f:
+            host_settings = json.load(f)
+
+    server = MockDocServer((args.host, args.port), args.fixtures, settings, host_settings, args.seed,
+                           path_fallback=args.path_fallback)
+    url = f"http://{args.host}:{server.server_port}"
+    print(f"Mock DOC server listening on {url}")
+    print(f"Point scrapers at it with: {MOCK_SERVER_ENV}={url} python fetch.py ... (or --mock-server {url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Tools for working with the exported prison data.
+
+Run the command line tools as modules, e.g. ``python -m prisons.spatial``.
+"""
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Run-to-run change detection for jurisdiction exports.
+
+Each new export is compared with the previous one using a keyed outer merge,
+and the differences are written as a compact changeset next to the export:
+facilities added, removed (closed), renamed (same location, new name),
+moved, field changes such as capacity or population, and columns the
+export gained or lost. Unchanged jurisdictions produce an empty changeset,
+which lets publishing skip them.
+
+Example:
+    python -m prisons.changes data/texas/texas_prisons.json /tmp/texas_prisons.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .spatial import haversine_km
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stable identifiers some scrapers provide, in order of preference
+KEY_CANDIDATES = ['code', 'facility_code', 'unit_code', 'acronym', 'entity_id']
+
+# A facility whose coordinates shift less than this is not reported as moved
+MOVE_THRESHOLD_KM = 0.25
+
+# Removed and added facilities this close together are treated as a rename
+RENAME_DISTANCE_KM = 0.25
+
+CHANGE_TYPES = ['added', 'removed', 'renamed', 'moved', 'changed']
+
+# Never reported as field changes
+IGNORED_FIELDS = {'jurisdiction', 'latitude', 'longitude', '_key'}
+
+
+def changes_path(output_dir: str, jurisdiction: str) -> str:
+    """Path of a jurisdiction's changeset, next to its other exports."""
+    return os.path.join(output_dir, f"{jurisdiction.lower()}_changes.json")
+
+
+def choose_key(previous: pd.DataFrame, current: pd.DataFrame) -> Optional[str]:
+    """Pick an identifier column that is complete and unique in both exports."""
+    for column in KEY_CANDIDATES:
+        if column not in previous.columns or column not in current.columns:
+            continue
+        usable = all(frame[column].notna().all() and frame[column].astype(str).is_unique
+                     for frame in (previous, current))
+        if usable:
+            return column
+    return None
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Lowercase facility names with punctuation reduced to single spaces."""
+    return names.fillna('').astype(str).str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+
+def facility_keys(df: pd.DataFrame, key_column: Optional[str] = None) -> pd.Series:
+    """
+    Build a merge key per facility.
+
+    Uses ``key_column`` when given, otherwise the normalized name plus an
+    occurrence number so facilities sharing a name stay distinct.
+    """
+    if key_column:
+        return df[key_column].astype(str).str.strip()
+    normalized = normalize_names(df['name'] if 'name' in df.columns else pd.Series('', index=df.index))
+    occurrence = normalized.groupby(normalized).cumcount()
+    return normalized.where(occurrence == 0, normalized + '#' + occurrence.astype(str))
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _scalar(value):
+    """JSON-friendly version of a DataFrame cell."""
+    if _is_missing(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _match_renames(removed: pd.DataFrame, added: pd.DataFrame) -> List[tuple]:
+    """Pair removed and added facilities at (almost) the same location."""
+    removed = removed.dropna(subset=['latitude_old', 'longitude_old'])
+    added = added.dropna(subset=['latitude_new', 'longitude_new'])
+    if removed.empty or added.empty:
+        return []
+    distances = haversine_km(removed['latitude_old'].to_numpy(dtype=float)[:, None],
+                             removed['longitude_old'].to_numpy(dtype=float)[:, None],
+                             added['latitude_new'].to_numpy(dtype=float)[None, :],
+                             added['longitude_new'].to_numpy(dtype=float)[None, :])
+    pairs = []
+    used_removed, used_added = set(), set()
+    # Closest pairs first, each facility used once
+    for flat in np.argsort(distances, axis=None):
+        i, j = np.unravel_index(flat, distances.shape)
+        if distances[i, j] > RENAME_DISTANCE_KM:
+            break
+        if i in used_removed or j in used_added:
+            continue
+        used_removed.add(i)
+        used_added.add(j)
+        pairs.append((removed.index[i], added.index[j]))
+    return pairs
+
+
+def diff_exports(previous: pd.DataFrame, current: pd.DataFrame, jurisdiction: str) -> Dict:
+    """
+    Compare two exports of the same jurisdiction.
+
+    Args:
+        previous: Last export (may be empty)
+        current: New scrape results
+        jurisdiction: Jurisdiction name recorded in the changeset
+
+    Returns:
+        Changeset dict with a summary, one list per change type, and the
+        columns added to or removed from the export
+    """
+    key_column = choose_key(previous, current)
+    old = previous.copy()
+    new = current.copy()
+    old['_key'] = facility_keys(old, key_column) if not old.empty else pd.Series(dtype=str)
+    new['_key'] = facility_keys(new, key_column) if not new.empty else pd.Series(dtype=str)
+    for frame in (old, new):
+        for column in ('name', 'latitude', 'longitude'):
+            if column not in frame.columns:
+                frame[column] = np.nan
+
+    merged = old.merge(new, on='_key', how='outer', suffixes=('_old', '_new'), indicator=True)
+    removed = merged[merged['_merge'] == 'left_only']
+    added = merged[merged['_merge'] == 'right_only']
+    both = merged[merged['_merge'] == 'both']
+
+    changeset = {
+        'jurisdiction': jurisdiction,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'key': key_column or 'name',
+        'previous_count': len(previous),
+        'current_count': len(current),
+    }
+
+    # Renames: a facility disappeared and another appeared in the same place
+    renames = _match_renames(removed, added)
+    renamed_removed = {old_index for old_index, _ in renames}
+    renamed_added = {new_index for _, new_index in renames}
+    changeset['renamed'] = [
+        {'key': merged.at[new_index, '_key'], 'old_key': merged.at[old_index, '_key'],
+         'old_name': _scalar(merged.at[old_index, 'name_old']), 'new_name': _scalar(merged.at[new_index, 'name_new'])}
+        for old_index, new_index in renames
+    ]
+    added = added[~added.index.isin(renamed_added)]
+    changeset['added'] = [
+        {'key': key, 'name': _scalar(name), 'latitude': _scalar(lat), 'longitude': _scalar(lon)}
+        for key, name, lat, lon in zip(added['_key'], added['name_new'], added['latitude_new'], added['longitude_new'])
+    ]
+    removed = removed[~removed.index.isin(renamed_removed)]
+    changeset['removed'] = [
+        {'key': key, 'name': _scalar(name)} for key, name in zip(removed['_key'], removed['name_old'])
+    ]
+
+    # Moves: haversine over every matched pair at once
+    shifts = haversine_km(both['latitude_old'].to_numpy(dtype=float), both['longitude_old'].to_numpy(dtype=float),
+                          both['latitude_new'].to_numpy(dtype=float), both['longitude_new'].to_numpy(dtype=float))
+    is_moved = np.nan_to_num(shifts) > MOVE_THRESHOLD_KM
+    moved = both.loc[is_moved, ['_key', 'name_new', 'latitude_old', 'longitude_old', 'latitude_new', 'longitude_new']]
+    changeset['moved'] = [
+        {'key': key, 'name': _scalar(name), 'distance_km': round(float(shift), 3),
+         'old': [_scalar(old_lat), _scalar(old_lon)], 'new': [_scalar(new_lat), _scalar(new_lon)]}
+        for (key, name, old_lat, old_lon, new_lat, new_lon), shift
+        in zip(moved.itertuples(index=False, name=None), shifts[is_moved])
+    ]
+
+    # Field changes: compare every shared field of every matched pair in one array operation
+    fields = sorted((set(previous.columns) & set(current.columns)) - IGNORED_FIELDS)
+    changed: Dict[str, Dict] = {}
+    if not both.empty and fields:
+        before = both[[f"{field}_old" for field in fields]].to_numpy(dtype=object)
+        after = both[[f"{field}_new" for field in fields]].to_numpy(dtype=object)
+        differs = ~((before == after) | (pd.isna(before) & pd.isna(after)))
+        for row_position, column_position in zip(*np.nonzero(differs)):
+            index = both.index[row_position]
+            key = both.at[index, '_key']
+            entry = changed.setdefault(key, {'key': key, 'name': _scalar(both.at[index, 'name_new']), 'fields': {}})
+            entry['fields'][fields[column_position]] = [_scalar(before[row_position, column_position]),
+                                                        _scalar(after[row_position, column_position])]
+    changeset['changed'] = list(changed.values())
+
+    # Schema changes: a new column has to be published even if no facility changed otherwise
+    if len(previous.columns) and len(current.columns):
+        changeset['columns_added'] = sorted(set(current.columns) - set(previous.columns) - {'_key'})
+        changeset['columns_removed'] = sorted(set(previous.columns) - set(current.columns) - {'_key'})
+    else:
+        changeset['columns_added'], changeset['columns_removed'] = [], []
+
+    changeset['summary'] = {change: len(changeset[change]) for change in CHANGE_TYPES}
+    return changeset
+
+
+def has_changes(changeset: Optional[Dict]) -> bool:
+    """True if a changeset records any difference."""
+    if not changeset:
+        return False
+    # Changesets written before column tracking have no column lists
+    return (any(changeset['summary'].values())
+            or bool(changeset.get('columns_added')) or bool(changeset.get('columns_removed')))
+
+
+def describe(changeset: Dict) -> str:
+    """One-line summary such as ``2 added, 1 moved, 1 column added (county_fips)``."""
+    parts = [f"{count} {change}" for change, count in changeset['summary'].items() if count]
+    for direction in ('added', 'removed'):
+        columns = changeset.get(f"columns_{direction}") or []
+        if columns:
+            noun = 'column' if len(columns) == 1 else 'columns'
+            parts.append(f"{len(columns)} {noun} {direction} ({', '.join(columns)})")
+    return ', '.join(parts) if parts else 'no changes'
+
+
+def read_export(json_path: str) -> pd.DataFrame:
+    """
+    Read a JSON export for comparison, or an empty DataFrame if there is none.
+
+    Values are kept as stored (no dtype or date inference), so both sides of a
+    diff go through the same conversion.
+    """
+    if not os.path.exists(json_path):
+        return pd.DataFrame()
+    try:
+        return pd.read_json(json_path, orient='records', dtype=False, convert_dates=False)
+    except ValueError as e:
+        logger.warning(f"Could not read previous export {json_path}: {e}")
+        return pd.DataFrame()
+
+
+def write_changeset(changeset: Dict, path: str):
+    """Write a changeset as JSON."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(changeset, f, indent=2, default=str)
+
+
+def load_changeset(path: str) -> Optional[Dict]:
+    """Read a changeset written by ``write_changeset``."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    """Command line interface for comparing two exports."""
+    parser = argparse.ArgumentParser(description='Compare two JSON exports of a jurisdiction')
+    parser.add_argument('previous', help='Older export (JSON)')
+    parser.add_argument('current', help='Newer export (JSON)')
+    parser.add_argument('--jurisdiction', help='Jurisdiction name (defaults to the file name)')
+    parser.add_argument('--output', help='Write the changeset to this file instead of stdout')
+
+    args = parser.parse_args()
+    jurisdiction = args.jurisdiction or os.path.basename(args.current).replace('_prisons.json', '')
+    changeset = diff_exports(read_export(args.previous), read_export(args.current), jurisdiction)
+
+    if args.output:
+        write_changeset(changeset, args.output)
+        print(f"{jurisdiction}: {describe(changeset)} (written to {args.output})")
+    else:
+        print(json.dumps(changeset, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Load the per-jurisdiction exports written by ``fetch.py`` as one table.
+"""
+
+import glob
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = 'data'
+
+
+def export_paths(data_dir: str = DEFAULT_DATA_DIR, jurisdictions: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Find the JSON export of each jurisdiction.
+
+    Args:
+        data_dir: Base output directory used by fetch.py
+        jurisdictions: Only include these jurisdictions (all by default)
+
+    Returns:
+        Sorted list of ``{data_dir}/{jurisdiction}/{jurisdiction}_prisons.json`` paths
+    """
+    if jurisdictions is not None:
+        paths = [os.path.join(data_dir, name, f"{name}_prisons.json") for name in jurisdictions]
+        return sorted(path for path in paths if os.path.exists(path))
+    return sorted(glob.glob(os.path.join(data_dir, '*', '*_prisons.json')))
+
+
+def load_facilities(data_dir: str = DEFAULT_DATA_DIR, jurisdictions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Combine jurisdiction exports into one DataFrame.
+
+    Sets ``jurisdiction`` to the export's directory name (the key used by
+    ``fetch.py --states``) and coerces coordinates to floats, so rows without
+    usable coordinates have NaN latitude/longitude.
+
+    Args:
+        data_dir: Base output directory used by fetch.py
+        jurisdictions: Only include these jurisdictions (all by default)
+
+    Returns:
+        DataFrame of facilities from every export found
+    """
+    frames = []
+    for path in export_paths(data_dir, jurisdictions):
+        jurisdiction = os.path.basename(os.path.dirname(path))
+        try:
+            df = pd.read_json(path, orient='records')
+        except ValueError as e:
+            logger.warning(f"Skipping unreadable export {path}: {e}")
+            continue
+        if df.empty:
+            continue
+        # Some scrapers already write a display name ("New York"); use the directory key throughout
+        df = df.drop(columns='jurisdiction', errors='ignore')
+        df.insert(0, 'jurisdiction', jurisdiction)
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=['jurisdiction', 'name', 'latitude', 'longitude'])
+
+    facilities = pd.concat(frames, ignore_index=True, sort=False)
+    for column in ('latitude', 'longitude'):
+        if column not in facilities.columns:
+            facilities[column] = float('nan')
+        facilities[column] = pd.to_numeric(facilities[column], errors='coerce')
+    return facilities
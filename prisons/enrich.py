@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+County and congressional-district enrichment from local boundary files.
+
+Facility coordinates are joined against Census cartographic boundary
+polygons with one vectorized spatial join per layer. The polygons are
+downloaded once, trimmed to the columns we need and stored as GeoPackages
+under ``.cache/boundaries``. Each process loads them once and builds an
+R-tree index for them. Every export gains the same ``county_fips``,
+``county_name`` and ``congressional_district`` fields, with no geocoder
+calls.
+
+Example:
+    python -m prisons.enrich download
+    python -m prisons.enrich join --output data/facilities_enriched.csv
+"""
+
+import argparse
+import logging
+import os
+import re
+import tempfile
+import warnings
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import requests
+
+from .dataset import DEFAULT_DATA_DIR, load_facilities
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOUNDARIES_DIR = os.path.join('.cache', 'boundaries')
+DEFAULT_YEAR = 2023
+DEFAULT_CONGRESS = 118
+
+CENSUS_URL = 'https://www2.census.gov/geo/tiger/GENZ{year}/shp/{name}.zip'
+COUNTY_FILE = 'counties.gpkg'
+DISTRICT_FILE = 'districts.gpkg'
+
+# Fields added to every export
+ENRICHED_COLUMNS = ['county_fips', 'county_name', 'congressional_district']
+
+# Coastal facilities can fall just outside the shoreline-clipped polygons (about 2 km)
+NEAREST_MAX_DEGREES = 0.02
+
+# At-large seats (single-district states) and DC's delegate
+AT_LARGE_DISTRICTS = {'00', '98'}
+
+# Boundary directories already reported as missing
+_missing_reported = set()
+
+
+def boundary_names(year: int = DEFAULT_YEAR, congress: int = DEFAULT_CONGRESS):
+    """Census file names of the county and congressional-district layers."""
+    return f"cb_{year}_us_county_500k", f"cb_{year}_us_cd{congress}_500k"
+
+
+def _download(url: str, path: str):
+    logger.info(f"Downloading {url}")
+    with requests.get(url, stream=True, timeout=120) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+
+
+def download_boundaries(boundaries_dir: str = DEFAULT_BOUNDARIES_DIR, year: int = DEFAULT_YEAR,
+                        congress: int = DEFAULT_CONGRESS):
+    """
+    Download the Census county and congressional-district layers and store
+    the fields used for enrichment.
+
+    Args:
+        boundaries_dir: Where to keep the prepared GeoPackages
+        year: Cartographic boundary file vintage
+        congress: Congress whose districts to use
+    """
+    os.makedirs(boundaries_dir, exist_ok=True)
+    county_name, district_name = boundary_names(year, congress)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for name in (county_name, district_name):
+            paths[name] = os.path.join(tmp, f"{name}.zip")
+            _download(CENSUS_URL.format(year=year, name=name), paths[name])
+
+        counties = gpd.read_file(f"zip://{paths[county_name]}").to_crs('EPSG:4326')
+        counties = counties[['GEOID', 'NAME', 'STATEFP', 'STUSPS', 'geometry']].rename(
+            columns={'GEOID': 'county_fips', 'NAME': 'county_name', 'STUSPS': 'state_abbr'})
+        counties.to_file(os.path.join(boundaries_dir, COUNTY_FILE), driver='GPKG')
+
+        districts = gpd.read_file(f"zip://{paths[district_name]}").to_crs('EPSG:4326')
+        number_column = next(column for column in districts.columns if re.fullmatch(r'CD\d+FP', column))
+        states = counties.drop_duplicates('STATEFP').set_index('STATEFP')['state_abbr']
+        numbers = districts[number_column].astype(str).str.zfill(2)
+        labels = districts['STATEFP'].map(states).fillna(districts['STATEFP'])
+        districts['congressional_district'] = labels + '-' + numbers.where(~numbers.isin(AT_LARGE_DISTRICTS), 'AL')
+        districts[['congressional_district', 'geometry']].to_file(os.path.join(boundaries_dir, DISTRICT_FILE),
+                                                                 driver='GPKG')
+    logger.info(f"Saved {len(counties)} counties and {len(districts)} districts to {boundaries_dir}")
+
+
+def boundaries_available(boundaries_dir: str = DEFAULT_BOUNDARIES_DIR) -> bool:
+    return all(os.path.exists(os.path.join(boundaries_dir, name)) for name in (COUNTY_FILE, DISTRICT_FILE))
+
+
+@lru_cache(maxsize=4)
+def load_boundaries(boundaries_dir: str = DEFAULT_BOUNDARIES_DIR):
+    """
+    County and district layers with their spatial indexes built.
+
+    Cached per process, so every export after the first reuses the indexes.
+    """
+    counties = gpd.read_file(os.path.join(boundaries_dir, COUNTY_FILE))[['county_fips', 'county_name', 'geometry']]
+    districts = gpd.read_file(os.path.join(boundaries_dir, DISTRICT_FILE))[['congressional_district', 'geometry']]
+    # Build the R-trees now rather than on the first join
+    for layer in (counties, districts):
+        layer.sindex
+    return counties, districts
+
+
+def _join(points: gpd.GeoDataFrame, polygons: gpd.GeoDataFrame) -> pd.DataFrame:
+    """Attributes of the polygon containing each point (nearest polygon nearby as a fallback)."""
+    columns = [column for column in polygons.columns if column != 'geometry']
+    joined = gpd.sjoin(points, polygons, how='left', predicate='within')
+    # A point on a shared border matches both polygons; keep one
+    joined = joined[~joined.index.duplicated(keep='first')]
+
+    missing = joined[columns[0]].isna()
+    if missing.any():
+        # Degrees are close enough for a 2 km cut-off and avoid reprojecting every polygon
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            nearest = gpd.sjoin_nearest(points[missing], polygons, how='left', max_distance=NEAREST_MAX_DEGREES)
+        nearest = nearest[~nearest.index.duplicated(keep='first')]
+        joined.loc[missing, columns] = nearest[columns]
+    return joined[columns]
+
+
+def enrich_facilities(df: pd.DataFrame, boundaries_dir: str = DEFAULT_BOUNDARIES_DIR) -> pd.DataFrame:
+    """
+    Add county FIPS, county name and congressional district to facilities.
+
+    Rows without usable coordinates get empty values. If the boundary files
+    have not been downloaded, the DataFrame is returned unchanged.
+
+    Args:
+        df: Facilities with latitude and longitude columns
+        boundaries_dir: Directory written by ``download_boundaries``
+
+    Returns:
+        Copy of ``df`` with the enrichment columns
+    """
+    if df.empty or 'latitude' not in df.columns or 'longitude' not in df.columns:
+        return df
+    if not boundaries_available(boundaries_dir):
+        if boundaries_dir not in _missing_reported:
+            _missing_reported.add(boundaries_dir)
+            logger.info(f"No boundary files in {boundaries_dir}; run `python -m prisons.enrich download` to add "
+                        f"county and district fields")
+        return df
+
+    counties, districts = load_boundaries(boundaries_dir)
+    lat = pd.to_numeric(df['latitude'], errors='coerce')
+    lon = pd.to_numeric(df['longitude'], errors='coerce')
+    located = lat.notna() & lon.notna()
+
+    enriched = df.drop(columns=[column for column in ENRICHED_COLUMNS if column in df.columns])
+    for column in ENRICHED_COLUMNS:
+        enriched[column] = pd.Series(np.nan, index=df.index, dtype=object)
+    if located.any():
+        points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon[located], lat[located]),
+                                  index=df.index[located], crs='EPSG:4326')
+        for layer in (counties, districts):
+            values = _join(points, layer)
+            for column in values.columns:
+                enriched.loc[values.index, column] = values[column]
+    return enriched
+
+
+def main():
+    """Command line interface for boundary downloads and enrichment."""
+    parser = argparse.ArgumentParser(description='Add county and congressional district fields to facilities')
+    parser.add_argument('--boundaries-dir', default=DEFAULT_BOUNDARIES_DIR, help='Prepared boundary files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    download = subparsers.add_parser('download', help='Download and prepare Census boundary files')
+    download.add_argument('--year', type=int, default=DEFAULT_YEAR, help='Boundary file vintage')
+    download.add_argument('--congress', type=int, default=DEFAULT_CONGRESS, help='Congress for district lines')
+
+    join = subparsers.add_parser('join', help='Enrich the current exports')
+    join.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    join.add_argument('--jurisdictions', help='Comma-separated jurisdictions (all by default)')
+    join.add_argument('--output', help='Write the enriched facilities to this CSV')
+
+    args = parser.parse_args()
+
+    if args.command == 'download':
+        download_boundaries(args.boundaries_dir, args.year, args.congress)
+        return
+
+    if not boundaries_available(args.boundaries_dir):
+        parser.error(f"no boundary files in {args.boundaries_dir}; run the download command first")
+    jurisdictions = [name.strip() for name in args.jurisdictions.split(',')] if args.jurisdictions else None
+    enriched = enrich_facilities(load_facilities(args.data_dir, jurisdictions), args.boundaries_dir)
+
+    coverage = enriched.groupby('jurisdiction')[ENRICHED_COLUMNS].count()
+    coverage.insert(0, 'facilities', enriched.groupby('jurisdiction').size())
+    print(coverage.to_string())
+    if args.output:
+        enriched.to_csv(args.output, index=False)
+        print(f"\nWrote {len(enriched)} facilities to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
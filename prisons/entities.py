@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Cross-jurisdiction entity resolution for the national dataset.
+
+The same facility can appear in several exports: a federal BOP site and a
+state list, a private contractor listed by two states, or a scraper that
+emits a row twice. Facilities are only compared within blocks (same ZIP
+code, or the same or a neighbouring geohash cell), so the number of
+comparisons grows roughly linearly with the dataset. Candidate pairs are
+scored on name, address and distance, matches are clustered with union-find,
+and each cluster gets a canonical facility ID that is kept stable across
+runs through a small registry file.
+
+Example:
+    python -m prisons.entities --output data/facilities_resolved.csv
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .changes import facility_keys
+from .dataset import DEFAULT_DATA_DIR, load_facilities
+from .spatial import haversine_km
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.join(DEFAULT_DATA_DIR, 'facility_ids.json')
+
+# Precision 6 cells are about 1.2 km x 0.6 km; neighbours are searched too
+GEOHASH_PRECISION = 6
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+ADDRESS_COLUMNS = ['street_address', 'address', 'address_line1']
+ZIP_COLUMNS = ['zip_code', 'zipCode', 'zip']
+
+ABBREVIATIONS = {
+    'corr': 'correctional', 'cor': 'correctional', 'ctr': 'center', 'cntr': 'center', 'inst': 'institution',
+    'fac': 'facility', 'st': 'state', 'co': 'county', 'dept': 'department', 'det': 'detention',
+    'fed': 'federal', 'pen': 'penitentiary', 'mt': 'mount', 'ft': 'fort',
+}
+
+# Words shared by most facility names carry no identity on their own
+GENERIC_WORDS = {
+    'the', 'of', 'for', 'and', 'at', 'state', 'county', 'correctional', 'correction', 'corrections', 'facility',
+    'center', 'institution', 'prison', 'complex', 'federal', 'penitentiary', 'detention', 'department',
+}
+
+# Words that tell apart facilities sharing a campus ("X Annex", "X East Unit", "X Work Center")
+QUALIFIER_WORDS = {
+    'annex', 'unit', 'east', 'west', 'north', 'south', 'camp', 'satellite', 'work', 'transitional', 'reentry',
+    'reception', 'probation', 'medium', 'minimum', 'maximum', 'security', 'inpatient', 'treatment', 'medical',
+    'women', 'womens', 'men', 'mens', 'juvenile', 'youth', 'release', 'annexe',
+}
+
+STREET_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'highway': 'hwy', 'drive': 'dr', 'boulevard': 'blvd',
+    'lane': 'ln', 'parkway': 'pkwy', 'route': 'rt', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+
+def geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash string."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision: int = GEOHASH_PRECISION) -> Tuple[float, float]:
+    """(lat, lon) size in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def geohash_neighbourhood(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> Set[str]:
+    """The geohash of a point plus its eight neighbouring cells."""
+    lat_step, lon_step = geohash_cell_size(precision)
+    return {geohash(min(90.0, max(-90.0, lat + dy * lat_step)), ((lon + dx * lon_step + 180) % 360) - 180, precision)
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+
+
+def normalize_name(name) -> str:
+    """Lowercase a facility name, drop parentheticals and punctuation, expand abbreviations."""
+    if not isinstance(name, str):
+        return ''
+    name = re.sub(r'\([^)]*\)', ' ', name.lower())
+    tokens = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def core_tokens(normalized: str) -> Set[str]:
+    """Distinctive tokens of a normalized name (generic and qualifier words removed)."""
+    return {token for token in normalized.split()
+            if token not in GENERIC_WORDS and token not in QUALIFIER_WORDS and not token.isdigit()}
+
+
+def qualifier_tokens(normalized: str) -> Set[str]:
+    """Qualifier words and unit numbers of a normalized name."""
+    return {token for token in normalized.split() if token in QUALIFIER_WORDS or token.isdigit()}
+
+
+def normalize_address(address) -> str:
+    """Normalize a street address for comparison."""
+    if not isinstance(address, str):
+        return ''
+    tokens = re.sub(r'[^a-z0-9]+', ' ', address.lower()).split()
+    return ' '.join(STREET_ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def _first_present(df: pd.DataFrame, columns: Iterable[str]) -> pd.Series:
+    result = pd.Series([None] * len(df), index=df.index, dtype=object)
+    for column in columns:
+        if column in df.columns:
+            result = result.where(result.notna() & (result != ''), df[column])
+    return result
+
+
+def prepare(facilities: pd.DataFrame) -> pd.DataFrame:
+    """Add the normalized fields used for blocking and scoring."""
+    df = facilities.reset_index(drop=True).copy()
+    keys = pd.Series('', index=df.index, dtype=object)
+    for jurisdiction, group in df.groupby('jurisdiction', sort=False):
+        keys.loc[group.index] = jurisdiction + ':' + facility_keys(group)
+    df['entity_key'] = keys
+    df['_name'] = df['name'].map(normalize_name) if 'name' in df.columns else ''
+    df['_core'] = df['_name'].map(core_tokens)
+    df['_qualifiers'] = df['_name'].map(qualifier_tokens)
+    # A jurisdiction's own facility code; two different codes are two facilities
+    df['_code'] = df['code'].map(lambda code: str(code) if pd.notna(code) else '') if 'code' in df.columns else ''
+    df['_address'] = _first_present(df, ADDRESS_COLUMNS).map(normalize_address)
+    zips = _first_present(df, ZIP_COLUMNS).astype(str).str.extract(r'(\d{5})', expand=False)
+    df['_zip'] = zips.where(zips.notna(), None)
+    return df
+
+
+def candidate_pairs(df: pd.DataFrame) -> Set[Tuple[int, int]]:
+    """Pairs of rows that share a ZIP block or a geohash neighbourhood."""
+    pairs: Set[Tuple[int, int]] = set()
+
+    by_zip: Dict[str, List[int]] = defaultdict(list)
+    for index, zip_code in df['_zip'].items():
+        if zip_code:
+            by_zip[zip_code].append(index)
+    for members in by_zip.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                pairs.add((i, j))
+
+    located = df.dropna(subset=['latitude', 'longitude'])
+    by_cell: Dict[str, List[int]] = defaultdict(list)
+    cells = {index: geohash(lat, lon) for index, lat, lon
+             in zip(located.index, located['latitude'], located['longitude'])}
+    for index, cell in cells.items():
+        by_cell[cell].append(index)
+    for index, lat, lon in zip(located.index, located['latitude'], located['longitude']):
+        for cell in geohash_neighbourhood(lat, lon):
+            for other in by_cell.get(cell, ()):
+                if other > index:
+                    pairs.add((index, other))
+    return pairs
+
+
+def name_similarity(a: str, b: str, core_a: Set[str], core_b: Set[str]) -> float:
+    """Character-level similarity of the distinctive part of two names."""
+    if core_a and core_b:
+        a, b = ' '.join(sorted(core_a)), ' '.join(sorted(core_b))
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def score_pairs(df: pd.DataFrame, pairs: Iterable[Tuple[int, int]]) -> pd.DataFrame:
+    """Name, address and distance scores for candidate pairs."""
+    pairs = sorted(pairs)
+    if not pairs:
+        return pd.DataFrame(columns=['left', 'right', 'name_score', 'address_score', 'distance_km', 'same_zip',
+                                     'compatible'])
+    left = np.array([i for i, _ in pairs])
+    right = np.array([j for _, j in pairs])
+    lat, lon = df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float)
+    names, cores = df['_name'].to_numpy(), df['_core'].to_numpy()
+    addresses, zips = df['_address'].to_numpy(), df['_zip'].to_numpy()
+    qualifiers, codes = df['_qualifiers'].to_numpy(), df['_code'].to_numpy()
+    jurisdictions = df['jurisdiction'].to_numpy()
+
+    scores = pd.DataFrame({'left': left, 'right': right})
+    scores['distance_km'] = haversine_km(lat[left], lon[left], lat[right], lon[right])
+    scores['name_score'] = [name_similarity(names[i], names[j], cores[i], cores[j]) for i, j in pairs]
+    scores['address_score'] = [difflib.SequenceMatcher(None, addresses[i], addresses[j]).ratio()
+                               if addresses[i] and addresses[j] else 0.0 for i, j in pairs]
+    scores['same_zip'] = [bool(zips[i]) and zips[i] == zips[j] for i, j in pairs]
+    scores['compatible'] = [qualifiers[i] == qualifiers[j]
+                            and not (jurisdictions[i] == jurisdictions[j] and codes[i] and codes[j] and codes[i] != codes[j])
+                            for i, j in pairs]
+    return scores
+
+
+def is_match(scores: pd.DataFrame) -> pd.Series:
+    """
+    Decision rule over scored pairs.
+
+    Neighbouring facilities often share a town name, a campus or even a
+    street address, so a match needs the same distinctive name, the same
+    qualifiers and codes, and either the same spot or the same address.
+    """
+    same_place = ((scores['distance_km'] <= 0.3)
+                  | ((scores['address_score'] >= 0.9) & (scores['same_zip'] | (scores['distance_km'] <= 2))))
+    return scores['compatible'] & (scores['name_score'] >= 0.9) & same_place
+
+
+class UnionFind:
+    """Disjoint sets with path compression and union by size."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+
+def load_registry(path: str = DEFAULT_REGISTRY_PATH) -> Dict[str, str]:
+    """Entity key to canonical ID mapping from previous runs."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_registry(registry: Dict[str, str], path: str = DEFAULT_REGISTRY_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(dict(sorted(registry.items())), f, indent=2)
+
+
+def _new_id(anchor: str) -> str:
+    return 'fac_' + hashlib.sha1(anchor.encode('utf-8')).hexdigest()[:12]
+
+
+def assign_ids(entity_keys: List[str], clusters: Dict[int, List[int]], registry: Dict[str, str]) -> Dict[int, str]:
+    """
+    Give each cluster a canonical ID, reusing IDs from the registry.
+
+    A cluster keeps the ID most of its previously seen members had. New
+    clusters (or the smaller half of a split cluster) get an ID derived from
+    their alphabetically first member, so reruns produce the same IDs.
+    """
+    assigned: Dict[int, str] = {}
+    taken: Set[str] = set()
+    # Larger clusters choose first, so a split keeps the ID on its bigger part
+    for root, members in sorted(clusters.items(), key=lambda item: (-len(item[1]), min(entity_keys[m] for m in item[1]))):
+        previous = Counter(registry[entity_keys[m]] for m in members if entity_keys[m] in registry)
+        candidates = [canonical for canonical, _ in sorted(previous.items(), key=lambda item: (-item[1], item[0]))
+                      if canonical not in taken]
+        if candidates:
+            canonical = candidates[0]
+        else:
+            anchor = min(entity_keys[m] for m in members)
+            canonical = _new_id(anchor)
+            while canonical in taken:
+                anchor += '+'
+                canonical = _new_id(anchor)
+        taken.add(canonical)
+        assigned[root] = canonical
+    return assigned
+
+
+def resolve(facilities: pd.DataFrame, registry: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Cluster duplicate facilities and assign canonical IDs.
+
+    Args:
+        facilities: Combined dataset from ``load_facilities``
+        registry: Entity key to canonical ID mapping from earlier runs
+
+    Returns:
+        (facilities with entity_key, canonical_id and cluster_size columns, stats dict)
+    """
+    df = prepare(facilities)
+    pairs = candidate_pairs(df)
+    scores = score_pairs(df, pairs)
+    matches = scores[is_match(scores)] if not scores.empty else scores
+
+    forest = UnionFind(len(df))
+    for left, right in zip(matches['left'], matches['right']):
+        forest.union(int(left), int(right))
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(df)):
+        clusters[forest.find(index)].append(index)
+
+    entity_keys = df['entity_key'].tolist()
+    ids = assign_ids(entity_keys, clusters, registry or {})
+    roots = [forest.find(index) for index in range(len(df))]
+    df['canonical_id'] = [ids[root] for root in roots]
+    df['cluster_size'] = [len(clusters[root]) for root in roots]
+
+    stats = {
+        'facilities': len(df),
+        'candidate_pairs': len(pairs),
+        'all_pairs': len(df) * (len(df) - 1) // 2,
+        'matched_pairs': len(matches),
+        'entities': len(clusters),
+        'duplicate_clusters': sum(1 for members in clusters.values() if len(members) > 1),
+    }
+    return df.drop(columns=['_name', '_core', '_qualifiers', '_code', '_address', '_zip']), stats
+
+
+def main():
+    """Command line interface for entity resolution."""
+    parser = argparse.ArgumentParser(description='Deduplicate facilities across jurisdictions')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_PATH, help='Canonical ID registry (kept across runs)')
+    parser.add_argument('--output', default=os.path.join(DEFAULT_DATA_DIR, 'facilities_resolved.csv'),
+                        help='CSV of every facility with its canonical ID')
+    parser.add_argument('--show', type=int, default=10, help='Print this many duplicate clusters')
+
+    args = parser.parse_args()
+    registry = load_registry(args.registry)
+    resolved, stats = resolve(load_facilities(args.data_dir), registry)
+
+    registry.update(zip(resolved['entity_key'], resolved['canonical_id']))
+    save_registry(registry, args.registry)
+    resolved.to_csv(args.output, index=False)
+
+    print(f"Facilities: {stats['facilities']}")
+    print(f"Compared {stats['candidate_pairs']} candidate pairs instead of {stats['all_pairs']}")
+    print(f"Matched pairs: {stats['matched_pairs']}")
+    print(f"Entities: {stats['entities']} ({stats['duplicate_clusters']} with duplicates)")
+
+    duplicates = resolved[resolved['cluster_size'] > 1].sort_values(['cluster_size', 'canonical_id'], ascending=[False, True])
+    for canonical_id, group in list(duplicates.groupby('canonical_id', sort=False))[:args.show]:
+        members = '; '.join(f"{row.jurisdiction}: {row.name}" for row in group.itertuples())
+        print(f"  {canonical_id}: {members}")
+    print(f"\nWrote {args.output} and {args.registry}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Append-only history of facility population and capacity.
+
+Exports are overwritten on every run, so each export also appends its
+population and capacity figures to a SQLite store next to the data
+(``data/history.sqlite``). Observations are stored one value per row,
+clustered by jurisdiction, facility, metric and time, so a facility's
+series or a date range is read with an index range scan. Downsampling
+(hourly, daily, weekly or monthly averages) happens in SQL, so trend
+queries never load every snapshot.
+
+Example:
+    python -m prisons.history series --metric population --jurisdictions federal --every month
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from .changes import choose_key, facility_keys, normalize_names
+from .dataset import DEFAULT_DATA_DIR, export_paths, load_facilities
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DB = os.path.join(DEFAULT_DATA_DIR, 'history.sqlite')
+
+# Export columns recorded on every run
+METRICS = ['population', 'capacity']
+
+# Downsampling periods: fixed widths in seconds, or calendar months
+PERIODS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400, 'month': None}
+
+# The epoch is a Thursday; shift week buckets to start on Monday
+WEEK_OFFSET = 4 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    jurisdiction TEXT NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    facilities INTEGER NOT NULL,
+    observations INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (jurisdiction, recorded_at);
+
+CREATE TABLE IF NOT EXISTS observations (
+    jurisdiction TEXT NOT NULL,
+    facility_key TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (jurisdiction, facility_key, metric, recorded_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_by_time ON observations (metric, recorded_at);
+
+CREATE TABLE IF NOT EXISTS facilities (
+    jurisdiction TEXT NOT NULL,
+    facility_key TEXT NOT NULL,
+    name TEXT,
+    PRIMARY KEY (jurisdiction, facility_key)
+) WITHOUT ROWID;
+
+-- Identifier column chosen on a jurisdiction's first run (NULL: normalized names)
+CREATE TABLE IF NOT EXISTS jurisdiction_keys (
+    jurisdiction TEXT PRIMARY KEY,
+    key_column TEXT
+);
+"""
+
+Timestamp = Union[int, float, str, datetime, None]
+
+
+def history_path(output_dir: str) -> str:
+    """History database for a jurisdiction output directory (``data/texas`` -> ``data/history.sqlite``)."""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), 'history.sqlite')
+
+
+def to_epoch(value: Timestamp) -> Optional[int]:
+    """Seconds since the epoch for a number, ISO date string or datetime (naive values are UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def metric_values(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Numeric population/capacity columns of an export ("1,234" becomes 1234)."""
+    values = {}
+    for metric in METRICS:
+        if metric not in df.columns:
+            continue
+        column = df[metric]
+        # Text columns are object dtype before pandas 3 and str dtype after
+        if not pd.api.types.is_numeric_dtype(column):
+            column = column.astype(str).str.replace(',', '', regex=False)
+        values[metric] = pd.to_numeric(column, errors='coerce')
+    return values
+
+
+class HistoryStore:
+    """Append-only time series of facility metrics in a SQLite file."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB):
+        """
+        Open (and create if needed) a history store.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def append(self, df: pd.DataFrame, jurisdiction: str, recorded_at: Timestamp = None) -> int:
+        """
+        Record one run's metrics for a jurisdiction.
+
+        Existing observations are never changed; recording the same
+        jurisdiction twice in the same second keeps the first values.
+
+        Args:
+            df: Export of the jurisdiction
+            jurisdiction: Jurisdiction key (the export directory name)
+            recorded_at: Time of the run (now by default)
+
+        Returns:
+            Number of observations written
+        """
+        values = metric_values(df)
+        if df.empty or not values:
+            return 0
+
+        recorded_at = to_epoch(recorded_at) if recorded_at is not None else int(time.time())
+        names = df['name'] if 'name' in df.columns else pd.Series(None, index=df.index)
+
+        with self._transaction() as conn:
+            keys = self._facility_keys(conn, df, jurisdiction)
+            rows = [(jurisdiction, key, metric, recorded_at, float(value))
+                    for metric, column in values.items()
+                    for key, value in zip(keys, column) if pd.notna(value)]
+            facilities = [(jurisdiction, key, name if isinstance(name, str) else None)
+                          for key, name in zip(keys, names)]
+
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO observations (jurisdiction, facility_key, metric, recorded_at, value) "
+                             "VALUES (?, ?, ?, ?, ?)", rows)
+            written = conn.total_changes - before
+            conn.executemany("INSERT OR REPLACE INTO facilities (jurisdiction, facility_key, name) VALUES (?, ?, ?)",
+                             facilities)
+            conn.execute("INSERT INTO runs (jurisdiction, recorded_at, facilities, observations) VALUES (?, ?, ?, ?)",
+                         (jurisdiction, recorded_at, len(df), written))
+        return written
+
+    def _facility_keys(self, conn: sqlite3.Connection, df: pd.DataFrame, jurisdiction: str) -> pd.Series:
+        """
+        Keys for an export's facilities, stable across runs.
+
+        The identifier column is chosen on the jurisdiction's first run and
+        reused afterwards, so a column appearing in a later export does not
+        move facilities to new keys. Rows without a value in that column
+        (or exports without it) are matched to their earlier key by name.
+        """
+        row = conn.execute("SELECT key_column FROM jurisdiction_keys WHERE jurisdiction = ?",
+                           (jurisdiction,)).fetchone()
+        if row is None:
+            key_column = choose_key(df, df)
+            conn.execute("INSERT INTO jurisdiction_keys (jurisdiction, key_column) VALUES (?, ?)",
+                         (jurisdiction, key_column))
+            return facility_keys(df, key_column)
+
+        key_column = row[0]
+        if key_column is None:
+            return facility_keys(df)
+        if key_column in df.columns and df[key_column].notna().all():
+            return facility_keys(df, key_column)
+
+        # The key column is missing or incomplete: fall back to the key each
+        # name was last stored under, then to the name itself
+        known = pd.read_sql_query("SELECT facility_key, name FROM facilities WHERE jurisdiction = ?",
+                                  conn, params=[jurisdiction])
+        known['normalized'] = normalize_names(known['name'])
+        known = known[known['normalized'] != ''].drop_duplicates('normalized', keep=False)
+        by_name = dict(zip(known['normalized'], known['facility_key']))
+
+        name_keys = facility_keys(df)
+        normalized = normalize_names(df['name'] if 'name' in df.columns else pd.Series('', index=df.index))
+        codes = df[key_column] if key_column in df.columns else pd.Series(None, index=df.index)
+        keys = [str(code).strip() if pd.notna(code) else by_name.get(name, name_key)
+                for code, name, name_key in zip(codes, normalized, name_keys)]
+        unmatched = sum(1 for code, name in zip(codes, normalized) if pd.isna(code) and name not in by_name)
+        logger.warning(f"{jurisdiction}: {int(codes.isna().sum())} facilities lack {key_column}; "
+                       f"{unmatched} could not be matched to an earlier key by name")
+        return pd.Series(keys, index=df.index)
+
+    def _filters(self, metric: str, jurisdictions: Optional[Iterable[str]], facility: Optional[str],
+                 start: Timestamp, end: Timestamp, alias: str = 'o'):
+        clauses, params = [f"{alias}.metric = ?"], [metric]
+        if jurisdictions:
+            jurisdictions = list(jurisdictions)
+            clauses.append(f"{alias}.jurisdiction IN ({', '.join('?' * len(jurisdictions))})")
+            params.extend(jurisdictions)
+        if facility:
+            clauses.append(f"{alias}.facility_key = ?")
+            params.append(facility)
+        if start is not None:
+            clauses.append(f"{alias}.recorded_at >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append(f"{alias}.recorded_at < ?")
+            params.append(to_epoch(end))
+        return ' AND '.join(clauses), params
+
+    @staticmethod
+    def _bucket(every: Optional[str], column: str = 'recorded_at') -> str:
+        if every is None:
+            return column
+        if every not in PERIODS:
+            raise ValueError(f"Unknown period {every!r}; use one of {', '.join(PERIODS)}")
+        if PERIODS[every] is None:
+            return f"CAST(strftime('%s', {column}, 'unixepoch', 'start of month') AS INTEGER)"
+        offset = WEEK_OFFSET if every == 'week' else 0
+        return f"({column} - ({column} - {offset}) % {PERIODS[every]})"
+
+    def _query(self, sql: str, params: List) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            result = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        if 'period' in result.columns:
+            result['period'] = pd.to_datetime(result['period'], unit='s', utc=True)
+        return result
+
+    def series(self, metric: str = 'population', jurisdictions: Optional[Iterable[str]] = None,
+               facility: Optional[str] = None, start: Timestamp = None, end: Timestamp = None,
+               every: Optional[str] = None) -> pd.DataFrame:
+        """
+        Per-facility values over time.
+
+        Args:
+            metric: population or capacity
+            jurisdictions: Only these jurisdictions (all by default)
+            facility: Only this facility key (see the ``facilities`` command)
+            start: Inclusive start time
+            end: Exclusive end time
+            every: Downsample to hour, day, week or month averages
+
+        Returns:
+            DataFrame with jurisdiction, facility_key, name, period, value,
+            min, max and samples columns
+        """
+        where, params = self._filters(metric, jurisdictions, facility, start, end)
+        sql = (f"SELECT o.jurisdiction, o.facility_key, f.name, {self._bucket(every, 'o.recorded_at')} AS period, "
+               "AVG(o.value) AS value, MIN(o.value) AS min, MAX(o.value) AS max, COUNT(*) AS samples "
+               "FROM observations o LEFT JOIN facilities f "
+               "ON f.jurisdiction = o.jurisdiction AND f.facility_key = o.facility_key "
+               f"WHERE {where} GROUP BY o.jurisdiction, o.facility_key, period "
+               "ORDER BY o.jurisdiction, o.facility_key, period")
+        return self._query(sql, params)
+
+    def totals(self, metric: str = 'population', jurisdictions: Optional[Iterable[str]] = None,
+               start: Timestamp = None, end: Timestamp = None, every: Optional[str] = None) -> pd.DataFrame:
+        """
+        Jurisdiction totals over time: the sum over facilities for each run,
+        averaged per period when downsampling.
+
+        Returns:
+            DataFrame with jurisdiction, period, value, min, max, facilities and runs columns
+        """
+        where, params = self._filters(metric, jurisdictions, None, start, end)
+        sql = (f"SELECT jurisdiction, {self._bucket(every)} AS period, AVG(total) AS value, MIN(total) AS min, "
+               "MAX(total) AS max, MAX(facilities) AS facilities, COUNT(*) AS runs FROM ("
+               "SELECT o.jurisdiction, o.recorded_at, SUM(o.value) AS total, COUNT(*) AS facilities "
+               f"FROM observations o WHERE {where} GROUP BY o.jurisdiction, o.recorded_at"
+               ") GROUP BY jurisdiction, period ORDER BY jurisdiction, period")
+        return self._query(sql, params)
+
+    def runs(self, jurisdictions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Recorded runs, newest first."""
+        sql, params = "SELECT jurisdiction, recorded_at AS period, facilities, observations FROM runs", []
+        if jurisdictions:
+            jurisdictions = list(jurisdictions)
+            sql += f" WHERE jurisdiction IN ({', '.join('?' * len(jurisdictions))})"
+            params.extend(jurisdictions)
+        return self._query(sql + " ORDER BY recorded_at DESC, id DESC", params)
+
+    def facilities(self, jurisdictions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Facility keys with their latest names and number of observations."""
+        sql = ("SELECT f.jurisdiction, f.facility_key, f.name, COUNT(o.value) AS observations "
+               "FROM facilities f LEFT JOIN observations o "
+               "ON o.jurisdiction = f.jurisdiction AND o.facility_key = f.facility_key")
+        params: List = []
+        if jurisdictions:
+            jurisdictions = list(jurisdictions)
+            sql += f" WHERE f.jurisdiction IN ({', '.join('?' * len(jurisdictions))})"
+            params.extend(jurisdictions)
+        return self._query(sql + " GROUP BY f.jurisdiction, f.facility_key ORDER BY f.jurisdiction, f.facility_key",
+                           params)
+
+
+def record_exports(store: HistoryStore, data_dir: str = DEFAULT_DATA_DIR,
+                   jurisdictions: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Append the current exports, timestamped with each export's modification time.
+
+    Useful to seed the store from data written before history was recorded.
+    """
+    written = {}
+    for path in export_paths(data_dir, jurisdictions):
+        jurisdiction = os.path.basename(os.path.dirname(path))
+        df = load_facilities(data_dir, [jurisdiction])
+        written[jurisdiction] = store.append(df, jurisdiction, recorded_at=os.path.getmtime(path))
+    return written
+
+
+def main():
+    """Command line interface for the history store."""
+    parser = argparse.ArgumentParser(description='Query the population and capacity history')
+    parser.add_argument('--db', default=DEFAULT_HISTORY_DB, help='History database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='Append the current exports (timestamped by file time)')
+    record.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    record.add_argument('--jurisdictions', help='Comma-separated jurisdictions (all by default)')
+
+    for name, help_text in (('series', 'Per-facility values over time'), ('totals', 'Jurisdiction totals over time')):
+        query = subparsers.add_parser(name, help=help_text)
+        query.add_argument('--metric', choices=METRICS, default='population')
+        query.add_argument('--jurisdictions', help='Comma-separated jurisdictions (all by default)')
+        query.add_argument('--start', help='Inclusive start date (ISO format)')
+        query.add_argument('--end', help='Exclusive end date (ISO format)')
+        query.add_argument('--every', choices=list(PERIODS), help='Downsample to averages per period')
+        query.add_argument('--output', help='Write CSV here instead of printing')
+        if name == 'series':
+            query.add_argument('--facility', help='Facility key (see the facilities command)')
+
+    listing = subparsers.add_parser('facilities', help='Facility keys and observation counts')
+    listing.add_argument('--jurisdictions', help='Comma-separated jurisdictions (all by default)')
+    subparsers.add_parser('runs', help='Recorded runs')
+
+    args = parser.parse_args()
+    store = HistoryStore(args.db)
+    jurisdictions = [name.strip() for name in args.jurisdictions.split(',')] \
+        if getattr(args, 'jurisdictions', None) else None
+
+    if args.command == 'record':
+        written = record_exports(store, args.data_dir, jurisdictions)
+        for jurisdiction, count in written.items():
+            print(f"{jurisdiction}: {count} observations")
+        print(f"\nRecorded {sum(written.values())} observations in {args.db}")
+        return
+
+    if args.command == 'series':
+        result = store.series(args.metric, jurisdictions, args.facility, args.start, args.end, args.every)
+    elif args.command == 'totals':
+        result = store.totals(args.metric, jurisdictions, args.start, args.end, args.every)
+    elif args.command == 'facilities':
+        result = store.facilities(jurisdictions)
+    else:
+        result = store.runs()
+
+    if getattr(args, 'output', None):
+        result.to_csv(args.output, index=False)
+        print(f"Wrote {len(result)} rows to {args.output}")
+    elif result.empty:
+        print("No history recorded yet")
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
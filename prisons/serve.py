@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP query service over the exported prison data.
+
+Loads every jurisdiction export once, pre-encodes each facility as JSON and
+GeoJSON, and builds in-memory indexes by jurisdiction, facility type,
+security level, name and location. Requests only intersect index entries
+and join pre-encoded fragments, so filtered, paginated responses take
+milliseconds. Responses carry an ETag (revalidations are answered with 304
+without re-rendering) and are gzip-compressed when the client accepts it.
+Exports are reloaded when they change on disk.
+
+Endpoints:
+    GET /facilities?jurisdiction=texas,federal&type=prison&security=medium
+                   &bbox=west,south,east,north&q=name words&limit=100&offset=0&format=json|geojson
+    GET /facilities/<jurisdiction>/<facility_key>
+    GET /jurisdictions
+    GET /facets
+
+Example:
+    python -m prisons.serve --port 8080
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .changes import choose_key, facility_keys
+from .dataset import DEFAULT_DATA_DIR, export_paths, load_facilities
+from .spatial import SpatialIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Columns that hold the same kind of value under different names, first present wins
+TYPE_COLUMNS = ['facility_type', 'faclTypeDescription', 'type']
+SECURITY_COLUMNS = ['security_level', 'securityLevel', 'custody_level']
+
+# Query parameters matched against word indexes
+TERM_FILTERS = {'type': 'facility_type', 'security': 'security_level', 'q': 'name'}
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+# Rendered responses kept for repeat requests
+RESPONSE_CACHE_SIZE = 256
+
+
+class QueryError(ValueError):
+    """Invalid query parameter (answered with 400)."""
+
+
+def _terms(value) -> List[str]:
+    return re.findall(r'[a-z0-9]+', value.lower()) if isinstance(value, str) else []
+
+
+def _combined(df: pd.DataFrame, columns: Iterable[str]) -> pd.Series:
+    result = pd.Series(None, index=df.index, dtype=object)
+    for column in columns:
+        if column in df.columns:
+            result = result.where(result.notna(), df[column])
+    return result
+
+
+def _dataset_version(paths: List[str]) -> str:
+    signature = '|'.join(f"{path}:{os.stat(path).st_mtime_ns}:{os.stat(path).st_size}" for path in paths)
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+
+class Dataset:
+    """Facilities with pre-encoded records and in-memory indexes."""
+
+    def __init__(self, facilities: pd.DataFrame, version: str = ''):
+        """
+        Index a combined dataset.
+
+        Args:
+            facilities: DataFrame from ``load_facilities``
+            version: Identifies this snapshot of the data in ETags
+        """
+        df = facilities.reset_index(drop=True)
+        self.version = version
+        self.size = len(df)
+
+        keys = pd.Series('', index=df.index, dtype=object)
+        for jurisdiction, group in df.groupby('jurisdiction', sort=False):
+            keys.loc[group.index] = facility_keys(group, choose_key(group, group))
+        self.keys = {(jurisdiction, key): row for row, (jurisdiction, key) in enumerate(zip(df['jurisdiction'], keys))}
+
+        # One JSON object per facility, without the columns other jurisdictions use
+        records = json.loads(df.to_json(orient='records', date_format='iso'))
+        self.records: List[bytes] = []
+        self.features: List[bytes] = []
+        for record, key in zip(records, keys):
+            record = {'facility_key': key, **{field: value for field, value in record.items() if value is not None}}
+            self.records.append(json.dumps(record).encode('utf-8'))
+            lat, lon = record.get('latitude'), record.get('longitude')
+            geometry = {'type': 'Point', 'coordinates': [lon, lat]} if lat is not None and lon is not None else None
+            feature = {'type': 'Feature', 'geometry': geometry, 'properties': record}
+            self.features.append(json.dumps(feature).encode('utf-8'))
+
+        self.jurisdictions = {name: np.flatnonzero(df['jurisdiction'].to_numpy() == name)
+                              for name in df['jurisdiction'].unique()}
+
+        fields = {'facility_type': _combined(df, TYPE_COLUMNS), 'security_level': _combined(df, SECURITY_COLUMNS),
+                  'name': df['name'] if 'name' in df.columns else pd.Series(None, index=df.index)}
+        self.values = {field: values.to_numpy() for field, values in fields.items()}
+        self.terms: Dict[str, Dict[str, np.ndarray]] = {}
+        for field, values in fields.items():
+            postings: Dict[str, List[int]] = {}
+            for row, value in enumerate(values):
+                for term in set(_terms(value)):
+                    postings.setdefault(term, []).append(row)
+            self.terms[field] = {term: np.array(rows, dtype=np.int64) for term, rows in postings.items()}
+
+        self.spatial = SpatialIndex(df[['latitude', 'longitude']].assign(row=np.arange(self.size)))
+        self.spatial_rows = self.spatial.facilities['row'].to_numpy()
+
+    @classmethod
+    def from_exports(cls, data_dir: str = DEFAULT_DATA_DIR) -> 'Dataset':
+        """Load and index the current exports."""
+        return cls(load_facilities(data_dir), _dataset_version(export_paths(data_dir)))
+
+    def _term_rows(self, field: str, query: str) -> np.ndarray:
+        """Rows whose field contains every word of any comma-separated alternative."""
+        matches = []
+        for alternative in query.split(','):
+            rows = None
+            for term in _terms(alternative):
+                posting = self.terms[field].get(term, np.empty(0, dtype=np.int64))
+                rows = posting if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+            if rows is not None:
+                matches.append(rows)
+        return np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+
+    def select(self, params: Dict[str, str]) -> np.ndarray:
+        """
+        Rows matching all filters, in dataset order.
+
+        Args:
+            params: Query parameters (jurisdiction, type, security, q, bbox)
+
+        Returns:
+            Sorted array of row numbers
+        """
+        selections = []
+        if params.get('jurisdiction'):
+            # A name listed twice must not return its rows twice or break intersect1d's uniqueness
+            names = list(dict.fromkeys(name.strip().lower() for name in params['jurisdiction'].split(',')))
+            unknown = [name for name in names if name not in self.jurisdictions]
+            if unknown:
+                raise QueryError(f"Unknown jurisdiction: {', '.join(unknown)}")
+            selections.append(np.sort(np.concatenate([self.jurisdictions[name] for name in names])))
+        for param, field in TERM_FILTERS.items():
+            if params.get(param):
+                selections.append(self._term_rows(field, params[param]))
+        if params.get('bbox'):
+            try:
+                west, south, east, north = (float(value) for value in params['bbox'].split(','))
+            except ValueError:
+                raise QueryError("bbox must be west,south,east,north")
+            selections.append(np.sort(self.spatial_rows[self.spatial.bbox_indices(west, south, east, north)]))
+
+        if not selections:
+            return np.arange(self.size)
+        rows = selections[0]
+        for selection in selections[1:]:
+            rows = np.intersect1d(rows, selection, assume_unique=True)
+        return rows
+
+    def render(self, rows: np.ndarray, offset: int, limit: int, geojson: bool, next_url: Optional[str]) -> bytes:
+        """Join the pre-encoded records of one page into a response body."""
+        page = rows[offset:offset + limit]
+        meta = (f'"total": {len(rows)}, "offset": {offset}, "limit": {limit}, '
+                f'"next": {json.dumps(next_url)}').encode()
+        if geojson:
+            features = b', '.join(self.features[row] for row in page)
+            return b'{"type": "FeatureCollection", ' + meta + b', "features": [' + features + b']}'
+        return b'{' + meta + b', "facilities": [' + b', '.join(self.records[row] for row in page) + b']}'
+
+    def facets(self) -> Dict:
+        """Distinct facility types and security levels with counts."""
+        facets = {}
+        for field in ('facility_type', 'security_level'):
+            counts = pd.Series(self.values[field]).dropna().value_counts()
+            facets[field] = {str(value): int(count) for value, count in counts.items()}
+        return facets
+
+
+class PrisonDataServer(ThreadingHTTPServer):
+    """Serve queries over a ``Dataset``, reloading it when exports change."""
+
+    daemon_threads = True
+
+    def __init__(self, address, data_dir: str = DEFAULT_DATA_DIR, reload_interval: float = 5.0,
+                 max_age: int = 60):
+        super().__init__(address, PrisonDataRequestHandler)
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.cache: 'OrderedDict[Tuple, Tuple[bytes, bytes, str]]' = OrderedDict()
+        self.dataset = Dataset.from_exports(data_dir)
+        self.checked_at = time.monotonic()
+        logger.info(f"Loaded {self.dataset.size} facilities from {len(self.dataset.jurisdictions)} jurisdictions")
+
+    def current(self) -> Dataset:
+        """The dataset, reloaded first if an export changed since the last check."""
+        if time.monotonic() - self.checked_at < self.reload_interval:
+            return self.dataset
+        with self.lock:
+            if time.monotonic() - self.checked_at >= self.reload_interval:
+                self.checked_at = time.monotonic()
+                if _dataset_version(export_paths(self.data_dir)) != self.dataset.version:
+                    self.dataset = Dataset.from_exports(self.data_dir)
+                    self.cache.clear()
+                    logger.info(f"Reloaded {self.dataset.size} facilities")
+        return self.dataset
+
+    def cached(self, key: Tuple, build) -> Tuple[bytes, bytes, str]:
+        """(body, gzipped body, ETag) for a request, built once per dataset version."""
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        body = build()
+        compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else b''
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        with self.lock:
+            self.cache[key] = (body, compressed, etag)
+            while len(self.cache) > RESPONSE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return body, compressed, etag
+
+
+class PrisonDataRequestHandler(BaseHTTPRequestHandler):
+    """Handle read-only JSON queries."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        dataset = self.server.current()
+        path = url.path.rstrip('/') or '/'
+        # Same query, same dataset: same response
+        key = (dataset.version, path, tuple(sorted(params.items())))
+
+        try:
+            if path == '/facilities':
+                content_type, build = self.list_facilities(dataset, params)
+            elif path.startswith('/facilities/'):
+                content_type, build = self.one_facility(dataset, path)
+            elif path == '/jurisdictions':
+                counts = {name: len(rows) for name, rows in sorted(dataset.jurisdictions.items())}
+                content_type, build = 'application/json', lambda: json.dumps(counts).encode()
+            elif path == '/facets':
+                content_type, build = 'application/json', lambda: json.dumps(dataset.facets()).encode()
+            else:
+                self.send_error_json(404, f"Unknown endpoint {path}")
+                return
+            body, compressed, etag = self.server.cached(key, build)
+        except QueryError as e:
+            self.send_error_json(400, str(e))
+            return
+        except KeyError as e:
+            self.send_error_json(404, str(e.args[0]))
+            return
+
+        headers = {'ETag': etag, 'Cache-Control': f"public, max-age={self.server.max_age}",
+                   'Vary': 'Accept-Encoding', 'Access-Control-Allow-Origin': '*'}
+        if etag in [tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_body(304, b'', headers)
+        elif compressed and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self.send_body(200, compressed, {**headers, 'Content-Type': content_type, 'Content-Encoding': 'gzip'})
+        else:
+            self.send_body(200, body, {**headers, 'Content-Type': content_type})
+        logger.debug(f"{self.path} served in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    def list_facilities(self, dataset: Dataset, params: Dict[str, str]):
+        try:
+            offset = max(0, int(params.get('offset', 0)))
+            limit = min(MAX_LIMIT, max(1, int(params.get('limit', DEFAULT_LIMIT))))
+        except ValueError:
+            raise QueryError("offset and limit must be integers")
+        output_format = params.get('format', 'json')
+        if output_format not in ('json', 'geojson'):
+            raise QueryError("format must be json or geojson")
+
+        def build():
+            rows = dataset.select(params)
+            next_url = None
+            if offset + limit < len(rows):
+                next_url = '/facilities?' + urlencode({**params, 'offset': offset + limit, 'limit': limit})
+            return dataset.render(rows, offset, limit, output_format == 'geojson', next_url)
+
+        content_type = 'application/geo+json' if output_format == 'geojson' else 'application/json'
+        return content_type, build
+
+    def one_facility(self, dataset: Dataset, path: str):
+        parts = path.split('/', 3)
+        if len(parts) != 4:
+            raise KeyError("Use /facilities/<jurisdiction>/<facility_key>")
+        row = dataset.keys.get((unquote(parts[2]), unquote(parts[3])))
+        if row is None:
+            raise KeyError(f"No facility {unquote(parts[3])!r} in {unquote(parts[2])!r}")
+        return 'application/json', lambda: dataset.records[row]
+
+    def send_error_json(self, status: int, message: str):
+        self.send_body(status, json.dumps({'error': message}).encode(), {'Content-Type': 'application/json'})
+
+    def send_body(self, status: int, body: bytes, headers: Dict):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def main():
+    """Command line interface for the query service."""
+    parser = argparse.ArgumentParser(description='Serve filtered, paginated prison data over HTTP')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--reload-interval', type=float, default=5.0,
+                        help='Seconds between checks for changed exports')
+    parser.add_argument('--max-age', type=int, default=60, help='Cache-Control max-age in seconds')
+
+    args = parser.parse_args()
+
+    server = PrisonDataServer((args.host, args.port), args.data_dir, args.reload_interval, args.max_age)
+    url = f"http://{args.host}:{server.server_port}"
+    print(f"Prison data service listening on {url}")
+    print(f"Try: {url}/facilities?jurisdiction=texas&security=medium&limit=5")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Spatial index and nearest-facility queries over every jurisdiction's export.
+
+Facilities are bucketed into a fixed latitude/longitude grid once. Radius and
+bounding-box queries only look at the grid cells they overlap, and k-nearest
+queries search outward ring by ring until no unsearched cell can hold a
+closer facility. Distances are great-circle (haversine) kilometres computed
+with numpy. The index can be saved and reloaded, and is rebuilt automatically
+when an export is newer than the saved file.
+
+Examples:
+    python -m prisons.spatial radius --lat 30.27 --lon -97.74 --km 50
+    python -m prisons.spatial nearest --lat 35.78 --lon -78.64 -k 3 --jurisdictions federal
+    python -m prisons.spatial batch --from north_carolina --to federal --output nc_nearest_federal.csv
+"""
+
+import argparse
+import io
+import logging
+import math
+import os
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dataset import DEFAULT_DATA_DIR, export_paths, load_facilities
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_CELL_DEGREES = 0.5
+DEFAULT_INDEX_PATH = os.path.join('.cache', 'spatial_index.npz')
+
+# Columns carried into query results
+RESULT_COLUMNS = ['jurisdiction', 'name', 'city', 'state', 'latitude', 'longitude']
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments are degrees and broadcast like numpy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _result_table(facilities: pd.DataFrame) -> pd.DataFrame:
+    # Slicing a narrow copy is far cheaper than slicing every export column
+    columns = [column for column in RESULT_COLUMNS if column in facilities.columns]
+    return facilities[columns].copy()
+
+
+class SpatialIndex:
+    """Grid index over facility coordinates."""
+
+    def __init__(self, facilities: pd.DataFrame, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        """
+        Build the index.
+
+        Args:
+            facilities: DataFrame with latitude and longitude columns; rows without
+                coordinates are dropped
+            cell_degrees: Grid cell size in degrees
+        """
+        located = facilities.dropna(subset=['latitude', 'longitude'])
+        self.facilities = located.reset_index(drop=True)
+        self.cell_degrees = cell_degrees
+        self.lat = self.facilities['latitude'].to_numpy(dtype=float)
+        self.lon = self.facilities['longitude'].to_numpy(dtype=float)
+        self._table = _result_table(self.facilities)
+        self._build_grid()
+
+    def _build_grid(self):
+        rows = np.floor(self.lat / self.cell_degrees).astype(np.int64)
+        cols = np.floor(self.lon / self.cell_degrees).astype(np.int64)
+        # Sort points by cell so each cell is one contiguous slice of self.order
+        self.order = np.lexsort((cols, rows))
+        self.cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        sorted_rows, sorted_cols = rows[self.order], cols[self.order]
+        start = 0
+        for i in range(1, len(self.order) + 1):
+            if i == len(self.order) or sorted_rows[i] != sorted_rows[start] or sorted_cols[i] != sorted_cols[start]:
+                self.cells[(int(sorted_rows[start]), int(sorted_cols[start]))] = (start, i)
+                start = i
+        if self.cells:
+            keys = np.array(list(self.cells))
+            self.row_range = (int(keys[:, 0].min()), int(keys[:, 0].max()))
+            self.col_range = (int(keys[:, 1].min()), int(keys[:, 1].max()))
+        else:
+            self.row_range = self.col_range = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.facilities)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    def _points_in_cells(self, row_min: int, row_max: int, col_min: int, col_max: int) -> np.ndarray:
+        """Indices of facilities in the given (inclusive) range of grid cells."""
+        row_min, row_max = max(row_min, self.row_range[0]), min(row_max, self.row_range[1])
+        col_min, col_max = max(col_min, self.col_range[0]), min(col_max, self.col_range[1])
+        slices = []
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self.cells):
+            # Wider than the data: walking the occupied cells is cheaper
+            for (row, col), (start, end) in self.cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    slices.append(self.order[start:end])
+        else:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    span = self.cells.get((row, col))
+                    if span:
+                        slices.append(self.order[span[0]:span[1]])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _ring(self, row: int, col: int, ring: int) -> np.ndarray:
+        """Indices of facilities in cells exactly ``ring`` cells away (Chebyshev distance)."""
+        if ring == 0:
+            return self._points_in_cells(row, row, col, col)
+        parts = [
+            self._points_in_cells(row - ring, row - ring, col - ring, col + ring),
+            self._points_in_cells(row + ring, row + ring, col - ring, col + ring),
+            self._points_in_cells(row - ring + 1, row + ring - 1, col - ring, col - ring),
+            self._points_in_cells(row - ring + 1, row + ring - 1, col + ring, col + ring),
+        ]
+        return np.concatenate(parts)
+
+    def _results(self, indices: np.ndarray, distances: Optional[np.ndarray] = None) -> pd.DataFrame:
+        result = self._table.take(indices)
+        if distances is not None:
+            result['distance_km'] = np.round(distances, 3)
+        return result
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> pd.DataFrame:
+        """
+        Facilities within a radius of a point, nearest first.
+
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+            radius_km: Search radius in km
+
+        Returns:
+            DataFrame of facilities with a distance_km column
+        """
+        return self._results(*self.radius_indices(lat, lon, radius_km))
+
+    def radius_indices(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions in ``self.facilities`` and distances for ``within_radius``."""
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = lat_span / max(math.cos(math.radians(min(89.9, abs(lat) + lat_span))), 1e-6)
+        row_min, col_min = self._cell(lat - lat_span, lon - lon_span)
+        row_max, col_max = self._cell(lat + lat_span, lon + lon_span)
+        candidates = self._points_in_cells(row_min, row_max, col_min, col_max)
+
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        ranked = np.argsort(distances, kind='stable')
+        return candidates[ranked], distances[ranked]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> pd.DataFrame:
+        """
+        The k facilities nearest to a point, nearest first.
+
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+            k: Number of facilities to return
+
+        Returns:
+            DataFrame of facilities with a distance_km column
+        """
+        return self._results(*self.nearest_indices(lat, lon, k))
+
+    def nearest_indices(self, lat: float, lon: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions in ``self.facilities`` and distances for ``nearest``."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        row, col = self._cell(lat, lon)
+        max_ring = max(abs(row - self.row_range[0]), abs(row - self.row_range[1]),
+                       abs(col - self.col_range[0]), abs(col - self.col_range[1]))
+        candidates = np.empty(0, dtype=np.int64)
+        distances = np.empty(0)
+        for ring in range(max_ring + 1):
+            found = self._ring(row, col, ring)
+            if len(found):
+                candidates = np.concatenate([candidates, found])
+                distances = np.concatenate([distances, haversine_km(lat, lon, self.lat[found], self.lon[found])])
+            if len(candidates) >= k:
+                kth = np.partition(distances, k - 1)[k - 1]
+                # Anything outside the searched square is at least `ring` cells away in latitude
+                # or longitude; the haversine of a pure longitude gap bounds both cases from below
+                reach = math.radians(ring * self.cell_degrees)
+                widest = math.cos(min(math.pi / 2, math.radians(abs(lat)) + reach))
+                if kth <= 2 * EARTH_RADIUS_KM * math.asin(min(1.0, widest * math.sin(reach / 2))):
+                    break
+
+        ranked = np.argsort(distances, kind='stable')[:k]
+        return candidates[ranked], distances[ranked]
+
+    def within_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> pd.DataFrame:
+        """
+        Facilities inside a bounding box.
+
+        Args:
+            min_lon: West edge
+            min_lat: South edge
+            max_lon: East edge
+            max_lat: North edge
+
+        Returns:
+            DataFrame of facilities inside the box
+        """
+        return self._results(self.bbox_indices(min_lon, min_lat, max_lon, max_lat))
+
+    def bbox_indices(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """Sorted row positions in ``self.facilities`` for ``within_bbox``."""
+        row_min, col_min = self._cell(min_lat, min_lon)
+        row_max, col_max = self._cell(max_lat, max_lon)
+        candidates = self._points_in_cells(row_min, row_max, col_min, col_max)
+        inside = ((self.lat[candidates] >= min_lat) & (self.lat[candidates] <= max_lat)
+                  & (self.lon[candidates] >= min_lon) & (self.lon[candidates] <= max_lon))
+        return np.sort(candidates[inside])
+
+    def nearest_many(self, lats: Iterable[float], lons: Iterable[float], k: int = 1,
+                     chunk_size: int = 2048) -> pd.DataFrame:
+        """
+        Vectorized k-nearest lookup for many points at once.
+
+        Distances are computed as one matrix per chunk of query points, so this
+        is the fast path for joining a whole dataset against the index.
+
+        Args:
+            lats: Query latitudes
+            lons: Query longitudes
+            k: Neighbours per query point
+            chunk_size: Query points per distance matrix (bounds memory use)
+
+        Returns:
+            DataFrame with query_index, rank, the matched facility columns and distance_km
+        """
+        lats = np.asarray(list(lats), dtype=float)
+        lons = np.asarray(list(lons), dtype=float)
+        k = min(k, len(self))
+        if k <= 0 or len(lats) == 0:
+            return pd.DataFrame(columns=['query_index', 'rank'] + RESULT_COLUMNS + ['distance_km'])
+
+        all_indices, all_distances = [], []
+        for start in range(0, len(lats), chunk_size):
+            matrix = haversine_km(lats[start:start + chunk_size, None], lons[start:start + chunk_size, None],
+                                  self.lat[None, :], self.lon[None, :])
+            if k < matrix.shape[1]:
+                top = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(matrix.shape[1]), matrix.shape)
+            top_distances = np.take_along_axis(matrix, top, axis=1)
+            order = np.argsort(top_distances, axis=1, kind='stable')
+            all_indices.append(np.take_along_axis(top, order, axis=1))
+            all_distances.append(np.take_along_axis(top_distances, order, axis=1))
+
+        indices = np.vstack(all_indices)
+        distances = np.vstack(all_distances)
+        result = self._results(indices.ravel(), distances.ravel()).reset_index(drop=True)
+        result.insert(0, 'rank', np.tile(np.arange(1, k + 1), len(lats)))
+        result.insert(0, 'query_index', np.repeat(np.arange(len(lats)), k))
+        # Points without coordinates have no neighbours
+        missing = np.repeat(np.isnan(lats) | np.isnan(lons), k)
+        return result[~missing].reset_index(drop=True)
+
+    def count_within_radius_many(self, lats: Iterable[float], lons: Iterable[float], radius_km: float,
+                                 chunk_size: int = 2048) -> np.ndarray:
+        """Number of facilities within ``radius_km`` of each query point."""
+        lats = np.asarray(list(lats), dtype=float)
+        lons = np.asarray(list(lons), dtype=float)
+        counts = np.zeros(len(lats), dtype=np.int64)
+        for start in range(0, len(lats), chunk_size):
+            matrix = haversine_km(lats[start:start + chunk_size, None], lons[start:start + chunk_size, None],
+                                  self.lat[None, :], self.lon[None, :])
+            counts[start:start + chunk_size] = (matrix <= radius_km).sum(axis=1)
+        return counts
+
+    def save(self, path: str = DEFAULT_INDEX_PATH):
+        """Persist the index (grid arrays plus the facility table) to a .npz file."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        keys = np.array(list(self.cells), dtype=np.int64).reshape(-1, 2)
+        spans = np.array(list(self.cells.values()), dtype=np.int64).reshape(-1, 2)
+        table = self.facilities.to_json(orient='split', index=False)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, order=self.order, cell_keys=keys, cell_spans=spans,
+                                cell_degrees=np.array(self.cell_degrees),
+                                table=np.array(table))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'SpatialIndex':
+        """Load an index written by ``save``."""
+        with np.load(path) as data:
+            index = cls.__new__(cls)
+            index.facilities = pd.read_json(io.StringIO(str(data['table'])), orient='split')
+            index.cell_degrees = float(data['cell_degrees'])
+            index.lat = index.facilities['latitude'].to_numpy(dtype=float)
+            index.lon = index.facilities['longitude'].to_numpy(dtype=float)
+            index.order = data['order']
+            keys, spans = data['cell_keys'], data['cell_spans']
+        index._table = _result_table(index.facilities)
+        index.cells = {(int(row), int(col)): (int(start), int(end))
+                       for (row, col), (start, end) in zip(keys, spans)}
+        if index.cells:
+            index.row_range = (int(keys[:, 0].min()), int(keys[:, 0].max()))
+            index.col_range = (int(keys[:, 1].min()), int(keys[:, 1].max()))
+        else:
+            index.row_range = index.col_range = (0, 0)
+        return index
+
+    @classmethod
+    def from_exports(cls, data_dir: str = DEFAULT_DATA_DIR, jurisdictions: Optional[Iterable[str]] = None,
+                     cell_degrees: float = DEFAULT_CELL_DEGREES) -> 'SpatialIndex':
+        """Build an index over the current exports."""
+        return cls(load_facilities(data_dir, jurisdictions), cell_degrees)
+
+
+def load_or_build(data_dir: str = DEFAULT_DATA_DIR, path: str = DEFAULT_INDEX_PATH) -> SpatialIndex:
+    """
+    Load the saved national index, rebuilding it if any export is newer.
+
+    Args:
+        data_dir: Base output directory used by fetch.py
+        path: Saved index file
+
+    Returns:
+        Index over every jurisdiction's facilities
+    """
+    exports = export_paths(data_dir)
+    newest_export = max((os.path.getmtime(export) for export in exports), default=0)
+    if os.path.exists(path) and os.path.getmtime(path) >= newest_export:
+        try:
+            return SpatialIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable spatial index {path}: {e}")
+
+    index = SpatialIndex.from_exports(data_dir)
+    index.save(path)
+    logger.info(f"Indexed {len(index)} facilities from {len(exports)} exports into {path}")
+    return index
+
+
+def _subset(index: SpatialIndex, jurisdictions: Optional[str]) -> SpatialIndex:
+    if not jurisdictions:
+        return index
+    names = [name.strip().lower() for name in jurisdictions.split(',')]
+    return SpatialIndex(index.facilities[index.facilities['jurisdiction'].isin(names)], index.cell_degrees)
+
+
+def main():
+    """Command line interface for spatial queries."""
+    parser = argparse.ArgumentParser(description='Query facilities by location')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Saved index file (rebuilt when exports change)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help='Rebuild and save the index')
+
+    radius = subparsers.add_parser('radius', help='Facilities within a distance of a point')
+    radius.add_argument('--lat', type=float, required=True)
+    radius.add_argument('--lon', type=float, required=True)
+    radius.add_argument('--km', type=float, default=50, help='Search radius in km')
+    radius.add_argument('--jurisdictions', help='Comma-separated jurisdictions to search')
+
+    nearest = subparsers.add_parser('nearest', help='Nearest facilities to a point')
+    nearest.add_argument('--lat', type=float, required=True)
+    nearest.add_argument('--lon', type=float, required=True)
+    nearest.add_argument('-k', type=int, default=5, help='Number of facilities')
+    nearest.add_argument('--jurisdictions', help='Comma-separated jurisdictions to search')
+
+    bbox = subparsers.add_parser('bbox', help='Facilities inside a bounding box')
+    bbox.add_argument('--west', type=float, required=True, help='Minimum longitude')
+    bbox.add_argument('--south', type=float, required=True, help='Minimum latitude')
+    bbox.add_argument('--east', type=float, required=True, help='Maximum longitude')
+    bbox.add_argument('--north', type=float, required=True, help='Maximum latitude')
+    bbox.add_argument('--jurisdictions', help='Comma-separated jurisdictions to search')
+
+    batch = subparsers.add_parser('batch', help='Nearest facilities for every facility of some jurisdictions')
+    batch.add_argument('--from', dest='source', required=True, help='Comma-separated query jurisdictions')
+    batch.add_argument('--to', dest='target', help='Comma-separated jurisdictions to search (all by default)')
+    batch.add_argument('-k', type=int, default=1, help='Neighbours per facility')
+    batch.add_argument('--output', help='Write results to this CSV instead of stdout')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if os.path.exists(args.index):
+            os.remove(args.index)
+        index = load_or_build(args.data_dir, args.index)
+        print(f"Indexed {len(index)} facilities in {len(index.cells)} grid cells: {args.index}")
+        return
+
+    index = load_or_build(args.data_dir, args.index)
+
+    if args.command == 'radius':
+        result = _subset(index, args.jurisdictions).within_radius(args.lat, args.lon, args.km)
+    elif args.command == 'nearest':
+        result = _subset(index, args.jurisdictions).nearest(args.lat, args.lon, args.k)
+    elif args.command == 'bbox':
+        result = _subset(index, args.jurisdictions).within_bbox(args.west, args.south, args.east, args.north)
+    else:
+        queries = _subset(index, args.source).facilities
+        matches = _subset(index, args.target).nearest_many(queries['latitude'], queries['longitude'], args.k)
+        source = queries.iloc[matches['query_index']][['jurisdiction', 'name']].reset_index(drop=True)
+        source.columns = ['source_jurisdiction', 'source_name']
+        result = pd.concat([source, matches.drop(columns='query_index')], axis=1)
+
+    if getattr(args, 'output', None):
+        result.to_csv(args.output, index=False)
+        print(f"Wrote {len(result)} rows to {args.output}")
+    else:
+        result.to_csv(sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Vectorized quality checks for facility exports.
+
+Each check runs over whole columns at once and returns one flag per row:
+coordinates missing, swapped or outside the facility's state, coordinates
+shared by facilities at different addresses (usually a city-centroid
+geocode), ZIP codes that belong to another state, and capacities far out of
+line with the rest of the jurisdiction. Only rows with bad coordinates are
+sent back to the geocoder, so quality control stays cheap as the dataset
+grows.
+
+Example:
+    python -m prisons.validate --jurisdictions texas,federal
+"""
+
+import argparse
+import logging
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .dataset import DEFAULT_DATA_DIR, load_facilities
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (min_lon, min_lat, max_lon, max_lat) per state
+STATE_BOUNDS = {
+    'AL': (-88.47, 30.14, -84.89, 35.01), 'AK': (-179.15, 51.21, -129.98, 71.39), 'AZ': (-114.82, 31.33, -109.04, 37.00),
+    'AR': (-94.62, 33.00, -89.64, 36.50), 'CA': (-124.41, 32.53, -114.13, 42.01), 'CO': (-109.06, 36.99, -102.04, 41.00),
+    'CT': (-73.73, 40.98, -71.79, 42.05), 'DE': (-75.79, 38.45, -75.05, 39.84), 'DC': (-77.12, 38.79, -76.91, 39.00),
+    'FL': (-87.63, 24.52, -80.03, 31.00), 'GA': (-85.61, 30.36, -80.84, 35.00), 'HI': (-178.33, 18.91, -154.81, 28.40),
+    'ID': (-117.24, 41.99, -111.04, 49.00), 'IL': (-91.51, 36.97, -87.02, 42.51), 'IN': (-88.10, 37.77, -84.78, 41.76),
+    'IA': (-96.64, 40.38, -90.14, 43.50), 'KS': (-102.05, 36.99, -94.59, 40.00), 'KY': (-89.57, 36.50, -81.96, 39.15),
+    'LA': (-94.04, 28.93, -88.82, 33.02), 'ME': (-71.08, 42.98, -66.95, 47.46), 'MD': (-79.49, 37.91, -75.05, 39.72),
+    'MA': (-73.51, 41.24, -69.93, 42.89), 'MI': (-90.42, 41.70, -82.41, 48.31), 'MN': (-97.24, 43.50, -89.49, 49.38),
+    'MS': (-91.66, 30.17, -88.10, 35.00), 'MO': (-95.77, 35.99, -89.10, 40.61), 'MT': (-116.05, 44.36, -104.04, 49.00),
+    'NE': (-104.05, 40.00, -95.31, 43.00), 'NV': (-120.01, 35.00, -114.04, 42.00), 'NH': (-72.56, 42.70, -70.61, 45.31),
+    'NJ': (-75.56, 38.93, -73.89, 41.36), 'NM': (-109.05, 31.33, -103.00, 37.00), 'NY': (-79.76, 40.50, -71.86, 45.02),
+    'NC': (-84.32, 33.84, -75.46, 36.59), 'ND': (-104.05, 45.94, -96.55, 49.00), 'OH': (-84.82, 38.40, -80.52, 41.98),
+    'OK': (-103.00, 33.62, -94.43, 37.00), 'OR': (-124.57, 41.99, -116.46, 46.29), 'PA': (-80.52, 39.72, -74.69, 42.27),
+    'RI': (-71.86, 41.15, -71.12, 42.02), 'SC': (-83.35, 32.03, -78.54, 35.22), 'SD': (-104.06, 42.48, -96.44, 45.95),
+    'TN': (-90.31, 34.98, -81.65, 36.68), 'TX': (-106.65, 25.84, -93.51, 36.50), 'UT': (-114.05, 37.00, -109.04, 42.00),
+    'VT': (-73.44, 42.73, -71.46, 45.02), 'VA': (-83.68, 36.54, -75.24, 39.47), 'WA': (-124.85, 45.54, -116.92, 49.00),
+    'WV': (-82.64, 37.20, -77.72, 40.64), 'WI': (-92.89, 42.49, -86.25, 47.31), 'WY': (-111.06, 40.99, -104.05, 45.01),
+    'PR': (-67.95, 17.88, -65.22, 18.52),
+}
+
+# Facilities right on a state line should not be flagged
+BOUNDS_PADDING = 0.05
+
+STATE_NAMES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA', 'colorado': 'CO',
+    'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC', 'florida': 'FL', 'georgia': 'GA',
+    'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY',
+    'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH',
+    'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND',
+    'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI',
+    'south carolina': 'SC', 'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'puerto rico': 'PR',
+}
+
+# First three ZIP digits to state, as inclusive (low, high, state) ranges; exceptions come first
+ZIP3_RANGES = [
+    (5, 5, 'NY'), (55, 55, 'MA'), (201, 201, 'VA'), (569, 569, 'DC'), (733, 733, 'TX'), (885, 885, 'TX'),
+    (6, 9, 'PR'), (10, 27, 'MA'), (28, 29, 'RI'), (30, 38, 'NH'), (39, 49, 'ME'), (50, 59, 'VT'), (60, 69, 'CT'),
+    (70, 89, 'NJ'), (100, 149, 'NY'), (150, 196, 'PA'), (197, 199, 'DE'), (200, 205, 'DC'), (206, 219, 'MD'),
+    (220, 246, 'VA'), (247, 268, 'WV'), (270, 289, 'NC'), (290, 299, 'SC'), (300, 319, 'GA'), (320, 349, 'FL'),
+    (350, 369, 'AL'), (370, 385, 'TN'), (386, 397, 'MS'), (398, 399, 'GA'), (400, 427, 'KY'), (430, 459, 'OH'),
+    (460, 479, 'IN'), (480, 499, 'MI'), (500, 528, 'IA'), (530, 549, 'WI'), (550, 567, 'MN'), (570, 577, 'SD'),
+    (580, 588, 'ND'), (590, 599, 'MT'), (600, 629, 'IL'), (630, 658, 'MO'), (660, 679, 'KS'), (680, 693, 'NE'),
+    (700, 714, 'LA'), (716, 729, 'AR'), (730, 749, 'OK'), (750, 799, 'TX'), (800, 816, 'CO'), (820, 831, 'WY'),
+    (832, 838, 'ID'), (840, 847, 'UT'), (850, 865, 'AZ'), (870, 884, 'NM'), (889, 898, 'NV'), (900, 961, 'CA'),
+    (967, 968, 'HI'), (970, 979, 'OR'), (980, 994, 'WA'), (995, 999, 'AK'),
+]
+
+ADDRESS_COLUMNS = ['street_address', 'address', 'address_line1']
+ZIP_COLUMNS = ['zip_code', 'zipCode', 'zip']
+CAPACITY_COLUMNS = ['capacity', 'population']
+
+# Robust z-score (median absolute deviation of log values) above which a figure is an outlier
+OUTLIER_Z = 3.5
+
+# Small or uniform jurisdictions: assume at least a 1.5x spread, and skip groups too small to judge
+MIN_LOG_MAD = np.log10(1.5)
+MIN_OUTLIER_GROUP = 8
+
+# No prison holds fewer people than this; smaller figures are parsing errors ("2,258" read as 2)
+MIN_PLAUSIBLE_CAPACITY = 10
+
+# Coordinates within about 10 m count as the same point
+DUPLICATE_DECIMALS = 4
+
+# Flags whose rows are sent back to the geocoder
+REGEOCODE_CHECKS = ['missing_coordinates', 'swapped_coordinates', 'outside_state', 'duplicate_coordinates']
+
+
+def _zip3_table() -> np.ndarray:
+    table = np.full(1000, '', dtype=object)
+    # Later (general) ranges must not overwrite the exceptions listed first
+    for low, high, state in reversed(ZIP3_RANGES):
+        table[low:high + 1] = state
+    return table
+
+
+ZIP3_STATES = _zip3_table()
+
+
+def _first_present(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    result = pd.Series(None, index=df.index, dtype=object)
+    for column in columns:
+        if column in df.columns:
+            result = result.where(result.notna() & (result != ''), df[column])
+    return result
+
+
+def zip5(values: pd.Series) -> pd.Series:
+    """Five-digit ZIP strings; numeric columns that lost leading zeros ("6019.0") are padded."""
+    text = values.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    zips = text.str.extract(r'^(\d{5})', expand=False)
+    short = text.str.fullmatch(r'\d{3,4}') & zips.isna() & values.notna()
+    return zips.where(~short, text.str.zfill(5))
+
+
+def state_codes(df: pd.DataFrame) -> pd.Series:
+    """Two-letter state per row, from the state column or else the jurisdiction name."""
+    def normalize(values: pd.Series) -> pd.Series:
+        text = values.astype(str).str.strip()
+        upper = text.str.upper()
+        return upper.where(upper.isin(STATE_BOUNDS), text.str.lower().str.replace('_', ' ').map(STATE_NAMES))
+
+    states = normalize(df['state']) if 'state' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    if 'jurisdiction' in df.columns:
+        states = states.where(states.notna(), normalize(df['jurisdiction']))
+    return states
+
+
+def check_coordinates(df: pd.DataFrame, states: pd.Series) -> Dict[str, pd.Series]:
+    """Missing, swapped and out-of-state coordinates."""
+    lat = pd.to_numeric(df['latitude'], errors='coerce') if 'latitude' in df.columns else pd.Series(np.nan, index=df.index)
+    lon = pd.to_numeric(df['longitude'], errors='coerce') if 'longitude' in df.columns else pd.Series(np.nan, index=df.index)
+    missing = lat.isna() | lon.isna()
+
+    bounds = np.array([STATE_BOUNDS.get(state, (np.nan,) * 4) for state in states], dtype=float).reshape(-1, 4)
+    min_lon, min_lat, max_lon, max_lat = (bounds[:, i] for i in range(4))
+    known = ~np.isnan(min_lon)
+
+    def inside(lats, lons):
+        return ((lats >= min_lat - BOUNDS_PADDING) & (lats <= max_lat + BOUNDS_PADDING)
+                & (lons >= min_lon - BOUNDS_PADDING) & (lons <= max_lon + BOUNDS_PADDING))
+
+    lat_values, lon_values = lat.to_numpy(dtype=float), lon.to_numpy(dtype=float)
+    swapped = ~missing.to_numpy() & known & ~inside(lat_values, lon_values) & inside(lon_values, lat_values)
+    outside = ~missing.to_numpy() & known & ~inside(lat_values, lon_values) & ~swapped
+    return {
+        'missing_coordinates': missing,
+        'swapped_coordinates': pd.Series(swapped, index=df.index),
+        'outside_state': pd.Series(outside, index=df.index),
+    }
+
+
+def check_duplicate_coordinates(df: pd.DataFrame) -> pd.Series:
+    """
+    Rows sharing a point with a facility at a different address.
+
+    Facilities on one campus share both coordinates and address and are not
+    flagged; a point shared by different addresses (or unknown ones) is
+    usually a geocoder's city centroid.
+    """
+    if 'latitude' not in df.columns or 'longitude' not in df.columns:
+        return pd.Series(False, index=df.index)
+    addresses = _first_present(df, ADDRESS_COLUMNS)
+    normalized = addresses.astype(str).str.lower().str.replace(r'[^a-z0-9]+', '', regex=True)
+    # An unknown address never matches another one
+    normalized = normalized.where(addresses.notna() & (normalized != ''), '#' + df.index.astype(str))
+    points = pd.DataFrame({
+        'lat': pd.to_numeric(df['latitude'], errors='coerce').round(DUPLICATE_DECIMALS),
+        'lon': pd.to_numeric(df['longitude'], errors='coerce').round(DUPLICATE_DECIMALS),
+        'address': normalized,
+    }, index=df.index)
+    located = points.dropna(subset=['lat', 'lon'])
+    grouped = located.groupby(['lat', 'lon'])['address']
+    shared = grouped.transform('size') > 1
+    mixed = grouped.transform('nunique') > 1
+    flags = pd.Series(False, index=df.index)
+    flags.loc[located.index] = (shared & mixed).to_numpy()
+    return flags
+
+
+def check_zip_state(df: pd.DataFrame, states: pd.Series) -> pd.Series:
+    """ZIP codes whose prefix belongs to a different state."""
+    zips = zip5(_first_present(df, ZIP_COLUMNS))
+    prefixes = pd.to_numeric(zips.str[:3], errors='coerce')
+    known = prefixes.notna() & states.notna()
+    zip_states = pd.Series('', index=df.index, dtype=object)
+    zip_states[known] = ZIP3_STATES[prefixes[known].astype(int).to_numpy()]
+    return known & (zip_states != '') & (zip_states != states)
+
+
+def check_capacity(df: pd.DataFrame) -> pd.Series:
+    """Implausibly small capacities/populations, or values far from the jurisdiction's typical size."""
+    flags = pd.Series(False, index=df.index)
+    groups = df['jurisdiction'] if 'jurisdiction' in df.columns else pd.Series('', index=df.index)
+    for column in CAPACITY_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column].astype(str).str.replace(',', '', regex=False), errors='coerce')
+        values = values.where(df[column].notna())
+        implausible = values < MIN_PLAUSIBLE_CAPACITY
+        # Judge the rest against the plausible values only, in case parsing errors are the majority
+        logs = np.log10(values.where(~implausible))
+        median = logs.groupby(groups).transform('median')
+        mad = (logs - median).abs().groupby(groups).transform('median').clip(lower=MIN_LOG_MAD)
+        sized = logs.groupby(groups).transform('count') >= MIN_OUTLIER_GROUP
+        # 0.6745 scales the MAD to a standard deviation for normally distributed data
+        robust_z = (0.6745 * (logs - median).abs() / mad).where(sized)
+        flags |= implausible | (robust_z > OUTLIER_Z)
+    return flags.fillna(False).astype(bool)
+
+
+CHECKS: Dict[str, str] = {
+    'missing_coordinates': 'no coordinates',
+    'swapped_coordinates': 'latitude and longitude swapped',
+    'outside_state': 'coordinates outside the state',
+    'duplicate_coordinates': 'coordinates shared with another address',
+    'zip_state_mismatch': 'ZIP code from another state',
+    'capacity_outlier': 'capacity or population out of range',
+}
+
+
+def validate(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run every check.
+
+    Args:
+        df: One export or the combined dataset
+
+    Returns:
+        Boolean DataFrame aligned with ``df``, one column per check
+    """
+    states = state_codes(df)
+    flags = check_coordinates(df, states)
+    flags['duplicate_coordinates'] = check_duplicate_coordinates(df)
+    flags['zip_state_mismatch'] = check_zip_state(df, states)
+    flags['capacity_outlier'] = check_capacity(df)
+    return pd.DataFrame(flags, index=df.index)[list(CHECKS)].fillna(False).astype(bool)
+
+
+def summarize(flags: pd.DataFrame, jurisdictions: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Failure counts per check, per jurisdiction when given."""
+    if jurisdictions is None:
+        return flags.sum().to_frame('failures').T
+    counts = flags.groupby(jurisdictions).sum()
+    counts.insert(0, 'facilities', flags.groupby(jurisdictions).size())
+    return counts
+
+
+def describe(flags: pd.DataFrame) -> str:
+    """One-line summary such as ``2 coordinates outside the state, 1 no coordinates``."""
+    counts = flags.sum()
+    parts = [f"{int(counts[check])} {label}" for check, label in CHECKS.items() if counts[check]]
+    return ', '.join(parts) if parts else 'all checks passed'
+
+
+def address_for_geocoding(row: pd.Series, state: Optional[str]) -> Optional[str]:
+    """
+    Build a geocoder query from a row's street address, city, state and ZIP.
+
+    Rows without a street address (or with only a PO box, which geocodes to
+    the post office) get None: a city-level result is the centroid problem
+    the checks are meant to catch.
+    """
+    def first(columns):
+        return next((row[column].strip() for column in columns
+                     if column in row and isinstance(row[column], str) and row[column].strip()), None)
+
+    street = first(ADDRESS_COLUMNS)
+    if not street or re.match(r'(?i)p\.?\s*o\.?\s*box', street):
+        return None
+    zip_code = next((row[column] for column in ZIP_COLUMNS if column in row and pd.notna(row[column])), None)
+    zip_code = zip5(pd.Series([zip_code]))[0] if zip_code is not None else None
+    state_zip = ' '.join(part for part in (state, zip_code) if isinstance(part, str))
+    return ', '.join(part for part in (street, first(['city']), state_zip) if part)
+
+
+def regeocode(df: pd.DataFrame, flags: pd.DataFrame, geocode: Callable[[str, Optional[tuple]], Optional[tuple]],
+              checks: List[str] = REGEOCODE_CHECKS) -> pd.DataFrame:
+    """
+    Re-geocode only the rows flagged by coordinate checks.
+
+    A new result is kept only if it lands inside the facility's state.
+
+    Args:
+        df: Facilities that were validated
+        flags: Result of ``validate(df)``
+        geocode: Function of (address, bounds) returning (lat, lon) or None,
+            e.g. ``scrapers.geocoding.Geocoder().geocode``
+        checks: Flags that trigger re-geocoding
+
+    Returns:
+        Copy of ``df`` with corrected coordinates where a better result was found
+    """
+    fixed = df.copy()
+    targets = flags[checks].any(axis=1)
+    if not targets.any():
+        return fixed
+    states = state_codes(df)
+    corrected = 0
+    for index in flags.index[targets]:
+        state = states[index]
+        address = address_for_geocoding(df.loc[index], state)
+        if not address:
+            continue
+        bounds = STATE_BOUNDS.get(state)
+        padded = tuple(value + pad for value, pad in zip(bounds, (-BOUNDS_PADDING, -BOUNDS_PADDING,
+                                                                   BOUNDS_PADDING, BOUNDS_PADDING))) if bounds else None
+        coords = geocode(address, padded)
+        if coords:
+            fixed.at[index, 'latitude'], fixed.at[index, 'longitude'] = coords
+            corrected += 1
+    logger.info(f"Re-geocoded {corrected} of {int(targets.sum())} flagged facilities")
+    return fixed
+
+
+def main():
+    """Command line interface for validating exports."""
+    parser = argparse.ArgumentParser(description='Check exported facilities for bad coordinates and values')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Base directory of fetch.py exports')
+    parser.add_argument('--jurisdictions', help='Comma-separated jurisdictions (all by default)')
+    parser.add_argument('--show', type=int, default=20, help='List this many flagged facilities')
+    parser.add_argument('--output', help='Write every flagged facility with its flags to this CSV')
+
+    args = parser.parse_args()
+    jurisdictions = [name.strip() for name in args.jurisdictions.split(',')] if args.jurisdictions else None
+    facilities = load_facilities(args.data_dir, jurisdictions)
+    flags = validate(facilities)
+
+    print(summarize(flags, facilities['jurisdiction']).to_string())
+    flagged = flags.any(axis=1)
+    print(f"\n{int(flagged.sum())} of {len(facilities)} facilities flagged: {describe(flags)}")
+
+    report = facilities.loc[flagged, ['jurisdiction', 'name', 'latitude', 'longitude']].copy()
+    report['flags'] = [', '.join(check for check in CHECKS if row[check]) for _, row in flags[flagged].iterrows()]
+    if args.show and not report.empty:
+        print()
+        print(report.head(args.show).to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"\nWrote {len(report)} flagged facilities to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
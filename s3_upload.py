@@ -131,12 +131,13 @@ class S3Uploader:
         
         return uploaded_files
     
-    def upload_prison_data(self, data_dir: str = "data") -> dict:
+    def upload_prison_data(self, data_dir: str = "data", jurisdictions: Optional[List[str]] = None) -> dict:
         """
         Upload all prison data to S3 with organized structure.
         
         Args:
             data_dir: Local data directory path
+            jurisdictions: Only upload these jurisdictions (all by default)
             
         Returns:
             Dictionary with upload results by jurisdiction
@@ -152,6 +153,8 @@ class S3Uploader:
         for jurisdiction_dir in data_path.iterdir():
             if jurisdiction_dir.is_dir():
                 jurisdiction_name = jurisdiction_dir.name
+                if jurisdictions is not None and jurisdiction_name not in jurisdictions:
+                    continue
                 logger.info(f"Uploading {jurisdiction_name} data...")
                 
                 # Upload to prisons/{jurisdiction}/ in S3
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Deadline-aware scheduling of jurisdictions for fetch.py runs.
+
+``DeadlineScheduler`` runs jurisdictions one at a time, shortest expected
+duration first (from ``.cache/run_history.json``), each on its own thread
+with a time budget and optional per-stage budgets (discover, details,
+geocode, ...). ``budget_middleware`` enforces the budgets on every request:
+it caps request timeouts at the time left and, once a jurisdiction or its
+current stage is out of time, fails further requests fast with
+``BudgetExceededError``. A jurisdiction that runs out of time falls back to
+its last good export, and ``export_allowed`` keeps it from overwriting
+that export.
+
+Python cannot stop a thread, so a jurisdiction abandoned at its deadline
+keeps running on its daemon thread, with every request failing fast, until
+it returns or the process exits. The scheduler moves on without waiting.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from scrapers import stages, transport
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join('.cache', 'run_history.json')
+DEFAULT_BUDGET = 1800
+DEFAULT_EXPECTED = 300
+
+# Checked on every attempt: inside the retry layer, outside request pacing
+MIDDLEWARE_ORDER = 30
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+class BudgetExceededError(requests.exceptions.RequestException):
+    """Raised for requests made after a jurisdiction or stage ran out of time."""
+
+
+class StageClock:
+    """Cumulative wall time per (jurisdiction, stage), fed by stage transitions."""
+
+    def __init__(self):
+        self.totals: Dict[stages.StageKey, float] = defaultdict(float)
+        self._segments: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, old_key: stages.StageKey, new_key: stages.StageKey):
+        now = time.monotonic()
+        ident = threading.get_ident()
+        with self._lock:
+            segment = self._segments.get(ident)
+            if segment:
+                self.totals[segment[0]] += now - segment[1]
+            self._segments[ident] = (new_key, now)
+
+    def elapsed(self, key: stages.StageKey) -> float:
+        """Time spent in a stage so far, including segments still running."""
+        now = time.monotonic()
+        with self._lock:
+            running = sum(now - start for segment_key, start in self._segments.values() if segment_key == key)
+            return self.totals[key] + running
+
+    def stage_times(self, jurisdiction: str) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds, 1) for (name, stage), seconds in self.totals.items()
+                    if name == jurisdiction and stage}
+
+
+class Deadline:
+    """Time budget for one jurisdiction and its stages."""
+
+    def __init__(self, jurisdiction: str, budget: float, stage_budgets: Dict[str, float], clock: StageClock):
+        self.jurisdiction = jurisdiction
+        self.budget = budget
+        self.stage_budgets = stage_budgets
+        self.clock = clock
+        self.started = time.monotonic()
+        self.exceeded: Optional[str] = None
+
+    def remaining(self) -> float:
+        return self.budget - (time.monotonic() - self.started)
+
+    def expire(self, reason: str):
+        if not self.exceeded:
+            self.exceeded = reason
+            logger.warning(f"{self.jurisdiction}: {reason}; remaining requests will fail fast")
+
+    def check(self):
+        """Raise BudgetExceededError if the jurisdiction or current stage is out of time."""
+        if not self.exceeded and self.remaining() <= 0:
+            self.expire(f"exceeded its {self.budget:.0f}s budget")
+        stage = stages.current_stage()
+        if not self.exceeded and stage in self.stage_budgets:
+            if self.clock.elapsed((self.jurisdiction, stage)) > self.stage_budgets[stage]:
+                self.expire(f"{stage} stage exceeded its {self.stage_budgets[stage]:.0f}s budget")
+        if self.exceeded:
+            raise BudgetExceededError(f"{self.jurisdiction} {self.exceeded}")
+
+
+def budget_middleware(request, send, **kwargs):
+    """Transport middleware: fail fast once out of budget and cap request timeouts."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return send(request, **kwargs)
+    deadline.check()
+    remaining = max(1.0, deadline.remaining())
+    timeout = kwargs.get('timeout')
+    if timeout is None:
+        kwargs['timeout'] = remaining
+    elif isinstance(timeout, (int, float)):
+        kwargs['timeout'] = min(timeout, remaining)
+    return send(request, **kwargs)
+
+
+def export_allowed() -> bool:
+    """Return False when the current jurisdiction ran out of budget, so its last good export is kept."""
+    deadline = _deadline.get()
+    return deadline is None or not deadline.exceeded
+
+
+class RunHistory:
+    """Durations of previous runs, used to order work and report expectations."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, keep: int = 10):
+        self.path = path
+        self.keep = keep
+        self.runs: Dict[str, List[Dict]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.runs = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable run history {path}: {e}")
+
+    def expected_duration(self, jurisdiction: str) -> float:
+        """Median duration of recent successful runs."""
+        durations = [run['duration'] for run in self.runs.get(jurisdiction, []) if run.get('status') == 'ok']
+        return statistics.median(durations) if durations else DEFAULT_EXPECTED
+
+    def record(self, jurisdiction: str, duration: float, status: str, stage_times: Dict[str, float]):
+        runs = self.runs.setdefault(jurisdiction, [])
+        runs.append({
+            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration': round(duration, 1),
+            'status': status,
+            'stages': stage_times,
+        })
+        del runs[:-self.keep]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.runs, f, indent=2)
+
+
+def load_last_good_export(jurisdiction: str, output_dir: str) -> pd.DataFrame:
+    """Load the previous JSON export for a jurisdiction, or an empty DataFrame."""
+    path = os.path.join(output_dir, jurisdiction, f"{jurisdiction}_prisons.json")
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    try:
+        return pd.read_json(path, orient='records')
+    except ValueError as e:
+        logger.warning(f"Could not read last export {path}: {e}")
+        return pd.DataFrame()
+
+
+class DeadlineScheduler:
+    """Run jurisdictions in expected-duration order, each within a time budget."""
+
+    def __init__(self, budget: float = DEFAULT_BUDGET, stage_budgets: Optional[Dict[str, float]] = None,
+                 history_path: str = DEFAULT_HISTORY_PATH, output_dir: str = 'data'):
+        """
+        Initialize the scheduler.
+
+        Args:
+            budget: Seconds each jurisdiction may run before falling back
+            stage_budgets: Optional seconds per stage, e.g. {'geocode': 300}
+            history_path: JSON file with durations of previous runs
+            output_dir: Base directory holding the last good exports
+        """
+        self.budget = budget
+        self.stage_budgets = stage_budgets or {}
+        self.output_dir = output_dir
+        self.history = RunHistory(history_path)
+        self.clock = StageClock()
+        self.statuses: Dict[str, str] = {}
+
+    def plan(self, jurisdictions: List[str]) -> List[str]:
+        """Order jurisdictions shortest expected duration first, so one slow site cannot starve the rest."""
+        return sorted(jurisdictions, key=self.history.expected_duration)
+
+    def run(self, jurisdictions: List[str], run_one: Callable[[str], pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Run each jurisdiction within its budget.
+
+        Args:
+            jurisdictions: Jurisdiction names to run
+            run_one: Function that scrapes and exports one jurisdiction
+
+        Returns:
+            Mapping of jurisdiction to its DataFrame (fresh, or the last good export)
+        """
+        transport.add_middleware(budget_middleware, order=MIDDLEWARE_ORDER)
+        stages.add_listener(self.clock)
+        results = {}
+        try:
+            for state in self.plan(jurisdictions):
+                results[state] = self._run_with_deadline(state, run_one)
+        finally:
+            stages.remove_listener(self.clock)
+            transport.remove_middleware(budget_middleware)
+            self.history.save()
+        return results
+
+    def _run_with_deadline(self, state: str, run_one: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        expected = self.history.expected_duration(state)
+        print(f"\n{'='*20} {state.upper()} {'='*20}")
+        print(f"Budget: {self.budget:.0f}s (expected ~{expected:.0f}s from previous runs)")
+
+        deadline = Deadline(state, self.budget, self.stage_budgets, self.clock)
+        outcome = {}
+
+        def target():
+            _deadline.set(deadline)
+            try:
+                outcome['df'] = run_one(state)
+            except Exception as e:
+                outcome['error'] = e
+
+        # Run in a copy of the current context so the deadline stays with this jurisdiction
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(target,), name=f"scrape-{state}", daemon=True)
+        started = time.monotonic()
+        thread.start()
+        thread.join(self.budget)
+        duration = time.monotonic() - started
+
+        if thread.is_alive():
+            deadline.expire(f"still running after {self.budget:.0f}s")
+        if deadline.exceeded:
+            status = 'fallback'
+            df = load_last_good_export(state, self.output_dir)
+            print(f"↺ {state} ran out of time; using last good export ({len(df)} facilities)")
+        elif 'error' in outcome:
+            status = 'failed'
+            df = pd.DataFrame()
+            print(f"✗ Error scraping {state}: {outcome['error']}")
+        else:
+            status = 'ok'
+            df = outcome.get('df', pd.DataFrame())
+
+        self.statuses[state] = status
+        self.history.record(state, duration, status, self.clock.stage_times(state))
+        return df
+
+
+def parse_stage_budgets(value: Optional[str]) -> Dict[str, float]:
+    """Parse ``stage=seconds`` pairs such as ``details=600,geocode=300``."""
+    budgets = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, seconds = item.partition('=')
+        name = name.strip().lower()
+        if name not in (stages.DISCOVER, stages.DETAILS, stages.GEOCODE):
+            raise ValueError(f"Unknown stage in budget: {name}")
+        budgets[name] = float(seconds)
+    return budgets
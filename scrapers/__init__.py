@@ -2,6 +2,8 @@
 Prison data scrapers for different jurisdictions.
 """
 
+from . import ratelimit, resilience
+
 from .federal import FederalScraper
 from .california import CaliforniaScraper
 from .new_york import NewYorkScraper
@@ -21,4 +23,8 @@ from .indiana import IndianaScraper
 from .maryland import MarylandScraper
 from .missouri import MissouriScraper
 
+# Retry transient failures, fail fast on dead hosts and pace every scraper request
+resilience.install()
+ratelimit.install()
+
 __all__ = ['FederalScraper', 'CaliforniaScraper', 'NewYorkScraper', 'TexasScraper', 'IllinoisScraper', 'FloridaScraper', 'PennsylvaniaScraper', 'GeorgiaScraper', 'NorthCarolinaScraper', 'MichiganScraper', 'VirginiaScraper', 'WashingtonScraper', 'ArizonaScraper', 'TennesseeScraper', 'MassachusettsScraper', 'IndianaScraper', 'MarylandScraper', 'MissouriScraper']
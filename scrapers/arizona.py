@@ -2,16 +2,22 @@
 
 import requests
 import re
-import json
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, embedded_json, parsing, stages
+from .extractors import Field, LabelExtractor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "... has the capacity to house 4,250 inmates" in the facility overview
+OVERVIEW_DETAILS = LabelExtractor({
+    'capacity to house': Field('capacity', r'\d[\d,]*', lambda value: int(value.replace(',', ''))),
+}, separator=r'\s+', flags=re.IGNORECASE)
+
 class ArizonaScraper:
     """Scraper for Arizona Department of Corrections facilities."""
     
@@ -59,9 +65,6 @@ class ArizonaScraper:
                 
                 enhanced_facilities.append(facility)
                 
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
             except Exception as e:
                 logger.error(f"Error processing {facility.get('name', 'Unknown')}: {e}")
                 enhanced_facilities.append(facility)  # Add anyway
@@ -70,23 +73,20 @@ class ArizonaScraper:
         logger.info(f"Successfully processed {len(enhanced_facilities)} facilities")
         return enhanced_facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facilities_from_json(self) -> List[Dict]:
         """Extract facility information from the embedded JSON data."""
         try:
             response = self.session.get(self.facilities_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find the script tag with drupal-settings-json
-            script_tag = soup.find('script', {'data-drupal-selector': 'drupal-settings-json'})
-            if not script_tag:
+            # Decode the drupal-settings-json script straight from the page text
+            json_data = embedded_json.find_json(response.text, 'data-drupal-selector="drupal-settings-json"')
+            if not json_data:
                 logger.error("Could not find drupal-settings-json script tag")
                 return []
             
-            # Parse the JSON data
-            json_data = json.loads(script_tag.string)
-            
             # Navigate to the leaflet map features
             leaflet_data = json_data.get('leaflet', {})
             map_key = None
@@ -229,6 +229,8 @@ class ArizonaScraper:
         else:
             return 'Prison Complex'  # Default for Arizona
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def get_facility_details(self, detail_url: str) -> Dict:
         """Get additional facility details from individual facility page."""
         details = {}
@@ -237,7 +239,7 @@ class ArizonaScraper:
             response = self.session.get(detail_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Extract warden information
             warden_info = self.extract_warden_info(soup)
@@ -310,19 +312,17 @@ class ArizonaScraper:
                 overview_text = overview_section.get_text()
                 
                 # Extract capacity
-                capacity_match = re.search(r'capacity to house\s+([0-9,]+)', overview_text, re.IGNORECASE)
-                if capacity_match:
-                    capacity_str = capacity_match.group(1).replace(',', '')
-                    capacity_info['capacity'] = int(capacity_str)
+                capacity_info.update(OVERVIEW_DETAILS.extract(overview_text))
                 
                 # Extract security levels
-                if 'maximum security' in overview_text.lower():
+                overview_lower = overview_text.lower()
+                if 'maximum security' in overview_lower:
                     capacity_info['security_level'] = 'Maximum'
-                elif 'high custody' in overview_text.lower():
+                elif 'high custody' in overview_lower:
                     capacity_info['security_level'] = 'High'
-                elif 'medium' in overview_text.lower():
+                elif 'medium' in overview_lower:
                     capacity_info['security_level'] = 'Medium'
-                elif 'minimum' in overview_text.lower():
+                elif 'minimum' in overview_lower:
                     capacity_info['security_level'] = 'Minimum'
                     
         except Exception as e:
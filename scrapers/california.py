@@ -6,11 +6,14 @@ import requests
 import pandas as pd
 import re
 import json
-import time
 import os
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from . import checkpoint, coordinates, geocoding, parsing, stages
+
+# (min_lon, min_lat, max_lon, max_lat) box used to validate California coordinates
+CALIFORNIA_BOUNDS = (-125.0, 32.0, -114.0, 42.0)
+
 
 class CaliforniaScraper:
     """Scraper for California Department of Corrections and Rehabilitation (CDCR) facilities."""
@@ -62,6 +65,8 @@ class CaliforniaScraper:
             return match.group(1)
         return None
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_cdcr_table(self):
         """Scrape facility data from CDCR table"""
         print("Fetching California prison data from CDCR table...")
@@ -70,7 +75,7 @@ class CaliforniaScraper:
             response = requests.get(self.cdcr_table_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Find the table with prison data
             table = soup.find('table')
@@ -125,68 +130,30 @@ class CaliforniaScraper:
             print(f"Error parsing CDCR table: {e}")
             return pd.DataFrame()
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_google_maps_coordinates(self):
-        """Scrape coordinates from Google My Maps embed"""
+        """Scrape named facility coordinates from the CDCR Google My Maps embed"""
         print("Fetching coordinate data from Google Maps...")
         
         try:
             response = requests.get(self.google_maps_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            content = response.text
-            
-            # Extract coordinate pairs and facility names
-            facilities = []
-            
-            # Look for coordinate patterns (latitude, longitude pairs)
-            coord_matches = re.findall(r'([-]?\d+\.\d{6,})', content)
-            
-            # Look for facility names in the content
-            # We'll match against known California prison names
-            known_prisons = [
-                'Avenal State Prison', 'California Correctional Institution', 
-                'California Health Care Facility', 'California Institution for Men',
-                'California Institution for Women', 'California Men\'s Colony',
-                'California Medical Facility', 'California Rehabilitation Center',
-                'California State Prison, Corcoran', 'California State Prison, Los Angeles County',
-                'California State Prison, Sacramento', 'California State Prison, Solano',
-                'Calipatria State Prison', 'California State Prison, Centinela',
-                'Central California Women\'s Facility', 'Correctional Training Facility',
-                'Folsom State Prison', 'High Desert State Prison', 'Ironwood State Prison',
-                'Kern Valley State Prison', 'Mule Creek State Prison', 'North Kern State Prison',
-                'Pelican Bay State Prison', 'Pleasant Valley State Prison',
-                'Richard J. Donovan Correctional Facility', 'Salinas Valley State Prison',
-                'San Quentin Rehabilitation Center', 'Sierra Conservation Center',
-                'Substance Abuse Treatment Facility', 'Valley State Prison', 'Wasco State Prison'
-            ]
-            
-            # Convert coordinates to float and group into lat/lng pairs
-            coords = []
-            try:
-                float_coords = [float(c) for c in coord_matches]
-                # Group coordinates into pairs (assuming lat, lng order)
-                for i in range(0, len(float_coords)-1, 2):
-                    lat, lng = float_coords[i], float_coords[i+1]
-                    # Basic validation for California coordinates
-                    if 32 <= lat <= 42 and -125 <= lng <= -114:
-                        coords.append((lat, lng))
-            except ValueError:
-                pass
-            
-            print(f"Found {len(coords)} potential coordinate pairs in California bounds")
-            
-            # For now, return empty DataFrame as we need more sophisticated parsing
-            # to match coordinates with specific facilities
-            print("Note: Coordinate extraction from Google Maps needs facility name matching")
-            return pd.DataFrame()
+            placemarks = [(name, lat, lng) for name, lat, lng in coordinates.parse_my_maps(response.text)
+                          if geocoding.in_bounds((lat, lng), CALIFORNIA_BOUNDS)]
+            print(f"Found {len(placemarks)} named placemarks in California bounds")
+            return placemarks
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching Google Maps data: {e}")
-            return pd.DataFrame()
+            return []
         except Exception as e:
             print(f"Error parsing Google Maps data: {e}")
-            return pd.DataFrame()
+            return []
 
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, address, city, state, zip_code):
         """Geocode an address using multiple fallback methods"""
         # Clean and construct full address
@@ -355,42 +322,32 @@ class CaliforniaScraper:
         
         return None, None
 
-    def add_coordinates_to_facilities(self, df):
-        """Add coordinates to facilities by geocoding their addresses"""
+    def add_coordinates_to_facilities(self, df, map_points=None):
+        """Add coordinates to facilities, from the My Maps placemarks where they match and by geocoding otherwise"""
         if df.empty:
             return df
         
-        print("Geocoding facility addresses...")
+        index = coordinates.CoordinateIndex(map_points or [], source='CDCR map', bounds=CALIFORNIA_BOUNDS)
+        facilities = df.to_dict('records')
         
-        latitudes = []
-        longitudes = []
-        
-        for idx, row in df.iterrows():
-            print(f"Geocoding {idx+1}/{len(df)}: {row['name']}")
-            
-            lat, lng = self.geocode_address(
-                row.get('street_address'),
-                row.get('city'), 
-                row.get('state'),
-                row.get('zip_code')
+        def geocode(facility):
+            print(f"Geocoding {facility['name']}")
+            return self.geocode_address(
+                facility.get('street_address'),
+                facility.get('city'),
+                facility.get('state'),
+                facility.get('zip_code')
             )
-            
-            latitudes.append(lat)
-            longitudes.append(lng)
-            
-            # Rate limiting - be respectful to the geocoding service
-            # Use shorter delay for Google API (higher rate limits)
-            if os.getenv('GOOGLE_MAPS_API_KEY'):
-                time.sleep(0.1)  # Google allows higher rate limits
-            else:
-                time.sleep(1)    # Be more conservative with free services
         
-        df['latitude'] = latitudes
-        df['longitude'] = longitudes
+        counts = coordinates.resolve(facilities, index, geocode,
+                                     aliases=lambda facility: (facility.get('acronym'),))
+        
+        df['latitude'] = [facility['latitude'] for facility in facilities]
+        df['longitude'] = [facility['longitude'] for facility in facilities]
         
-        # Count successful geocodes
-        successful_geocodes = df.dropna(subset=['latitude', 'longitude'])
-        print(f"Successfully geocoded {len(successful_geocodes)}/{len(df)} facilities")
+        located = df.dropna(subset=['latitude', 'longitude'])
+        print(f"Located {len(located)}/{len(df)} facilities "
+              f"({counts['first-party']} from the CDCR map, {counts['geocoded']} geocoded)")
         
         return df
 
@@ -405,8 +362,9 @@ class CaliforniaScraper:
             print("No California data was successfully fetched.")
             return pd.DataFrame()
         
-        # Add coordinates by geocoding addresses
-        cdcr_df = self.add_coordinates_to_facilities(cdcr_df)
+        # Add coordinates, geocoding only facilities missing from the CDCR map
+        map_points = self.scrape_google_maps_coordinates()
+        cdcr_df = self.add_coordinates_to_facilities(cdcr_df, map_points)
         
         print(f"\nSuccessfully collected data for {len(cdcr_df)} California facilities")
         
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for resuming interrupted jurisdiction scrapes.
+
+Discovery, detail and geocoding results are appended to a per-jurisdiction
+JSONL journal as each item completes. With ``fetch.py --resume`` the journal
+is replayed, so an interrupted run only redoes the remaining work.
+
+The journal is also how work-queue mode hands a jurisdiction from one
+stage's task to the next: inside ``stage_limit(stage)`` the first call
+into a later stage that is not journaled raises ``StageHandoff``, and
+the next task replays the journal and carries on from there.
+"""
+
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from . import stages
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = os.path.join('.cache', 'checkpoints')
+
+# Pipeline stages in the order a jurisdiction goes through them
+STAGE_ORDER = [stages.DISCOVER, stages.DETAILS, stages.GEOCODE, stages.EXPORT]
+
+_journal = contextvars.ContextVar('checkpoint_journal', default=None)
+_stage_limit = contextvars.ContextVar('checkpoint_stage_limit', default=None)
+
+
+class StageHandoff(BaseException):
+    """
+    Raised when work reaches a stage beyond the active ``stage_limit``.
+
+    A BaseException, like KeyboardInterrupt, so the scrapers' ``except
+    Exception`` handlers let it end the run instead of logging it as a
+    failed facility.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Handing off at the {stage} stage")
+        self.stage = stage
+
+
+class Journal:
+    """Append-only JSONL journal of completed pipeline items."""
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Open a journal.
+
+        Args:
+            path: Journal file path
+            resume: Replay existing entries instead of starting fresh
+        """
+        self.path = path
+        self.entries: Dict[Tuple[str, str], Any] = {}
+        self.replayed = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[(entry['fn'], entry['key'])] = entry['value']
+                except (ValueError, KeyError):
+                    # A crash mid-write can leave a truncated last line
+                    continue
+        logger.info(f"Loaded {len(self.entries)} checkpointed items from {self.path}")
+
+    def get(self, fn: str, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for a completed item."""
+        with self._lock:
+            if (fn, key) in self.entries:
+                self.replayed += 1
+                return True, _decode(self.entries[(fn, key)])
+            return False, None
+
+    def record(self, stage: str, fn: str, key: str, value: Any):
+        """Append a completed item to the journal."""
+        encoded = _encode(value)
+        line = json.dumps({'stage': stage, 'fn': fn, 'key': key, 'value': encoded}, default=_json_default)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[(fn, key)] = json.loads(line)['value']
+            self.recorded += 1
+
+    def clear(self):
+        """Delete the journal once its jurisdiction has been exported."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.entries.clear()
+
+
+@contextmanager
+def journal(jurisdiction: str, resume: bool = False, directory: str = DEFAULT_CHECKPOINT_DIR):
+    """
+    Activate a checkpoint journal for one jurisdiction.
+
+    Args:
+        jurisdiction: Jurisdiction name, used as the journal file name
+        resume: Replay items completed by a previous, interrupted run
+        directory: Directory holding journal files
+    """
+    active = Journal(os.path.join(directory, f"{jurisdiction}.jsonl"), resume=resume)
+    token = _journal.set(active)
+    try:
+        yield active
+    finally:
+        _journal.reset(token)
+
+
+def current_journal() -> Optional[Journal]:
+    """Return the journal active in this context, if any."""
+    return _journal.get()
+
+
+@contextmanager
+def stage_limit(stage: str):
+    """
+    Run pipeline work up to and including one stage.
+
+    Args:
+        stage: Last stage allowed to do new work, one of ``STAGE_ORDER``
+    """
+    token = _stage_limit.set(stage)
+    try:
+        yield
+    finally:
+        _stage_limit.reset(token)
+
+
+def check_stage(stage: str):
+    """Raise StageHandoff if ``stage`` comes after the active stage limit."""
+    limit = _stage_limit.get()
+    if limit is None or stage not in STAGE_ORDER:
+        return
+    if STAGE_ORDER.index(stage) > STAGE_ORDER.index(limit):
+        raise StageHandoff(stage)
+
+
+def checkpointed(stage: str):
+    """
+    Decorator that journals a method's result, keyed by its arguments.
+
+    Results are only recorded when they look complete (not None, empty or all
+    None), so failed items are retried on resume. An item that is not
+    journaled yet and belongs to a stage past the active ``stage_limit``
+    raises StageHandoff. Without an active journal the method runs normally.
+
+    Args:
+        stage: Pipeline stage name recorded with each entry
+    """
+    def decorator(method):
+        fn_name = method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            active = _journal.get()
+            if active is None:
+                return method(self, *args, **kwargs)
+
+            key = _make_key(args, kwargs)
+            found, value = active.get(fn_name, key)
+            if found:
+                return value
+
+            check_stage(stage)
+            value = method(self, *args, **kwargs)
+            if _is_complete(value):
+                try:
+                    active.record(stage, fn_name, key, value)
+                except (OSError, TypeError, ValueError) as e:
+                    logger.warning(f"Could not checkpoint {fn_name}: {e}")
+            return value
+        return wrapper
+    return decorator
+
+
+def _make_key(args, kwargs) -> str:
+    payload = json.dumps([args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _is_complete(value) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, pd.DataFrame):
+        return not value.empty
+    if isinstance(value, (tuple, list)):
+        return len(value) > 0 and not all(item is None for item in value)
+    if isinstance(value, dict):
+        return len(value) > 0
+    return True
+
+
+def _encode(value):
+    if isinstance(value, pd.DataFrame):
+        return {'__dataframe__': value.to_dict(orient='records'), 'columns': list(value.columns)}
+    if isinstance(value, tuple):
+        return {'__tuple__': list(value)}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__dataframe__' in value:
+            return pd.DataFrame(value['__dataframe__'], columns=value['columns'])
+        if '__tuple__' in value:
+            return tuple(value['__tuple__'])
+    return value
+
+
+def _json_default(value):
+    # numpy scalars and timestamps from DataFrames
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
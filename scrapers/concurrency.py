@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Thread pools that keep the caller's run context.
+
+Jurisdiction and stage markers (``stages``), the checkpoint journal and the
+scheduler's time budget live in context variables, which plain worker
+threads do not inherit. ``ContextThreadPoolExecutor`` runs every task in a
+copy of the context it was submitted from, so requests made by workers are
+traced, budgeted and journaled like requests made by the scraper itself.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Parallel requests per scraper; per-host pacing in ratelimit still applies
+DEFAULT_WORKERS = 4
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in the submitter's context."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+First-party coordinates ahead of geocoding.
+
+Some agencies publish facility locations themselves, for example in a
+Google My Maps embed next to their facility list. ``CoordinateIndex`` holds
+such named points and matches them to facilities by name or acronym, and
+``resolve`` applies the precedence: coordinates the facility already has,
+then a matching first-party point, and only then the geocoder. A scraper
+whose source covers every facility makes no geocoding requests at all.
+"""
+
+import json
+import logging
+import math
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .geocoding import Bounds, in_bounds
+from .name_index import NameIndex, normalize_name
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+
+PARENTHESIZED = re.compile(r'\(([^)]*)\)')
+# var _pageData = "...";  the My Maps map definition as a JS string literal
+PAGE_DATA = re.compile(r'_pageData\s*=\s*("(?:[^"\\]|\\.)*")', re.DOTALL)
+JS_HEX_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\x([0-9a-fA-F]{2})')
+
+
+def name_keys(name: str) -> List[str]:
+    """Lookup keys for a name: the name without parentheses, then any parenthesized acronym."""
+    keys = [normalize_name(name)]
+    keys += [normalize_name(acronym) for acronym in PARENTHESIZED.findall(name)]
+    return [key for key in keys if key]
+
+
+def has_coordinates(facility: Dict) -> bool:
+    """True if the facility has a latitude and longitude (NaN counts as missing)."""
+    return all(isinstance(facility.get(key), (int, float)) and not math.isnan(facility[key])
+               for key in ('latitude', 'longitude'))
+
+
+class CoordinateIndex:
+    """Named first-party points, matched to facilities by name."""
+
+    def __init__(self, points: Iterable[Sequence], source: str = 'first-party',
+                 bounds: Optional[Bounds] = None):
+        """
+        Build an index.
+
+        Args:
+            points: (name, latitude, longitude) entries
+            source: Label used in log messages
+            bounds: Drop points outside this (min_lon, min_lat, max_lon, max_lat) box
+        """
+        self.source = source
+        self.points: Dict[str, Point] = {}
+        self.names = NameIndex()
+        named = []
+        ambiguous = set()
+        for name, lat, lon in points:
+            point = (float(lat), float(lon))
+            if not in_bounds(point, bounds):
+                logger.debug(f"Skipping {source} point {name} at {point}: out of bounds")
+                continue
+            named.append((name, point))
+            for key in name_keys(name):
+                if self.points.get(key, point) != point:
+                    ambiguous.add(key)
+                self.points[key] = point
+        # A key shared by two different points identifies neither
+        for key in ambiguous:
+            del self.points[key]
+        for name, point in named:
+            if normalize_name(name) not in ambiguous:
+                self.names.add(name, point)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def match(self, name: str, *aliases: Optional[str]) -> Optional[Point]:
+        """
+        Find the point for a facility.
+
+        Args:
+            name: Facility name
+            aliases: Other identifiers for the facility, e.g. its acronym (non-strings are ignored)
+
+        Returns:
+            (latitude, longitude), or None if no point matches by name, acronym or
+            distinctive words
+        """
+        keys = name_keys(name) + [normalize_name(alias) for alias in aliases if isinstance(alias, str)]
+        for key in keys:
+            if key in self.points:
+                return self.points[key]
+        # Differently worded names, e.g. "Centre" for "Center" or a dropped word like "State".
+        # The distinctive words must agree exactly: a near miss is a different facility
+        # ("Institution for Men" and "for Women"), so it falls through to the geocoder.
+        return self.names.find(name)
+
+
+def resolve(facilities: Iterable[Dict], index: Optional[CoordinateIndex],
+            geocode: Callable[[Dict], Optional[Point]],
+            aliases: Callable[[Dict], Sequence[Optional[str]]] = lambda facility: ()) -> Dict[str, int]:
+    """
+    Fill in each facility's latitude and longitude, geocoding only as a last resort.
+
+    Args:
+        facilities: Facility dicts, updated in place
+        index: First-party points, if the source publishes any
+        geocode: Returns (latitude, longitude) or None for a facility
+        aliases: Other identifiers to match a facility by, e.g. its acronym
+
+    Returns:
+        Facility counts by where their coordinates came from
+    """
+    counts = {'existing': 0, 'first-party': 0, 'geocoded': 0, 'missing': 0}
+    for facility in facilities:
+        if has_coordinates(facility):
+            counts['existing'] += 1
+            continue
+
+        name = facility.get('name')
+        point = index.match(name if isinstance(name, str) else '', *aliases(facility)) if index else None
+        if point:
+            counts['first-party'] += 1
+        else:
+            point = geocode(facility)
+            if point and point[0] is not None:
+                counts['geocoded'] += 1
+            else:
+                point = (None, None)
+                counts['missing'] += 1
+        facility['latitude'], facility['longitude'] = point
+
+    source = index.source if index else 'first-party'
+    logger.info(f"Coordinates: {counts['existing']} existing, {counts['first-party']} from {source}, "
+                f"{counts['geocoded']} geocoded, {counts['missing']} missing")
+    return counts
+
+
+def parse_my_maps(html: str) -> List[Tuple[str, float, float]]:
+    """
+    Extract named placemarks from a Google My Maps embed page.
+
+    Args:
+        html: The map's embed page
+
+    Returns:
+        (name, latitude, longitude) for every point placemark
+    """
+    match = PAGE_DATA.search(html)
+    if not match:
+        return []
+    try:
+        literal = JS_HEX_ESCAPE.sub(r'\1\\u00\2', match.group(1))
+        page_data = json.loads(json.loads(literal))
+    except ValueError as e:
+        logger.warning(f"Could not decode My Maps page data: {e}")
+        return []
+    return list(_placemarks(page_data))
+
+
+def _placemarks(node) -> Iterator[Tuple[str, float, float]]:
+    # A placemark is a list holding its geometry ([[[lat, lng]]]) and a
+    # property list with a ["name", ["<name>"], ...] entry
+    if not isinstance(node, list):
+        return
+    name, point = _placemark_name(node), _point(node, depth=3)
+    if name and point:
+        yield name, point[0], point[1]
+        return
+    for child in node:
+        yield from _placemarks(child)
+
+
+def _placemark_name(node: list) -> Optional[str]:
+    for child in node:
+        if not isinstance(child, list):
+            continue
+        for entry in child:
+            if (isinstance(entry, list) and len(entry) >= 2 and entry[0] == 'name'
+                    and isinstance(entry[1], list) and entry[1] and isinstance(entry[1][0], str)):
+                return entry[1][0].strip()
+    return None
+
+
+def _point(node, depth: int) -> Optional[Point]:
+    if (isinstance(node, list) and len(node) == 2
+            and all(isinstance(value, float) for value in node)):
+        return node[0], node[1]
+    if depth and isinstance(node, list):
+        for child in node:
+            point = _point(child, depth - 1)
+            if point:
+                return point
+    return None
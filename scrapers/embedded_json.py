@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Locate and decode JSON embedded in HTML and JavaScript.
+
+Map pages ship their data as a JSON literal inside a script, e.g. Drupal's
+``drupal-settings-json`` block or ``ma.leafletMapData.push({...})``. Rather
+than matching the payload with a DOTALL regex and counting braces, we find
+a plain-text anchor with ``str.find`` and let the C JSON decoder
+(``raw_decode``) read the value that follows it. The decoder stops at the
+end of the value, so the rest of the page is never scanned.
+
+Example:
+    settings = find_json(html, 'data-drupal-selector="drupal-settings-json"')
+    features = find_json_items(html, '"features":')
+"""
+
+import json
+import logging
+import re
+from typing import Any, Iterator, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How far past the anchor the value may start (e.g. the rest of a script tag)
+MAX_GAP = 256
+
+_DECODER = json.JSONDecoder()
+_VALUE_START = re.compile(r'[\[{]')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _value_start(text: str, anchor: str, start: int) -> Optional[int]:
+    """Index of the first object or array after the next ``anchor``, or None."""
+    position = text.find(anchor, start)
+    if position < 0:
+        return None
+    position += len(anchor)
+    match = _VALUE_START.search(text, position, position + MAX_GAP)
+    return match.start() if match else None
+
+
+def iter_json(text: str, anchor: str) -> Iterator[Any]:
+    """
+    Decode the object or array after every occurrence of ``anchor``.
+
+    Occurrences whose value is not valid JSON are skipped.
+
+    Args:
+        text: HTML or JavaScript source
+        anchor: Literal text that precedes the value, e.g. ``'ma.leafletMapData.push('``
+
+    Yields:
+        Decoded values in page order
+    """
+    start = 0
+    while True:
+        index = _value_start(text, anchor, start)
+        if index is None:
+            return
+        try:
+            value, start = _DECODER.raw_decode(text, index)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Invalid JSON after {anchor!r} at {index}: {e}")
+            start = index + 1
+            continue
+        yield value
+
+
+def find_json(text: str, anchor: str) -> Optional[Any]:
+    """First valid object or array after ``anchor``, or None."""
+    return next(iter_json(text, anchor), None)
+
+
+def find_json_items(text: str, anchor: str) -> List[Any]:
+    """
+    Decode the array after the first ``anchor`` one item at a time.
+
+    A truncated or malformed array still yields every item before the
+    first one that fails to decode.
+
+    Args:
+        text: HTML or JavaScript source
+        anchor: Literal text that precedes the array, e.g. ``'"features":'``
+
+    Returns:
+        Decoded items (empty if no array follows the anchor)
+    """
+    index = _value_start(text, anchor, 0)
+    if index is None or text[index] != '[':
+        return []
+
+    items = []
+    index = _WHITESPACE.match(text, index + 1).end()
+    while index < len(text) and text[index] != ']':
+        try:
+            item, index = _DECODER.raw_decode(text, index)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Stopped after {len(items)} items of the array after {anchor!r}: {e}")
+            break
+        items.append(item)
+        index = _WHITESPACE.match(text, index).end()
+        if text.startswith(',', index):
+            index = _WHITESPACE.match(text, index + 1).end()
+    return items
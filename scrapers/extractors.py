@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Label-driven field extraction for "Label: value" facility pages.
+
+A ``LabelExtractor`` compiles every label into one alternation up front and
+scans a page once. Each label hit is dispatched to its field through a
+dict, and the value runs to the end of the line, the end of the text block
+or the next label, whichever comes first. Longer labels are tried first and
+labels must start at a word boundary, so "Security Employees" no longer
+matches inside "Non-Security Employees".
+
+Example:
+    DETAILS = LabelExtractor({
+        'Total Employees': Field('total_employees', r'\\d+', int),
+        'Custody Levels Housed': Field('custody_levels'),
+    })
+    details = DETAILS.extract_blocks(p.get_text() for p in soup.find_all('p'))
+"""
+
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Joins text blocks so that values never run from one block into the next
+BLOCK_SEPARATOR = '\0'
+
+_VALUE_END = re.compile(r'[\n\0]')
+
+
+class Field(NamedTuple):
+    """Where a label's value goes and how to read it."""
+    name: str
+    # Regex the value must start with; only the matched part is kept
+    value: Optional[str] = None
+    # Applied to the (stripped) value, e.g. int
+    convert: Optional[Callable[[str], Any]] = None
+
+
+def _label_pattern(label: str) -> str:
+    # Any run of whitespace in the page matches a space in the label
+    return r'\s+'.join(re.escape(word) for word in label.split())
+
+
+class LabelExtractor:
+    """Extract labelled values from page text in a single pass."""
+
+    def __init__(self, fields: Dict[str, Field], separator: str = r':\s*', flags: int = 0):
+        """
+        Args:
+            fields: Label text -> Field
+            separator: Regex between a label and its value
+            flags: re flags for the labels, e.g. re.IGNORECASE
+        """
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.fields = {self._key(label): field for label, field in fields.items()}
+        labels = sorted(fields, key=len, reverse=True)
+        self.pattern = re.compile(
+            r'(?<![\w-])(?P<label>' + '|'.join(_label_pattern(label) for label in labels) + r')' + separator,
+            flags)
+        self.values = {self._key(label): re.compile(field.value, flags)
+                       for label, field in fields.items() if field.value}
+
+    def _key(self, label: str) -> str:
+        label = ' '.join(label.split())
+        return label.lower() if self.ignore_case else label
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """
+        Extract every labelled field from ``text``.
+
+        Args:
+            text: Page text; values end at a newline or the next label
+
+        Returns:
+            Field name -> value; a label that appears more than once keeps its last value
+        """
+        results = {}
+        matches = list(self.pattern.finditer(text))
+        for i, match in enumerate(matches):
+            start = match.end()
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            line_end = _VALUE_END.search(text, start, end)
+            value = text[start:line_end.start() if line_end else end].strip()
+            if not value:
+                continue
+
+            key = self._key(match.group('label'))
+            field = self.fields[key]
+            if key in self.values:
+                value_match = self.values[key].match(value)
+                if not value_match:
+                    continue
+                value = value_match.group(0)
+            if field.convert:
+                try:
+                    value = field.convert(value)
+                except ValueError as e:
+                    logger.debug(f"Could not convert {field.name} value {value!r}: {e}")
+                    continue
+            results[field.name] = value
+        return results
+
+    def extract_blocks(self, blocks: Iterable[str]) -> Dict[str, Any]:
+        """Extract fields from separate text blocks (e.g. paragraphs) in one scan."""
+        return self.extract(BLOCK_SEPARATOR.join(block.replace(BLOCK_SEPARATOR, ' ') for block in blocks))
@@ -4,9 +4,9 @@ Federal prison data scraper for Bureau of Prisons (BOP) facilities.
 
 import requests
 import pandas as pd
-import time
 import re
-from bs4 import BeautifulSoup
+
+from . import checkpoint, parsing, stages
 
 
 class FederalScraper:
@@ -25,6 +25,8 @@ class FederalScraper:
             'gender', 'special', 'type', 'faclTypeDescription', 'hasCamp', 'imageNormal'
         ]
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_facility_codes(self):
         """Scrape facility codes from the BOP facilities list page"""
         
@@ -39,7 +41,7 @@ class FederalScraper:
             response = requests.get('https://www.bop.gov/locations/list.jsp', headers=headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facility_codes = set()
             
             # Find all facility links in the list
@@ -121,6 +123,8 @@ class FederalScraper:
             'TEX', 'TOM', 'TRV', 'TCX', 'VIX', 'WAS', 'WXR', 'WIL', 'YAN', 'YAX'
         ]
 
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def fetch_prison_data(self, code):
         """Fetch data for a single prison code"""
         params = {
@@ -188,9 +192,6 @@ class FederalScraper:
             else:
                 failed_codes.append(code)
             
-            # Rate limiting - be respectful to the server
-            time.sleep(0.5)
-        
         if all_prisons:
             # Combine all data
             combined_df = pd.concat(all_prisons, ignore_index=True)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Record live responses as fixtures and redirect scrapers to a mock server.
+
+Fixtures are stored as ``<dir>/<jurisdiction>/<host>/<key>.json`` (metadata)
+plus ``<key>.body`` (raw bytes). ``mock_server.py`` serves them back, and the
+redirect middleware rewrites ``https://host/path`` to
+``<mock server>/host/path`` so scrapers run unchanged against it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from . import stages, transport
+from .tracing import PROXY_HOSTS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameters that carry credentials and must never be written to disk
+SENSITIVE_PARAMS = {'api_key', 'key', 'apikey', 'token'}
+
+# Environment variable that points scrapers at a mock server
+MOCK_SERVER_ENV = 'PRISONS_MOCK_SERVER'
+
+# Recording sees the original URL; redirection is the last step before the network
+RECORD_ORDER = 85
+REDIRECT_ORDER = 90
+
+
+def normalize_url(url: str) -> str:
+    """
+    Return the fixture lookup key for a URL.
+
+    Scheme and credential parameters are dropped and the remaining query
+    parameters are sorted, so the same request always maps to the same fixture.
+    """
+    parts = urlsplit(url)
+    # Proxied requests are keyed by the target site, not the proxy
+    if parts.hostname in PROXY_HOSTS:
+        target = dict(parse_qsl(parts.query)).get('url')
+        if target:
+            return normalize_url(target)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in SENSITIVE_PARAMS)
+    path = parts.path or '/'
+    key = f"{parts.hostname}{path}"
+    if query:
+        key += '?' + urlencode(query)
+    return key
+
+
+def fixture_id(url: str) -> str:
+    """Return the stable file name stem for a URL's fixture."""
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()[:20]
+
+
+def load_fixture_index(fixtures_dir: str) -> Dict[str, Dict]:
+    """
+    Index every recorded fixture under a directory by normalized URL.
+
+    Returns:
+        Mapping of normalized URL to fixture metadata (with ``body_path``)
+    """
+    index = {}
+    for root, _, files in os.walk(fixtures_dir):
+        for filename in files:
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                with open(path) as f:
+                    meta = json.load(f)
+                meta['body_path'] = os.path.join(root, meta['body_file'])
+                index[meta['key']] = meta
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable fixture {path}: {e}")
+    return index
+
+
+class FixtureRecorder:
+    """Transport middleware that saves every response as a fixture."""
+
+    def __init__(self, fixtures_dir: str):
+        self.fixtures_dir = fixtures_dir
+        self.recorded = 0
+
+    def __call__(self, request, send, **kwargs):
+        response = send(request, **kwargs)
+        try:
+            self.save(request, response)
+        except Exception as e:
+            logger.warning(f"Error recording fixture for {request.url}: {e}")
+        return response
+
+    def save(self, request, response):
+        """Write one response to the fixtures directory."""
+        if request.method != 'GET' or not getattr(response, '_content_consumed', False):
+            return
+        key = normalize_url(request.url)
+        host = key.split('/', 1)[0]
+        directory = os.path.join(self.fixtures_dir, stages.current_jurisdiction() or 'shared', host)
+        os.makedirs(directory, exist_ok=True)
+
+        stem = fixture_id(request.url)
+        with open(os.path.join(directory, f"{stem}.body"), 'wb') as f:
+            f.write(response.content)
+        meta = {
+            'key': key,
+            'status': response.status_code,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() in ('content-type', 'retry-after', 'last-modified', 'etag')},
+            'body_file': f"{stem}.body",
+            'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 1),
+        }
+        with open(os.path.join(directory, f"{stem}.json"), 'w') as f:
+            json.dump(meta, f, indent=2)
+        self.recorded += 1
+
+
+class MockRedirect:
+    """Transport middleware that sends every request to a local mock server."""
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url.rstrip('/')
+
+    def __call__(self, request, send, **kwargs):
+        request = request.copy()
+        request.url = self.rewrite(request.url)
+        request.headers.pop('Host', None)
+        return send(request, **kwargs)
+
+    def rewrite(self, url: str) -> str:
+        """Map ``https://host/path?query`` onto the mock server."""
+        parts = urlsplit(url)
+        rewritten = f"{self.server_url}/{parts.hostname}{parts.path or '/'}"
+        if parts.query:
+            rewritten += f"?{parts.query}"
+        return rewritten
+
+
+def record_to(fixtures_dir: str) -> FixtureRecorder:
+    """Start recording every response under ``fixtures_dir``."""
+    recorder = FixtureRecorder(fixtures_dir)
+    transport.add_middleware(recorder, order=RECORD_ORDER)
+    logger.info(f"Recording HTTP fixtures to {fixtures_dir}")
+    return recorder
+
+
+def redirect_to(server_url: Optional[str] = None) -> Optional[MockRedirect]:
+    """
+    Point every scraper request at a mock server.
+
+    Args:
+        server_url: Mock server base URL (defaults to the PRISONS_MOCK_SERVER env var)
+
+    Returns:
+        The installed redirect middleware, or None if no server is configured
+    """
+    server_url = server_url or os.getenv(MOCK_SERVER_ENV)
+    if not server_url:
+        return None
+    redirect = MockRedirect(server_url)
+    transport.add_middleware(redirect, order=REDIRECT_ORDER)
+    logger.info(f"Redirecting scraper requests to mock server at {server_url}")
+    return redirect
@@ -6,11 +6,12 @@ import requests
 import pandas as pd
 import re
 import json
-import time
 import os
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from . import checkpoint, parsing, stages
+
 
 class FloridaScraper:
     """Scraper for Florida Department of Corrections (FDC) facilities."""
@@ -193,6 +194,8 @@ class FloridaScraper:
         
         return data
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_facility_list(self):
         """Scrape the list of facilities from FDC API"""
         print("Fetching Florida prison facility list from API...")
@@ -228,13 +231,15 @@ class FloridaScraper:
             print(f"Error fetching Florida facility list: {e}")
             return []
 
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, facility_url):
         """Scrape detailed information from individual facility page"""
         try:
             response = requests.get(facility_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Extract facility data
             facility_data = self._extract_facility_data(soup)
@@ -245,6 +250,8 @@ class FloridaScraper:
             print(f"Error scraping facility details from {facility_url}: {e}")
             return {}
 
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, address_components):
         """Geocode facility address using multiple services"""
         if not address_components.get('street_address') or not address_components.get('city'):
@@ -280,7 +287,6 @@ class FloridaScraper:
                 if data['status'] == 'OK' and data['results']:
                     location = data['results'][0]['geometry']['location']
                     print(f"  ✓ Geocoded with Google Maps: {full_address}")
-                    time.sleep(0.1)  # Rate limiting
                     return location['lat'], location['lng']
                     
             except Exception as e:
@@ -304,7 +310,6 @@ class FloridaScraper:
             
             if data:
                 print(f"  ✓ Geocoded with Nominatim: {full_address}")
-                time.sleep(1)  # Rate limiting for free service
                 return float(data[0]['lat']), float(data[0]['lon'])
                 
         except Exception as e:
@@ -325,7 +330,6 @@ class FloridaScraper:
             if data.get('features'):
                 coords = data['features'][0]['geometry']['coordinates']
                 print(f"  ✓ Geocoded with Photon: {full_address}")
-                time.sleep(1)  # Rate limiting
                 return coords[1], coords[0]  # Photon returns [lon, lat]
                 
         except Exception as e:
@@ -385,9 +389,6 @@ class FloridaScraper:
             
             all_facilities.append(facility_data)
             
-            # Rate limiting
-            time.sleep(1)
-        
         df = pd.DataFrame(all_facilities)
         
         # Validate coordinates are within Florida bounds
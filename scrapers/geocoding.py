@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared address geocoder.
+
+Tries the same services the scrapers use, in the same order (Google Maps
+when ``GOOGLE_MAPS_API_KEY`` is set, then Nominatim, then Photon). An
+optional bounding box rejects results that land outside the expected
+area, for example a state, and moves on to the next service.
+"""
+
+import logging
+import os
+from typing import Optional, Tuple
+
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (min_lon, min_lat, max_lon, max_lat)
+Bounds = Tuple[float, float, float, float]
+
+USER_AGENT = 'Prison Data Scraper (https://github.com/user/prisons)'
+
+
+def in_bounds(coords: Tuple[float, float], bounds: Optional[Bounds]) -> bool:
+    """True if (lat, lon) falls inside the bounding box (or no box is given)."""
+    if bounds is None:
+        return True
+    lat, lon = coords
+    return bounds[0] <= lon <= bounds[2] and bounds[1] <= lat <= bounds[3]
+
+
+class Geocoder:
+    """Geocode addresses with fallback between services."""
+
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+
+    def geocode(self, address: str, bounds: Optional[Bounds] = None) -> Optional[Tuple[float, float]]:
+        """
+        Geocode an address.
+
+        Args:
+            address: Full address, e.g. "1 Main St, Jessup, Maryland 20794"
+            bounds: Only accept results inside this (min_lon, min_lat, max_lon, max_lat) box
+
+        Returns:
+            (latitude, longitude), or None if no service found a usable result
+        """
+        for service in (self.geocode_google, self.geocode_nominatim, self.geocode_photon):
+            coords = service(address)
+            if coords and in_bounds(coords, bounds):
+                return coords
+            if coords:
+                logger.debug(f"{service.__name__} result {coords} for {address} is out of bounds")
+        return None
+
+    def geocode_google(self, address: str) -> Optional[Tuple[float, float]]:
+        """Geocode using Google Maps API."""
+        api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+        if not api_key:
+            return None
+        try:
+            response = self.session.get('https://maps.googleapis.com/maps/api/geocode/json',
+                                        params={'address': address, 'key': api_key}, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data['status'] == 'OK' and data['results']:
+                location = data['results'][0]['geometry']['location']
+                return (location['lat'], location['lng'])
+        except Exception as e:
+            logger.debug(f"Google geocoding failed: {e}")
+        return None
+
+    def geocode_nominatim(self, address: str) -> Optional[Tuple[float, float]]:
+        """Geocode using OpenStreetMap Nominatim."""
+        try:
+            response = self.session.get('https://nominatim.openstreetmap.org/search',
+                                        params={'q': address, 'format': 'json', 'limit': 1, 'countrycodes': 'us'},
+                                        timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data:
+                return (float(data[0]['lat']), float(data[0]['lon']))
+        except Exception as e:
+            logger.debug(f"Nominatim geocoding failed: {e}")
+        return None
+
+    def geocode_photon(self, address: str) -> Optional[Tuple[float, float]]:
+        """Geocode using Photon geocoder."""
+        try:
+            response = self.session.get('https://photon.komoot.io/api/',
+                                        params={'q': address, 'limit': 1, 'osm_tag': '!place:hamlet,village'},
+                                        timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data.get('features'):
+                coords = data['features'][0]['geometry']['coordinates']
+                return (coords[1], coords[0])  # Photon returns [lng, lat]
+        except Exception as e:
+            logger.debug(f"Photon geocoding failed: {e}")
+        return None
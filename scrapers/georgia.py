@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 
 import requests
-import json
 import re
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from . import checkpoint, embedded_json, name_index, parsing, stages
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,6 +58,7 @@ class GeorgiaScraper:
         logger.info(f"Successfully processed {len(processed_facilities)} facilities")
         return processed_facilities
     
+    @stages.stage(stages.DISCOVER)
     def extract_json_data(self, html_content: str) -> List[Dict]:
         """
         Extract facility data from embedded JSON in the HTML page.
@@ -67,68 +69,23 @@ class GeorgiaScraper:
         Returns:
             List of facility data dictionaries
         """
-        try:
-            # Look for the geofield map data in the script tags
-            # The data is in a complex nested structure, so we need to find the features array
-            pattern = r'"features":\s*(\[.*?\])\s*\}\s*\}\s*\}'
-            match = re.search(pattern, html_content, re.DOTALL)
-            
-            if not match:
-                logger.error("Could not find facilities JSON data in page")
-                return []
-            
-            features_json = match.group(1)
-            
-            # Clean up the JSON - remove any trailing content that might break parsing
-            # Find the last complete feature object
-            bracket_count = 0
-            last_valid_pos = 0
-            
-            for i, char in enumerate(features_json):
-                if char == '{':
-                    bracket_count += 1
-                elif char == '}':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        last_valid_pos = i + 1
-            
-            # Extract up to the last complete feature
-            if last_valid_pos > 0:
-                clean_json = features_json[:last_valid_pos] + ']'
-                # Remove any trailing commas before the closing bracket
-                clean_json = re.sub(r',\s*\]$', ']', clean_json)
-            else:
-                clean_json = features_json
-            
-            features = json.loads(clean_json)
-            
-            logger.info(f"Extracted {len(features)} facilities from JSON data")
-            return features
-            
-        except (json.JSONDecodeError, AttributeError) as e:
-            logger.error(f"Error parsing JSON data: {e}")
-            # Try a simpler approach - look for individual feature objects
-            try:
-                feature_pattern = r'\{"type":"Feature".*?\}(?=,\{"type":"Feature"|\])'
-                features = []
-                for match in re.finditer(feature_pattern, html_content, re.DOTALL):
-                    try:
-                        feature = json.loads(match.group(0))
-                        features.append(feature)
-                    except json.JSONDecodeError:
-                        continue
-                
-                logger.info(f"Extracted {len(features)} facilities using fallback method")
-                return features
-                
-            except Exception as e2:
-                logger.error(f"Fallback parsing also failed: {e2}")
-                return []
+        # The geofield map settings hold a "features" array of GeoJSON points;
+        # decode it item by item so a truncated page still yields every complete feature
+        features = embedded_json.find_json_items(html_content, '"features":')
+        if not features:
+            logger.error("Could not find facilities JSON data in page")
+            return []
+        
+        logger.info(f"Extracted {len(features)} facilities from JSON data")
+        return features
     
     def filter_state_facilities(self, facilities_data: List[Dict]) -> List[Dict]:
         """
         Filter facilities to include only state prisons, excluding county jails.
         
+        A facility listed again under the same title (up to case, punctuation
+        and abbreviations) is kept once, so its detail page is only fetched once.
+        
         Args:
             facilities_data: List of all facility data
             
@@ -136,6 +93,7 @@ class GeorgiaScraper:
             List of state facility data only
         """
         state_facilities = []
+        seen_titles = set()
         
         # Keywords that indicate state facilities vs county jails
         state_keywords = [
@@ -167,6 +125,11 @@ class GeorgiaScraper:
                 
                 # Include if it matches state facility keywords or doesn't contain "county"
                 if any(keyword in title for keyword in state_keywords) or 'county' not in title:
+                    normalized_title = name_index.normalize_name(title)
+                    if normalized_title in seen_titles:
+                        logger.info(f"Skipping duplicate listing {title!r}")
+                        continue
+                    seen_titles.add(normalized_title)
                     state_facilities.append(facility)
                     
             except Exception as e:
@@ -176,6 +139,8 @@ class GeorgiaScraper:
         logger.info(f"Filtered to {len(state_facilities)} state facilities from {len(facilities_data)} total")
         return state_facilities
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def process_facility(self, facility_data: Dict) -> Optional[Dict]:
         """
         Process a single facility's data into our standard format.
@@ -252,7 +217,7 @@ class GeorgiaScraper:
             response = self.session.get(facility_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             details = {}
             
             # Extract address information
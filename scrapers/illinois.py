@@ -6,12 +6,16 @@ import requests
 import pandas as pd
 import re
 import json
-import time
 import os
 from bs4 import BeautifulSoup
-from bs4 import NavigableString
+from bs4 import NavigableString, SoupStrainer
 from urllib.parse import urljoin
 
+from . import checkpoint, parsing, stages
+
+# Facility pages hold their data in content-fragment <article>s
+DETAIL_STRAINER = SoupStrainer('article')
+
 
 class IllinoisScraper:
     """Scraper for Illinois Department of Corrections (IDOC) facilities."""
@@ -170,6 +174,8 @@ class IllinoisScraper:
         
         return data
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_facility_list(self):
         """Get the list of Illinois facilities from the list page.
 
@@ -184,7 +190,7 @@ class IllinoisScraper:
             response = requests.get(self.facilities_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             facilities = []
             seen_urls = set()
@@ -426,13 +432,16 @@ class IllinoisScraper:
         
         return parsed_data
 
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, facility_url, expected_name=None):
         """Scrape detailed information from individual facility page"""
         try:
             response = requests.get(facility_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Only the content-fragment articles are read, so skip building the rest of the page
+            soup = parsing.make_soup(response.content, parse_only=DETAIL_STRAINER)
             
             # Find content fragments - facilities are embedded as articles with data attributes
             all_articles = soup.find_all('article')
@@ -545,6 +554,8 @@ class IllinoisScraper:
             print(f"  Error scraping facility details from {facility_url}: {e}")
             return {}
 
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, address_components):
         """Geocode facility address using multiple services"""
         if not address_components.get('street_address') or not address_components.get('city'):
@@ -580,7 +591,6 @@ class IllinoisScraper:
                 if data['status'] == 'OK' and data['results']:
                     location = data['results'][0]['geometry']['location']
                     print(f"  ✓ Geocoded with Google Maps: {full_address}")
-                    time.sleep(0.1)  # Rate limiting
                     return location['lat'], location['lng']
                     
             except Exception as e:
@@ -604,7 +614,6 @@ class IllinoisScraper:
             
             if data:
                 print(f"  ✓ Geocoded with Nominatim: {full_address}")
-                time.sleep(1)  # Rate limiting for free service
                 return float(data[0]['lat']), float(data[0]['lon'])
                 
         except Exception as e:
@@ -625,7 +634,6 @@ class IllinoisScraper:
             if data.get('features'):
                 coords = data['features'][0]['geometry']['coordinates']
                 print(f"  ✓ Geocoded with Photon: {full_address}")
-                time.sleep(1)  # Rate limiting
                 return coords[1], coords[0]  # Photon returns [lon, lat]
                 
         except Exception as e:
@@ -683,9 +691,6 @@ class IllinoisScraper:
             
             all_facilities.append(facility_data)
             
-            # Rate limiting
-            time.sleep(1)
-        
         df = pd.DataFrame(all_facilities)
         
         # Validate coordinates are within Illinois bounds
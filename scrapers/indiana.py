@@ -5,7 +5,8 @@ import re
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, parsing, pipeline, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -45,33 +46,26 @@ class IndianaScraper:
         
         logger.info(f"Found {len(facility_urls)} facility URLs")
         
-        # Process each facility
-        facilities = []
-        for i, (name, url, security_level, gender) in enumerate(facility_urls, 1):
-            try:
-                logger.info(f"Processing facility {i}/{len(facility_urls)}: {name}")
-                
-                facility = self.scrape_facility_details(name, url, security_level, gender)
-                if facility:
-                    facilities.append(facility)
-                
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.error(f"Error processing {name}: {e}")
-                continue
+        # Fetch detail pages while earlier facilities are being geocoded
+        facilities = pipeline.fetch_and_geocode(
+            facility_urls,
+            fetch=lambda item: self.scrape_facility_details(*item),
+            geocode=self.geocode_address,
+            describe=lambda item: item[0],
+        )
         
         logger.info(f"Successfully processed {len(facilities)} facilities")
         return facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facility_urls(self) -> List[Tuple[str, str, str, str]]:
         """Extract facility URLs and basic info from the main directory."""
         try:
             response = self.session.get(self.facilities_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facility_urls = []
             
             # Find Adult Male section
@@ -151,13 +145,15 @@ class IndianaScraper:
         else:
             return 'Unknown'
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, name: str, url: str, security_level: str, gender: str) -> Optional[Dict]:
         """Scrape detailed information from individual facility page."""
         try:
             response = self.session.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             facility = {
                 'name': name,
@@ -175,11 +171,6 @@ class IndianaScraper:
             location_info = self.extract_location_info(soup)
             facility.update(location_info)
             
-            # Try to geocode the address
-            if facility.get('street_address') and facility.get('city'):
-                coordinates = self.geocode_address(facility)
-                facility.update(coordinates)
-            
             return facility
             
         except Exception as e:
@@ -353,6 +344,8 @@ class IndianaScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Dict:
         """Geocode facility address to get coordinates."""
         coordinates = {}
@@ -393,13 +386,11 @@ class IndianaScraper:
             return coords
         
         # Fallback to Nominatim
-        time.sleep(1)  # Rate limiting for free service
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
         
         # Fallback to Photon
-        time.sleep(1)  # Rate limiting
         coords = self.geocode_photon(address)
         if coords:
             return coords
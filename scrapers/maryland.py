@@ -5,9 +5,11 @@ import re
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
 import urllib3
 
+from . import checkpoint, parsing, pipeline, stages
+from .extractors import Field, LabelExtractor
+
 # Suppress SSL warnings for sites with certificate issues
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -15,6 +17,12 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Labelled fields in the contact box; values may sit on the line after the label
+FACILITY_DETAILS = LabelExtractor({
+    'Security Level': Field('security_level'),
+    'Year Opened': Field('year_opened', r'\d{4}', int),
+}, separator=r'[:\s]*', flags=re.IGNORECASE)
+
 class MarylandScraper:
     """Scraper for Maryland Department of Public Safety and Correctional Services facilities."""
     
@@ -49,33 +57,26 @@ class MarylandScraper:
         
         logger.info(f"Found {len(facility_urls)} facility URLs")
         
-        # Process each facility
-        facilities = []
-        for i, (name, url) in enumerate(facility_urls, 1):
-            try:
-                logger.info(f"Processing facility {i}/{len(facility_urls)}: {name}")
-                
-                facility = self.scrape_facility_details(name, url)
-                if facility:
-                    facilities.append(facility)
-                
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.error(f"Error processing {name}: {e}")
-                continue
+        # Fetch detail pages while earlier facilities are being geocoded
+        facilities = pipeline.fetch_and_geocode(
+            facility_urls,
+            fetch=lambda item: self.scrape_facility_details(*item),
+            geocode=self.geocode_address,
+            describe=lambda item: item[0],
+        )
         
         logger.info(f"Successfully processed {len(facilities)} facilities")
         return facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facility_urls(self) -> List[Tuple[str, str]]:
         """Extract facility URLs from the main directory."""
         try:
             response = self.session.get(self.facilities_url, verify=False)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facility_urls = []
             
             # Find the sectionNavGroup3 div that contains the facility links
@@ -101,13 +102,15 @@ class MarylandScraper:
             logger.error(f"Error getting facility URLs: {e}")
             return []
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, name: str, url: str) -> Optional[Dict]:
         """Scrape detailed information from individual facility page."""
         try:
             response = self.session.get(url, verify=False)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             facility = {
                 'name': name,
@@ -123,11 +126,6 @@ class MarylandScraper:
             contact_info = self.extract_contact_info(soup)
             facility.update(contact_info)
             
-            # Try to geocode the address
-            if facility.get('street_address') and facility.get('city'):
-                coordinates = self.geocode_address(facility)
-                facility.update(coordinates)
-            
             return facility
             
         except Exception as e:
@@ -267,19 +265,8 @@ class MarylandScraper:
         facility_details = {}
         
         try:
-            # Extract security level
-            security_match = re.search(r'Security\s+Level[:\s]*\n*([^\n]+)', text, re.IGNORECASE | re.MULTILINE)
-            if security_match:
-                security_level = security_match.group(1).strip()
-                if security_level:
-                    facility_details['security_level'] = security_level
-            
-            # Extract year opened
-            year_match = re.search(r'Year\s+Opened[:\s]*\n*(\d{4})', text, re.IGNORECASE | re.MULTILINE)
-            if year_match:
-                year_opened = year_match.group(1).strip()
-                if year_opened:
-                    facility_details['year_opened'] = int(year_opened)
+            # Security level and year opened in one scan
+            facility_details.update(FACILITY_DETAILS.extract(text))
                     
         except Exception as e:
             logger.warning(f"Error extracting facility details: {e}")
@@ -305,6 +292,8 @@ class MarylandScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Dict:
         """Geocode facility address to get coordinates."""
         coordinates = {}
@@ -345,13 +334,11 @@ class MarylandScraper:
             return coords
         
         # Fallback to Nominatim
-        time.sleep(1)  # Rate limiting for free service
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
         
         # Fallback to Photon
-        time.sleep(1)  # Rate limiting
         coords = self.geocode_photon(address)
         if coords:
             return coords
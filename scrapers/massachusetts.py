@@ -2,12 +2,13 @@
 
 import requests
 import re
-import json
 import os
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, embedded_json, parsing, proxy, stages
+from .concurrency import ContextThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +22,7 @@ class MassachusettsScraper:
         self.facilities_url = "https://www.mass.gov/orgs/massachusetts-department-of-correction/locations"
         self.session = requests.Session()
         self.scrape_proxy_key = os.getenv('SCRAPE_PROXY_KEY')
+        self.proxy = proxy.ProxyClient(self.scrape_proxy_key) if self.scrape_proxy_key else None
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -54,46 +56,42 @@ class MassachusettsScraper:
         
         logger.info(f"Found {len(facilities)} facilities from map data")
         
-        # Enhance facilities with additional data from individual pages
-        enhanced_facilities = []
-        for i, facility in enumerate(facilities, 1):
-            try:
-                logger.info(f"Processing facility {i}/{len(facilities)}: {facility['name']}")
-                
-                # Enhance with individual page data if available
-                if facility.get('detail_url'):
-                    enhanced_data = self.get_facility_details(facility['detail_url'])
-                    facility.update(enhanced_data)
-                
-                enhanced_facilities.append(facility)
-                
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.error(f"Error processing {facility.get('name', 'Unknown')}: {e}")
-                enhanced_facilities.append(facility)  # Add anyway
-                continue
+        # Enhance facilities with additional data from individual pages,
+        # as many at once as the proxy plan allows
+        workers = self.proxy.concurrency if self.proxy else 1
+        with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix='details') as executor:
+            enhanced_facilities = list(executor.map(self.enhance_facility, facilities))
+        
+        if self.proxy:
+            self.proxy.log_summary()
         
         logger.info(f"Successfully processed {len(enhanced_facilities)} facilities")
         return enhanced_facilities
     
+    def enhance_facility(self, facility: Dict) -> Dict:
+        """Add details from the facility's own page, if it has one."""
+        try:
+            logger.info(f"Processing facility: {facility['name']}")
+            
+            # Enhance with individual page data if available
+            if facility.get('detail_url'):
+                enhanced_data = self.get_facility_details(facility['detail_url'])
+                facility.update(enhanced_data)
+            
+        except Exception as e:
+            logger.error(f"Error processing {facility.get('name', 'Unknown')}: {e}")
+        
+        return facility  # Add anyway
+    
     def make_proxy_request(self, url: str) -> requests.Response:
-        """Make a request through ScrapeOps proxy."""
-        if not self.scrape_proxy_key:
+        """Make a request through ScrapeOps proxy (cached and budgeted, see scrapers/proxy.py)."""
+        if not self.proxy:
             raise ValueError("SCRAPE_PROXY_KEY environment variable not set")
         
-        response = requests.get(
-            url='https://proxy.scrapeops.io/v1/',
-            params={
-                'api_key': self.scrape_proxy_key,
-                'url': url,
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        return response
+        return self.proxy.get(url)
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facilities_from_map_data(self) -> List[Dict]:
         """Extract facility information from the embedded Leaflet map data."""
         try:
@@ -102,20 +100,13 @@ class MassachusettsScraper:
                 logger.info("Using ScrapeOps proxy to access Massachusetts DOC website...")
                 try:
                     response = self.make_proxy_request(self.facilities_url)
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Find the script tag containing the Leaflet map data
-                    script_tags = soup.find_all('script')
                     
-                    for script in script_tags:
-                        if script.string and 'ma.leafletMapData' in script.string:
-                            # Extract the JSON data from the JavaScript
-                            map_data = self.extract_leaflet_data(script.string)
-                            if map_data:
-                                facilities = self.parse_leaflet_markers(map_data)
-                                logger.info(f"Successfully extracted {len(facilities)} facilities from live website")
-                                return facilities
-                            break
+                    # The Leaflet map data is pushed from an inline script
+                    map_data = self.extract_leaflet_data(response.text)
+                    if map_data:
+                        facilities = self.parse_leaflet_markers(map_data)
+                        logger.info(f"Successfully extracted {len(facilities)} facilities from live website")
+                        return facilities
                     
                     logger.warning("Could not find Leaflet map data in website response")
                     
@@ -203,15 +194,11 @@ class MassachusettsScraper:
             return []
     
     def extract_leaflet_data(self, script_content: str) -> Optional[Dict]:
-        """Extract Leaflet map data from JavaScript content."""
+        """Extract Leaflet map data from the page HTML or a script's JavaScript."""
         try:
-            # Find the JSON data in the JavaScript
-            # Look for ma.leafletMapData.push({...})
-            match = re.search(r'ma\.leafletMapData\.push\(({.*?})\);', script_content, re.DOTALL)
-            if match:
-                json_str = match.group(1)
-                # Parse the JSON
-                map_data = json.loads(json_str)
+            # Decode the object passed to ma.leafletMapData.push({...})
+            map_data = embedded_json.find_json(script_content, 'ma.leafletMapData.push(')
+            if isinstance(map_data, dict):
                 return map_data
                 
         except Exception as e:
@@ -353,6 +340,8 @@ class MassachusettsScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def get_facility_details(self, detail_url: str) -> Dict:
         """Get additional facility details from individual facility page."""
         details = {}
@@ -369,7 +358,7 @@ class MassachusettsScraper:
                 response = self.session.get(detail_url)
                 response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Extract facility description/details
             description_info = self.extract_description_info(soup)
@@ -2,15 +2,52 @@
 
 import requests
 import re
-from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+from bs4 import SoupStrainer, Tag
+
+from . import checkpoint, parsing, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Detail pages are searched as text; the <head> (scripts, styles, metadata) is never read
+DETAIL_STRAINER = SoupStrainer('body')
+
+# Text node that labels the facility info block ("Warden Jane Doe", "Acting Superintendent ...")
+INFO_ANCHOR = re.compile(r'^\s*(?:Acting\s+)?(?:Warden|Superintendent)\b', re.IGNORECASE)
+# Block-level elements that can hold the whole info block
+CONTAINER_TAGS = {'div', 'section', 'article', 'td', 'li'}
+
+# The info block starts at a "... County" or warden line and runs to the next heading
+SECTION_START = re.compile(r'^[ \t]*(?:[A-Za-z][A-Za-z .\'-]*\bCounty\b|(?:Acting\s+)?(?:Warden|Superintendent)\b)',
+                           re.IGNORECASE | re.MULTILINE)
+SECTION_END = re.compile(r'^[ \t]*(?:General|Programming|Security)', re.IGNORECASE | re.MULTILINE)
+SECTION_HINT = re.compile(r'county|warden|superintendent', re.IGNORECASE)
+
+COUNTY = re.compile(r'^[ \t]*([A-Za-z][A-Za-z .\'-]*County)\b', re.MULTILINE)
+WARDEN_PATTERNS = [
+    re.compile(r'(?:Acting\s+)?Warden\s+([^\n]+)', re.IGNORECASE),
+    re.compile(r'(?:Acting\s+)?Superintendent\s+([^\n]+)', re.IGNORECASE),
+]
+PHONE_PATTERNS = [
+    re.compile(r'Telephone:\s*(\d{3}-\d{3}-\d{4})'),
+    re.compile(r'Phone:\s*(\d{3}-\d{3}-\d{4})'),
+    re.compile(r'(\d{3}-\d{3}-\d{4})'),
+]
+OPENED = re.compile(r'Open:\s*(\d{4})')
+GENDER_AGE = re.compile(r'Gender/Age Limit:\s*([^\n]+)')
+SECURITY_LEVEL = re.compile(r'Security Level:\s*([^\n]+)')
+CAPACITY_PATTERNS = [
+    re.compile(r'capacity[:\s]+(\d+)', re.IGNORECASE),
+    re.compile(r'houses?\s+(?:up\s+to\s+)?(\d+)\s+(?:inmates?|prisoners?)', re.IGNORECASE),
+    re.compile(r'(\d+)[-\s]bed', re.IGNORECASE),
+]
+STREET_ADDRESS = re.compile(r'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln|Way|Court|Ct|Highway|Hwy|Park|Industrial)',
+                            re.IGNORECASE)
+CITY_STATE_ZIP = re.compile(r'([^,]+),\s*MI\s+(\d{5})')
+
 class MichiganScraper:
     """Scraper for Michigan Department of Corrections facilities."""
     
@@ -53,9 +90,6 @@ class MichiganScraper:
                 if facility_data:
                     facilities.append(facility_data)
                 
-                # Rate limiting - be respectful
-                time.sleep(0.5)
-                
             except Exception as e:
                 logger.error(f"Error scraping {name}: {e}")
                 continue
@@ -63,13 +97,15 @@ class MichiganScraper:
         logger.info(f"Successfully processed {len(facilities)} facilities")
         return facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facility_urls(self) -> List[Tuple[str, str]]:
         """Get list of facility names and URLs from the directory page."""
         try:
             response = self.session.get(self.prisons_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Find all facility links
             facility_links = soup.find_all('a', href=True)
@@ -129,13 +165,15 @@ class MichiganScraper:
         
         return name.strip()
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, name: str, url: str) -> Optional[Dict]:
         """Scrape detailed information from individual facility page."""
         try:
             response = self.session.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content, parse_only=DETAIL_STRAINER)
             
             # Initialize facility data
             facility = {
@@ -145,17 +183,17 @@ class MichiganScraper:
                 'facility_url': url
             }
             
-            # Get all text content for parsing
-            all_text = soup.get_text()
-            
-            # Find the facility information section (usually starts with county name)
-            facility_section = self.extract_facility_section(all_text, name)
+            # Find the facility information section in its container (whole page as a fallback)
+            container = self.find_info_container(soup)
+            facility_section = self.extract_facility_section((container or soup).get_text(), name)
+            if not facility_section and container is not None:
+                facility_section = self.extract_facility_section(soup.get_text(), name)
             if not facility_section:
                 logger.warning(f"No facility section found for {name}")
                 return facility
             
             # Extract county information
-            county_match = re.search(r'([A-Za-z\s]+County)', facility_section)
+            county_match = COUNTY.search(facility_section)
             if county_match:
                 county_name = county_match.group(1).strip()
                 # Clean up county name
@@ -163,13 +201,8 @@ class MichiganScraper:
                     facility['county'] = county_name
             
             # Extract warden information
-            warden_patterns = [
-                r'(?:Acting\s+)?Warden\s+([^\n]+)',
-                r'(?:Acting\s+)?Superintendent\s+([^\n]+)'
-            ]
-            
-            for pattern in warden_patterns:
-                match = re.search(pattern, facility_section, re.IGNORECASE)
+            for pattern in WARDEN_PATTERNS:
+                match = pattern.search(facility_section)
                 if match:
                     warden_name = match.group(1).strip()
                     # Clean up common artifacts
@@ -182,25 +215,19 @@ class MichiganScraper:
             facility.update(address_info)
             
             # Extract phone number
-            phone_patterns = [
-                r'Telephone:\s*(\d{3}-\d{3}-\d{4})',
-                r'Phone:\s*(\d{3}-\d{3}-\d{4})',
-                r'(\d{3}-\d{3}-\d{4})'
-            ]
-            
-            for pattern in phone_patterns:
-                match = re.search(pattern, facility_section)
+            for pattern in PHONE_PATTERNS:
+                match = pattern.search(facility_section)
                 if match:
                     facility['phone'] = match.group(1)
                     break
             
             # Extract opening year
-            opened_match = re.search(r'Open:\s*(\d{4})', facility_section)
+            opened_match = OPENED.search(facility_section)
             if opened_match:
                 facility['opened'] = int(opened_match.group(1))
             
             # Extract gender and age information
-            gender_match = re.search(r'Gender/Age Limit:\s*([^\n]+)', facility_section)
+            gender_match = GENDER_AGE.search(facility_section)
             if gender_match:
                 gender_info = gender_match.group(1).strip()
                 facility['gender_age_limit'] = gender_info
@@ -212,19 +239,13 @@ class MichiganScraper:
                     facility['gender'] = 'Female'
             
             # Extract security level
-            security_match = re.search(r'Security Level:\s*([^\n]+)', facility_section)
+            security_match = SECURITY_LEVEL.search(facility_section)
             if security_match:
                 facility['security_level'] = security_match.group(1).strip()
             
             # Extract capacity if available
-            capacity_patterns = [
-                r'capacity[:\s]+(\d+)',
-                r'houses?\s+(?:up\s+to\s+)?(\d+)\s+(?:inmates?|prisoners?)',
-                r'(\d+)[-\s]bed'
-            ]
-            
-            for pattern in capacity_patterns:
-                match = re.search(pattern, facility_section, re.IGNORECASE)
+            for pattern in CAPACITY_PATTERNS:
+                match = pattern.search(facility_section)
                 if match:
                     facility['capacity'] = int(match.group(1))
                     break
@@ -241,39 +262,43 @@ class MichiganScraper:
             logger.error(f"Error scraping facility details for {name}: {e}")
             return None
     
-    def extract_facility_section(self, all_text: str, facility_name: str) -> str:
-        """Extract the facility information section from the full page text."""
+    def find_info_container(self, soup) -> Optional[Tag]:
+        """
+        Find the element that holds the facility info block.
+        
+        The block is labelled by its warden line, so the container is the
+        nearest block-level ancestor of that text.
+        """
+        anchor = soup.find(string=INFO_ANCHOR)
+        if anchor is None:
+            return None
+        for parent in anchor.parents:
+            if parent.name in CONTAINER_TAGS:
+                return parent
+        return None
+    
+    def extract_facility_section(self, text: str, facility_name: str) -> str:
+        """Extract the facility information section from the container (or page) text."""
         try:
-            # Look for the section that contains facility details
-            # Usually starts with county name and contains warden info
-            
-            # Find patterns that indicate the start of facility info
-            patterns = [
-                r'([A-Za-z\s]+County.*?)(?=General|Programming|Security|\Z)',
-                r'((?:Acting\s+)?Warden\s+[^\n]+.*?)(?=General|Programming|Security|\Z)',
-                r'(\w+\s+County.*?)(?=General|Programming|Security|\Z)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, all_text, re.DOTALL | re.IGNORECASE)
-                if match:
-                    section = match.group(1).strip()
-                    # Make sure this section contains relevant info
-                    if any(keyword in section.lower() for keyword in ['warden', 'superintendent', 'county', 'drive', 'street', 'road']):
-                        return section
-            
-            # Fallback: look for any section with address-like content
-            lines = all_text.split('\n')
+            # The section starts on a county or warden line and ends at the next heading line
+            start = SECTION_START.search(text)
+            if start:
+                end = SECTION_END.search(text, start.end())
+                section = text[start.start():end.start() if end else len(text)].strip()
+                if section:
+                    return section
+            
+            # Fallback: take a few lines after the first one mentioning county or warden
             facility_lines = []
             found_start = False
             
-            for line in lines:
+            for line in text.split('\n'):
                 line = line.strip()
                 if not line:
                     continue
                 
                 # Look for county or warden as start indicators
-                if re.search(r'(?:county|warden|superintendent)', line, re.IGNORECASE):
+                if SECTION_HINT.search(line):
                     found_start = True
                     facility_lines.append(line)
                 elif found_start:
@@ -303,13 +328,13 @@ class MichiganScraper:
                 line = line.strip()
                 
                 # Look for street address patterns
-                if re.search(r'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln|Way|Court|Ct|Highway|Hwy|Park|Industrial)', line, re.IGNORECASE):
+                if STREET_ADDRESS.search(line):
                     address_info['street_address'] = line
                     
                     # Check next line for city, state, zip
                     if i + 1 < len(lines):
                         next_line = lines[i + 1].strip()
-                        city_match = re.match(r'([^,]+),\s*MI\s+(\d{5})', next_line)
+                        city_match = CITY_STATE_ZIP.match(next_line)
                         if city_match:
                             address_info['city'] = city_match.group(1).strip()
                             address_info['zip_code'] = city_match.group(2)
@@ -385,6 +410,8 @@ class MichiganScraper:
         
         return address_info
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Optional[Tuple[float, float]]:
         """Geocode facility address to get coordinates."""
         try:
@@ -429,13 +456,11 @@ class MichiganScraper:
             coords = self.geocode_google(address, google_api_key)
             if coords:
                 return coords
-            time.sleep(0.1)  # Rate limiting
         
         # Try Nominatim (OpenStreetMap)
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
-        time.sleep(1)  # Rate limiting for free service
         
         # Try Photon (another free service)
         coords = self.geocode_photon(address)
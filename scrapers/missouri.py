@@ -5,12 +5,16 @@ import re
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, pagination, parsing, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pager link to the following page
+NEXT_LINK = re.compile(r'››|Next')
+
 class MissouriScraper:
     """Scraper for Missouri Department of Corrections facilities."""
     
@@ -64,9 +68,6 @@ class MissouriScraper:
                 if facility:
                     facilities.append(facility)
                 
-                # Rate limiting - be respectful
-                time.sleep(0.2)
-                
             except Exception as e:
                 logger.error(f"Error processing {facility_data.get('name', 'Unknown')}: {e}")
                 continue
@@ -74,6 +75,8 @@ class MissouriScraper:
         logger.info(f"Successfully processed {len(facilities)} facilities")
         return facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_warden_data(self) -> Dict[str, Dict]:
         """Get warden information from the warden listing page."""
         warden_data = {}
@@ -82,7 +85,7 @@ class MissouriScraper:
             response = self.session.get(self.warden_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Find the table with warden information
             table = soup.find('table', class_='table')
@@ -114,41 +117,25 @@ class MissouriScraper:
         
         return warden_data
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_all_facilities(self) -> List[Dict]:
         """Get all facilities from all pages."""
-        all_facilities = []
-        page = 0
-        
-        while True:
-            try:
-                logger.info(f"Fetching page {page}")
-                url = f"{self.facilities_url}?page={page}"
-                response = self.session.get(url)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                facilities = self.parse_facilities_page(soup)
-                
-                if not facilities:
-                    logger.info(f"No facilities found on page {page}, stopping")
-                    break
-                
-                all_facilities.extend(facilities)
-                logger.info(f"Found {len(facilities)} facilities on page {page}")
-                
-                # Check if there's a next page
-                if not self.has_next_page(soup):
-                    logger.info("No more pages found")
-                    break
-                
-                page += 1
-                time.sleep(0.5)  # Rate limiting between pages
-                
-            except Exception as e:
-                logger.error(f"Error fetching page {page}: {e}")
-                break
+        # The page count is not shown, so pages are prefetched in a window until
+        # one is empty or has no next link
+        return pagination.paginate(self.fetch_facilities_page, first=0)
+    
+    def fetch_facilities_page(self, page: int) -> pagination.Page:
+        """Fetch and parse one page of the facility listing."""
+        logger.info(f"Fetching page {page}")
+        url = f"{self.facilities_url}?page={page}"
+        response = self.session.get(url)
+        response.raise_for_status()
         
-        return all_facilities
+        soup = parsing.make_soup(response.content)
+        facilities = self.parse_facilities_page(soup)
+        logger.info(f"Found {len(facilities)} facilities on page {page}")
+        return pagination.Page(facilities, has_next=self.has_next_page(soup))
     
     def parse_facilities_page(self, soup: BeautifulSoup) -> List[Dict]:
         """Parse facilities from a single page."""
@@ -232,11 +219,13 @@ class MissouriScraper:
         """Check if there's a next page in pagination."""
         try:
             # Look for next page link
-            next_link = soup.find('a', string=re.compile(r'››|Next'))
+            next_link = soup.find('a', string=NEXT_LINK)
             return next_link is not None
         except:
             return False
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def process_facility(self, facility_data: Dict, warden_data: Dict[str, Dict]) -> Optional[Dict]:
         """Process a single facility with warden data and geocoding."""
         try:
@@ -278,6 +267,8 @@ class MissouriScraper:
         else:
             return 'Correctional Institution'
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Dict:
         """Geocode facility address to get coordinates."""
         coordinates = {}
@@ -318,13 +309,11 @@ class MissouriScraper:
             return coords
         
         # Fallback to Nominatim
-        time.sleep(1)  # Rate limiting for free service
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
         
         # Fallback to Photon
-        time.sleep(1)  # Rate limiting
         coords = self.geocode_photon(address)
         if coords:
             return coords
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Facility-name index for merging sources.
+
+Scrapers that combine several listings (a map and a table, a page and a
+dropdown) have to recognize the same facility under slightly different
+names: "Corrections Center" against "Correctional Complex", "Women's"
+against "Women’s" or "Womens", "Ctr" against "Center", a missing "(ACC)" suffix.
+``NameIndex`` normalizes names and looks them up exactly first, then by
+their distinctive words through an inverted index, so each lookup is a
+dictionary access however many names are indexed.
+
+Generic words ("correctional", "center", "state") are left out of the
+second comparison. The distinctive words, place and person names, must
+agree exactly and as often: one letter identifies a different facility
+("Bacon" and "Macon", "Clemens" and "Clements"), and so does an extra
+word ("... Center for Women", "... Work Center", "..., South Unit").
+Spelling mistakes in those words are therefore not matched.
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARENTHESIZED = re.compile(r'\([^)]*\)')
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+# Straight, curly and modifier-letter apostrophes, removed so "Men's" and "Men’s" agree
+APOSTROPHES = re.compile(r"['\u2018\u2019\u02bc]")
+
+# Abbreviations and spelling variants, applied per word after lowercasing
+SYNONYMS = {
+    'ctr': 'center',
+    'centre': 'center',
+    'cntr': 'center',
+    'corr': 'correctional',
+    'inst': 'institution',
+    'fac': 'facility',
+    'mt': 'mount',
+    'ft': 'fort',
+    'cc': 'correctional center',
+    'ci': 'correctional institution',
+}
+
+# Words that describe the kind of facility rather than which one it is
+GENERIC_TOKENS = frozenset({
+    'a', 'and', 'at', 'for', 'in', 'of', 'the',
+    'state', 'correction', 'correctional', 'center', 'facility', 'institution',
+    'prison', 'unit', 'complex', 'department',
+})
+
+# Marks a distinctive-words key shared by names that differ otherwise
+_AMBIGUOUS = object()
+
+
+def _stem(token: str) -> str:
+    # Plural and possessive forms: corrections -> correction, womens -> women
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(name: str) -> List[str]:
+    """Normalized words of a facility name, without parenthesized acronyms."""
+    text = APOSTROPHES.sub('', PARENTHESIZED.sub(' ', name.lower())).replace('&', ' and ')
+    tokens = []
+    for word in NON_ALNUM.sub(' ', text).split():
+        tokens.extend(_stem(part) for part in SYNONYMS.get(word, word).split())
+    return tokens
+
+
+def normalize_name(name: str) -> str:
+    """Canonical form of a facility name, used for exact matches."""
+    return ' '.join(tokenize(name))
+
+
+def distinctive_key(name: str) -> Tuple[str, ...]:
+    """
+    The words of a name that identify the facility, with repeats, in sorted order.
+
+    "South Florida Reception Center, South Unit" gives ('florida', 'reception',
+    'south', 'south'), which differs from the main center's key.
+    """
+    counts = Counter(token for token in tokenize(name) if token not in GENERIC_TOKENS)
+    return tuple(sorted(counts.elements()))
+
+
+class NameIndex:
+    """Facility names mapped to values, looked up by normalized name or distinctive words."""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, Any]] = []
+        self.exact: Dict[str, int] = {}
+        self.by_words: Dict[Tuple[str, ...], Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, name: str, value: Any):
+        """
+        Index a name. If the same normalized name is added twice, the first value is kept.
+
+        Args:
+            name: Facility name as the source spells it
+            value: What lookups of this name return, e.g. the facility or its position
+        """
+        entry_id = len(self.entries)
+        self.entries.append((name, value))
+        normalized = normalize_name(name)
+        if normalized in self.exact:
+            return
+        self.exact[normalized] = entry_id
+
+        key = distinctive_key(name)
+        if not key:
+            # "State Prison" alone names no particular facility
+            return
+        # Two different names with the same distinctive words identify neither
+        self.by_words[key] = _AMBIGUOUS if key in self.by_words else entry_id
+
+    def match(self, name: str) -> Optional[Tuple[str, Any]]:
+        """
+        Find the indexed name that refers to the same facility.
+
+        Args:
+            name: Facility name to look up
+
+        Returns:
+            (indexed name, value), or None
+        """
+        entry_id = self.exact.get(normalize_name(name))
+        if entry_id is None:
+            entry_id = self.by_words.get(distinctive_key(name))
+            if entry_id is None or entry_id is _AMBIGUOUS:
+                return None
+            logger.debug(f"Name match on distinctive words: {name!r} -> {self.entries[entry_id][0]!r}")
+        return self.entries[entry_id]
+
+    def find(self, name: str, default: Any = None) -> Any:
+        """Value for the indexed name matching ``name``, or ``default``."""
+        found = self.match(name)
+        return found[1] if found else default
+
+    def __contains__(self, name: str) -> bool:
+        return self.match(name) is not None
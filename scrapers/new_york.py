@@ -5,11 +5,14 @@ New York state prison data scraper for DOCCS facilities.
 import requests
 import pandas as pd
 import re
-import time
 import os
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from . import checkpoint, pagination, parsing, stages
+
+# Page number in DOCCS pager links (?page=4)
+PAGE_PARAM = re.compile(r'page=(\d+)')
+
 
 class NewYorkScraper:
     """Scraper for New York Department of Corrections and Community Supervision (DOCCS) facilities."""
@@ -28,87 +31,84 @@ class NewYorkScraper:
             response = requests.get(self.facilities_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for pagination links with page= parameter
-            page_links = soup.find_all('a', href=True)
-            page_numbers = []
-            
-            for link in page_links:
-                href = link.get('href', '')
-                if 'page=' in href:
-                    # Extract page number from URL like ?page=4
-                    import re
-                    match = re.search(r'page=(\d+)', href)
-                    if match:
-                        page_numbers.append(int(match.group(1)))
-            
-            if page_numbers:
-                # DOCCS uses 0-based pagination, so max page + 1 = total pages
-                max_page = max(page_numbers)
-                return max_page + 1
-            
-            # If no pagination found, assume single page
-            return 1
+            return self.parse_total_pages(parsing.make_soup(response.content))
             
         except Exception as e:
             print(f"Error determining total pages: {e}")
             return 1
 
+    def parse_total_pages(self, soup):
+        """Read the page count from the pager links of a facility list page"""
+        # Look for pagination links with page= parameter, like ?page=4
+        page_numbers = []
+        for link in soup.find_all('a', href=True):
+            match = PAGE_PARAM.search(link.get('href', ''))
+            if match:
+                page_numbers.append(int(match.group(1)))
+        
+        if page_numbers:
+            # DOCCS uses 0-based pagination, so max page + 1 = total pages
+            return max(page_numbers) + 1
+        
+        # If no pagination found, assume single page
+        return 1
+
+    def parse_facility_list(self, soup):
+        """Extract facility URLs from a facility list page"""
+        facility_urls = []
+        
+        # Find all facility rows
+        facility_rows = soup.find_all('div', class_='views-row')
+        
+        for row in facility_rows:
+            # Find the facility link
+            article = row.find('article')
+            if article:
+                # Get the facility URL from the about attribute or find the link
+                facility_path = article.get('about')
+                if not facility_path:
+                    # Try to find the link in the article
+                    link = article.find('a', href=True)
+                    if link:
+                        facility_path = link['href']
+                
+                if facility_path:
+                    facility_url = urljoin(self.base_url, facility_path)
+                    facility_urls.append(facility_url)
+        
+        return facility_urls
+
     def scrape_facility_list_page(self, page_num=1):
         """Scrape facility URLs from a single page"""
+        return self.fetch_facility_list_page(page_num).items
+
+    def fetch_facility_list_page(self, page_num):
+        """Fetch one facility list page with its facility URLs and page count"""
         try:
             url = f"{self.facilities_url}?page={page_num}"
             response = requests.get(url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            facility_urls = []
-            
-            # Find all facility rows
-            facility_rows = soup.find_all('div', class_='views-row')
-            
-            for row in facility_rows:
-                # Find the facility link
-                article = row.find('article')
-                if article:
-                    # Get the facility URL from the about attribute or find the link
-                    facility_path = article.get('about')
-                    if not facility_path:
-                        # Try to find the link in the article
-                        link = article.find('a', href=True)
-                        if link:
-                            facility_path = link['href']
-                    
-                    if facility_path:
-                        facility_url = urljoin(self.base_url, facility_path)
-                        facility_urls.append(facility_url)
+            soup = parsing.make_soup(response.content)
+            facility_urls = self.parse_facility_list(soup)
             
             print(f"Found {len(facility_urls)} facilities on page {page_num}")
-            return facility_urls
+            return pagination.Page(facility_urls, last=self.parse_total_pages(soup) - 1)
             
         except Exception as e:
             print(f"Error scraping page {page_num}: {e}")
-            return []
+            return pagination.Page([])
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_all_facility_urls(self):
         """Scrape facility URLs from all pages"""
         print("Discovering New York DOCCS facilities...")
         
-        total_pages = self.get_total_pages()
-        print(f"Found {total_pages} pages to scrape")
-        
-        all_facility_urls = []
-        
-        for page_num in range(0, total_pages):  # 0-based pagination
-            print(f"Scraping page {page_num+1}/{total_pages}...")
-            page_urls = self.scrape_facility_list_page(page_num)
-            all_facility_urls.extend(page_urls)
+        # Page 0 reports the page count; the remaining pages are fetched concurrently.
+        # A failed page is skipped rather than ending discovery.
+        all_facility_urls = pagination.paginate(self.fetch_facility_list_page, first=0, stop_on_empty=False)
             
-            # Rate limiting between pages
-            time.sleep(1)
-        
         print(f"Total facilities discovered: {len(all_facility_urls)}")
         return all_facility_urls
 
@@ -138,13 +138,15 @@ class NewYorkScraper:
             'country': country.get_text(strip=True) if country else None
         }
 
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, facility_url):
         """Scrape detailed information from a single facility page"""
         try:
             response = requests.get(facility_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             facility_data = {
                 'facility_url': facility_url,
@@ -230,6 +232,8 @@ class NewYorkScraper:
             print(f"Error scraping facility details from {facility_url}: {e}")
             return None
 
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, address_line1, address_line2, city, state, zip_code):
         """Geocode a New York facility address using multiple methods"""
         # Construct full address
@@ -383,13 +387,6 @@ class NewYorkScraper:
             latitudes.append(lat)
             longitudes.append(lng)
             
-            # Rate limiting - be respectful to the geocoding service
-            # Use shorter delay for Google API (higher rate limits)
-            if os.getenv('GOOGLE_MAPS_API_KEY'):
-                time.sleep(0.1)  # Google allows higher rate limits
-            else:
-                time.sleep(1)    # Be more conservative with free services
-        
         df['latitude'] = latitudes
         df['longitude'] = longitudes
         
@@ -426,9 +423,6 @@ class NewYorkScraper:
             else:
                 failed_urls.append(url)
             
-            # Rate limiting between requests
-            time.sleep(0.5)
-        
         if not facilities:
             print("No facility data was successfully scraped.")
             return pd.DataFrame()
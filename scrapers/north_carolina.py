@@ -4,14 +4,21 @@ import requests
 import csv
 import re
 from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 import io
+from bisect import bisect_right
+from itertools import accumulate
+
+from . import checkpoint, parsing, pipeline, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Placed before every facility name while splitting a county cell; never occurs in page text
+SECTION_MARKER = '\x00'
+
 class NorthCarolinaScraper:
     """Scraper for North Carolina Department of Adult Correction facilities."""
     
@@ -50,16 +57,19 @@ class NorthCarolinaScraper:
         facilities = self.parse_csv_facilities(csv_data)
         logger.info(f"Found {len(facilities)} facilities in CSV")
         
-        # Enhance with individual page data
-        enhanced_facilities = []
-        for facility in facilities:
-            enhanced = self.enhance_facility_data(facility)
-            if enhanced:
-                enhanced_facilities.append(enhanced)
+        # Enhance with individual page data while earlier facilities are being geocoded
+        enhanced_facilities = pipeline.fetch_and_geocode(
+            facilities,
+            fetch=self.enhance_facility_data,
+            geocode=self.geocode_address,
+            describe=lambda facility: facility.get('name', 'Unknown'),
+        )
         
         logger.info(f"Successfully processed {len(enhanced_facilities)} facilities")
         return enhanced_facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def fetch_csv_data(self) -> Optional[str]:
         """Fetch the CSV data from North Carolina's export endpoint."""
         try:
@@ -70,6 +80,7 @@ class NorthCarolinaScraper:
             logger.error(f"Error fetching CSV data: {e}")
             return None
     
+    @stages.stage(stages.DISCOVER)
     def parse_csv_facilities(self, csv_content: str) -> List[Dict]:
         """Parse facility data from the CSV content."""
         facilities = []
@@ -103,72 +114,77 @@ class NorthCarolinaScraper:
         facilities = []
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Replace all <br> tags with newlines first
-            for br in soup.find_all('br'):
-                br.replace_with('\n')
-            
-            # Get all text content from the entire HTML
-            full_html_text = soup.get_text()
+            soup = parsing.make_soup(html_content)
             
-            # Find all facility entries (marked by <strong> tags)
-            facility_blocks = soup.find_all('strong')
-            
-            for block in facility_blocks:
-                facility_name = block.get_text().strip()
-                if not facility_name:
-                    continue
-                
-                # For each facility, extract the text that follows it
-                # Split the full text and find the section for this facility
-                facility_section = self.extract_facility_section(full_html_text, facility_name)
-                
-                if facility_section:
-                    lines = [line.strip() for line in facility_section.split('\n') if line.strip()]
-                    
-                    # Parse facility details
-                    facility_info = self.parse_facility_details(facility_name, lines, county, url_path, color)
-                    if facility_info:
-                        facilities.append(facility_info)
+            for facility_name, lines in self.segment_facilities(soup):
+                # Parse facility details
+                facility_info = self.parse_facility_details(facility_name, lines, county, url_path, color)
+                if facility_info:
+                    facilities.append(facility_info)
         
         except Exception as e:
             logger.error(f"Error parsing facility HTML: {e}")
         
         return facilities
     
-    def extract_facility_section(self, full_text: str, facility_name: str) -> str:
-        """Extract the text section for a specific facility."""
-        try:
-            # Find the facility name in the text
-            start_pos = full_text.find(facility_name)
-            if start_pos == -1:
-                return ""
-            
-            # Find the end of this facility's section (next facility name or end of text)
-            # Look for the next facility name (another line starting with capital letters)
-            lines = full_text[start_pos:].split('\n')
-            facility_lines = [lines[0]]  # Include the facility name line
-            
-            for i, line in enumerate(lines[1:], 1):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Stop if we hit another facility name (starts with capital and doesn't look like address/info)
-                if (line[0].isupper() and 
-                    'correctional' in line.lower() and 
-                    line != facility_name and
-                    not any(keyword in line.lower() for keyword in ['custody', 'male', 'female', 'rd', 'street', 'ave', 'drive'])):
-                    break
-                
-                facility_lines.append(line)
-            
-            return '\n'.join(facility_lines)
+    def segment_facilities(self, soup: BeautifulSoup) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Split a county cell into one block of lines per facility.
+        
+        Each facility starts at its <strong> name and runs until the next line
+        that looks like another facility name. The cell text is built and
+        split into lines once, so the cost is linear in the cell size rather
+        than a rescan of the whole cell for every facility.
+        
+        Args:
+            soup: Parsed county cell (modified in place)
             
-        except Exception as e:
-            logger.warning(f"Error extracting facility section for {facility_name}: {e}")
-            return ""
+        Yields:
+            (facility name, stripped non-empty lines starting with the name)
+        """
+        # Newlines for <br> and a marker in front of every facility name
+        for br in soup.find_all('br'):
+            br.replace_with('\n')
+        blocks = soup.find_all('strong')
+        for block in blocks:
+            block.insert_before(SECTION_MARKER)
+        
+        # Offset of each facility name in the marker-free text
+        pieces = soup.get_text().split(SECTION_MARKER)
+        full_text = ''.join(pieces)
+        starts = list(accumulate(len(piece) for piece in pieces[:-1]))
+        
+        lines = full_text.split('\n')
+        line_starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+        stripped = [line.strip() for line in lines]
+        
+        # Index of the next line that looks like another facility name, for every line
+        next_name = [len(lines)] * (len(lines) + 1)
+        for i in range(len(lines) - 1, -1, -1):
+            next_name[i] = i if self.is_facility_name_line(stripped[i]) else next_name[i + 1]
+        
+        for block, start in zip(blocks, starts):
+            text = block.get_text()
+            facility_name = text.strip()
+            if not facility_name:
+                continue
+            start += len(text) - len(text.lstrip())
+            
+            first = bisect_right(line_starts, start) - 1
+            end = next_name[first + 1]
+            while end < len(lines) and stripped[end] == facility_name:
+                end = next_name[end + 1]
+            
+            section = [lines[first][start - line_starts[first]:].strip()] + stripped[first + 1:end]
+            yield facility_name, [line for line in section if line]
+    
+    def is_facility_name_line(self, line: str) -> bool:
+        """True for a stripped line that starts a new facility (capitalized, 'correctional', not address/info)."""
+        if not line or not line[0].isupper():
+            return False
+        line_lower = line.lower()
+        return ('correctional' in line_lower and
+                not any(keyword in line_lower for keyword in ['custody', 'male', 'female', 'rd', 'street', 'ave', 'drive']))
     
     def parse_facility_details(self, name: str, lines: List[str], county: str, url_path: str, color: str) -> Optional[Dict]:
         """Parse individual facility details from text lines."""
@@ -242,6 +258,8 @@ class NorthCarolinaScraper:
                 return True
         return False
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def enhance_facility_data(self, facility: Dict) -> Optional[Dict]:
         """Enhance facility data by scraping individual facility pages."""
         try:
@@ -256,18 +274,12 @@ class NorthCarolinaScraper:
             response = self.session.get(facility_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Extract additional details from facility page
             enhanced_data = self.extract_facility_page_data(soup)
             facility.update(enhanced_data)
             
-            # Geocode the address if we have one
-            if facility.get('street_address') and facility.get('city'):
-                coords = self.geocode_address(facility)
-                if coords:
-                    facility['latitude'], facility['longitude'] = coords
-            
             return facility
             
         except Exception as e:
@@ -333,6 +345,8 @@ class NorthCarolinaScraper:
         
         return data
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Optional[Tuple[float, float]]:
         """Geocode facility address to get coordinates."""
         try:
@@ -373,7 +387,6 @@ class NorthCarolinaScraper:
     
     def try_geocoding_services(self, address: str) -> Optional[Tuple[float, float]]:
         """Try multiple geocoding services to get coordinates."""
-        import time
         import os
         
         # Try Google Maps API if available
@@ -382,13 +395,11 @@ class NorthCarolinaScraper:
             coords = self.geocode_google(address, google_api_key)
             if coords:
                 return coords
-            time.sleep(0.1)  # Rate limiting
         
         # Try Nominatim (OpenStreetMap)
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
-        time.sleep(1)  # Rate limiting for free service
         
         # Try Photon (another free service)
         coords = self.geocode_photon(address)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Concurrent retrieval of paginated listings.
+
+A listing is read through a ``fetch_page(n)`` callable that returns a
+``Page``. When the page count is known (given, or reported by the first
+page) every remaining page is requested at once. Otherwise a window of
+pages is fetched speculatively and refilled as pages come back. Results are
+consumed in page order, and the walk stops at the first empty page or the
+first page without a next link. Requests still queued at that point are
+cancelled, so a listing costs about one round trip instead of one per page.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .concurrency import DEFAULT_WORKERS, ContextThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pages requested ahead when the page count is unknown
+DEFAULT_WINDOW = 4
+
+
+class Page(NamedTuple):
+    """One page of a listing."""
+    items: List[Any]
+    # False when the page has no link to a following page
+    has_next: bool = True
+    # Index of the last page, if the page's pager shows it
+    last: Optional[int] = None
+
+
+def paginate(fetch_page: Callable[[int], Page], first: int = 0, last: Optional[int] = None,
+             window: int = DEFAULT_WINDOW, workers: int = DEFAULT_WORKERS,
+             stop_on_empty: bool = True) -> List[Any]:
+    """
+    Fetch every page of a listing concurrently and return the items in page order.
+
+    Args:
+        fetch_page: Returns the Page for a page index
+        first: Index of the first page
+        last: Index of the last page, if already known
+        window: Pages fetched ahead while the page count is unknown
+        workers: Maximum concurrent requests
+        stop_on_empty: Stop at the first page without items; if False, empty pages are
+            skipped once the page count is known
+
+    Returns:
+        Items of all pages up to where the listing ends
+    """
+    items = []
+    futures: Dict[int, Any] = {}
+    scheduled = first - 1
+
+    executor = ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix='pages')
+
+    def schedule(upto: int):
+        nonlocal scheduled
+        while scheduled < upto:
+            scheduled += 1
+            futures[scheduled] = executor.submit(fetch_page, scheduled)
+
+    # Every known page, or a first window of pages
+    schedule(last if last is not None else first + max(window, 1) - 1)
+    page_index = first
+    try:
+        while True:
+            try:
+                page = futures.pop(page_index).result()
+            except Exception as e:
+                logger.error(f"Error fetching page {page_index}: {e}")
+                break
+
+            if page.items:
+                items.extend(page.items)
+            elif stop_on_empty or last is None:
+                logger.info(f"No items on page {page_index}, stopping")
+                break
+
+            if page.last is not None and last is None:
+                last = page.last
+            if not page.has_next or (last is not None and page_index >= last):
+                break
+
+            page_index += 1
+            schedule(last if last is not None else page_index + max(window, 1) - 1)
+    finally:
+        # Speculative requests past the end are dropped: queued ones are cancelled
+        # and ones already in flight finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Fetched {len(items)} items from {page_index - first + 1} pages")
+    return items
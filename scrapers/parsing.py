@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+HTML parsing backend shared by the scrapers.
+
+``make_soup`` builds a BeautifulSoup tree with the fastest installed
+parser: lxml (C-backed) when it is installed, otherwise Python's built-in
+``html.parser``. Set ``PRISONS_HTML_PARSER`` to force one. Pass a
+``SoupStrainer`` as ``parse_only`` to build only the containers a scraper
+reads instead of the whole page.
+
+Example:
+    DETAIL_STRAINER = SoupStrainer('article')
+    soup = make_soup(response.content, parse_only=DETAIL_STRAINER)
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import Callable, List, Optional, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variable that overrides the parser choice
+PARSER_ENV = 'PRISONS_HTML_PARSER'
+
+# Tried in order; html.parser ships with Python and is always available
+PARSERS = ['lxml', 'html.parser']
+
+
+def available_parsers() -> List[str]:
+    """Installed parsers from PARSERS, fastest first."""
+    return [name for name in PARSERS if builder_registry.lookup(name) is not None]
+
+
+@lru_cache(maxsize=None)
+def _resolve(requested: Optional[str]) -> str:
+    if requested:
+        if builder_registry.lookup(requested) is not None:
+            return requested
+        logger.warning(f"HTML parser {requested!r} is not installed; falling back")
+    return available_parsers()[0]
+
+
+def default_parser() -> str:
+    """Parser used when make_soup is not given one."""
+    return _resolve(os.getenv(PARSER_ENV))
+
+
+def has_class(*names: str) -> Callable[[Optional[Union[str, List[str]]]], bool]:
+    """
+    ``class_`` matcher for SoupStrainer that accepts any of ``names``.
+
+    While parsing, a strainer sees the raw ``class`` attribute
+    ("tn-rte text-center"), so plain class names only match elements with
+    exactly that one class.
+    """
+    wanted = set(names)
+
+    def match(value) -> bool:
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(classes)
+
+    return match
+
+
+def make_soup(markup: Union[str, bytes], parse_only: Optional[SoupStrainer] = None,
+              parser: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse HTML with the configured backend.
+
+    Args:
+        markup: Page HTML (bytes let the parser detect the encoding)
+        parse_only: Only build elements matching this strainer (and their children)
+        parser: Parser name, overriding the default
+
+    Returns:
+        Parsed document
+    """
+    return BeautifulSoup(markup, _resolve(parser) if parser else default_parser(), parse_only=parse_only)
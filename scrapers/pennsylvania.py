@@ -2,11 +2,11 @@ import requests
 import pandas as pd
 import re
 import json
-import time
 import os
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from . import checkpoint, parsing, stages
+
 class PennsylvaniaScraper:
     def __init__(self):
         self.base_url = "https://www.pa.gov"
@@ -15,6 +15,8 @@ class PennsylvaniaScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_facility_list(self):
         """Get the list of Pennsylvania facilities from the side navigation menu."""
         print("Fetching Pennsylvania prison facility list...")
@@ -23,7 +25,7 @@ class PennsylvaniaScraper:
             response = requests.get(self.facilities_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Find the State Prisons section in the side navigation
             facilities = []
@@ -108,6 +110,8 @@ class PennsylvaniaScraper:
         
         return facilities
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, facility_url, expected_name=None):
         """Scrape detailed information from individual facility page."""
         print(f"Scraping details for: {facility_url}")
@@ -116,7 +120,7 @@ class PennsylvaniaScraper:
             response = requests.get(facility_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             facility_data = {}
             
@@ -281,6 +285,8 @@ class PennsylvaniaScraper:
         
         return parsed_data
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility_data):
         """Geocode facility address using multiple services."""
         if not facility_data.get('street_address') or not facility_data.get('city'):
@@ -317,7 +323,6 @@ class PennsylvaniaScraper:
                     # Validate coordinates are in Pennsylvania bounds
                     if 39.7 <= lat <= 42.3 and -80.6 <= lng <= -74.7:
                         print(f"  Geocoded with Google Maps: {lat:.6f}, {lng:.6f}")
-                        time.sleep(0.1)  # Rate limiting
                         return lat, lng
                         
             except Exception as e:
@@ -342,7 +347,6 @@ class PennsylvaniaScraper:
                 # Validate coordinates are in Pennsylvania bounds
                 if 39.7 <= lat <= 42.3 and -80.6 <= lng <= -74.7:
                     print(f"  Geocoded with Nominatim: {lat:.6f}, {lng:.6f}")
-                    time.sleep(1)  # Rate limiting for free service
                     return lat, lng
                     
         except Exception as e:
@@ -384,9 +388,6 @@ class PennsylvaniaScraper:
             
             all_facility_data.append(parsed_data)
             
-            # Small delay between requests
-            time.sleep(0.5)
-        
         return all_facility_data
     
     def save_data(self, data, output_dir="data/pennsylvania"):
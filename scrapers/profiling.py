@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Profilers for fetch.py runs, split per jurisdiction and pipeline stage.
+
+- ``cpu``: deterministic cProfile in every thread, one ``.pstats`` file per
+  stage with the threads' profiles merged
+- ``wall``: sampling profiler that includes network waits, written as
+  collapsed stacks for flamegraph.pl or speedscope
+- ``memory``: tracemalloc peak/net allocation per stage plus a snapshot of
+  the top allocation sites per jurisdiction
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from . import stages
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ['cpu', 'wall', 'memory']
+
+
+def _key_name(key: stages.StageKey) -> str:
+    jurisdiction, stage = key
+    return f"{jurisdiction or 'run'}/{stage or 'other'}"
+
+
+def _key_path(output_dir: str, key: stages.StageKey, suffix: str) -> str:
+    jurisdiction, stage = key
+    directory = os.path.join(output_dir, jurisdiction or 'run')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{stage or 'other'}{suffix}")
+
+
+class CpuProfiler:
+    """
+    cProfile with a separate profile for each (jurisdiction, stage) and thread.
+
+    cProfile only sees the thread that enabled it, while jurisdictions run on
+    scheduler threads and fetch details from worker pools. Each thread
+    therefore gets its own profiles, switched on its own stage transitions;
+    they are merged per stage when written.
+    """
+
+    def __init__(self):
+        self.profiles: Dict[stages.StageKey, List[cProfile.Profile]] = defaultdict(list)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        self._running = True
+        stages.add_listener(self._switch)
+        # Threads started from now on begin profiling once they run jurisdiction work
+        threading.setprofile(self._bootstrap)
+        self._enable(stages.current_key())
+
+    def stop(self):
+        self._running = False
+        threading.setprofile(None)
+        stages.remove_listener(self._switch)
+        # Other threads' profiles stop at their next transition or when the thread ends
+        self._disable()
+
+    def _bootstrap(self, frame, event, arg):
+        # Pool threads start in an empty context and receive the jurisdiction with their first task
+        if not self._running:
+            sys.setprofile(None)
+        elif event == 'call' and stages.current_jurisdiction():
+            self._enable(stages.current_key())
+
+    def _enable(self, key: stages.StageKey):
+        local = self._local
+        if not hasattr(local, 'profiles'):
+            local.profiles = {}
+        if key not in local.profiles:
+            local.profiles[key] = cProfile.Profile()
+            with self._lock:
+                self.profiles[key].append(local.profiles[key])
+        local.current = local.profiles[key]
+        try:
+            local.current.enable()
+        except ValueError as e:
+            # Python 3.12+ allows one active cProfile per process
+            local.current = None
+            sys.setprofile(None)
+            logger.warning(f"CPU profiling skipped for {_key_name(key)} in {threading.current_thread().name}: {e}; "
+                           f"use --profile wall for multi-threaded runs")
+
+    def _disable(self):
+        current = getattr(self._local, 'current', None)
+        if current:
+            current.disable()
+            self._local.current = None
+
+    def _switch(self, old_key: stages.StageKey, new_key: stages.StageKey):
+        self._disable()
+        if self._running:
+            self._enable(new_key)
+
+    def _stats(self, key: stages.StageKey) -> Optional[pstats.Stats]:
+        stats = None
+        for profile in self.profiles[key]:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile, stream=io.StringIO())
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # Profiles that never recorded a call cannot be read
+                continue
+        return stats
+
+    def write(self, output_dir: str) -> List[str]:
+        paths = []
+        for key in list(self.profiles):
+            stats = self._stats(key)
+            if stats is None:
+                continue
+            path = _key_path(output_dir, key, '.pstats')
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        lines = []
+        for key in sorted(self.profiles, key=_key_name):
+            stats = self._stats(key)
+            if stats is None:
+                continue
+            lines.append(f"{_key_name(key)}: {stats.total_tt:.2f}s CPU")
+            stats.sort_stats('tottime')
+            for func in stats.fcn_list[:limit]:
+                filename, lineno, name = func
+                tottime = stats.stats[func][2]
+                lines.append(f"    {tottime:8.3f}s  {name} ({os.path.basename(filename)}:{lineno})")
+        return lines
+
+
+class WallProfiler:
+    """Sampling profiler over wall-clock time, so network waits show up too."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Dict[stages.StageKey, Counter] = defaultdict(Counter)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='wall-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            active = stages.active_keys()
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or ident not in active:
+                    continue
+                key = active[ident]
+                if key[0] is None:
+                    continue
+                self.samples[key][self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def write(self, output_dir: str) -> List[str]:
+        paths = []
+        for key, stacks in self.samples.items():
+            path = _key_path(output_dir, key, '.collapsed')
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            paths.append(path)
+        return paths
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        lines = []
+        for key, stacks in sorted(self.samples.items(), key=lambda item: _key_name(item[0])):
+            total = sum(stacks.values())
+            lines.append(f"{_key_name(key)}: {total * self.interval:.2f}s wall ({total} samples)")
+            leaves = Counter()
+            for stack, count in stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            for leaf, count in leaves.most_common(limit):
+                lines.append(f"    {count / total:6.1%}  {leaf}")
+        return lines
+
+
+class MemoryProfiler:
+    """tracemalloc peak and net allocations per stage."""
+
+    def __init__(self, top: int = 30):
+        self.top = top
+        self.peak: Dict[stages.StageKey, int] = defaultdict(int)
+        self.net: Dict[stages.StageKey, int] = defaultdict(int)
+        self.snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        self._segment_start = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        tracemalloc.start(25)
+        self._segment_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        stages.add_listener(self._switch)
+
+    def stop(self):
+        stages.remove_listener(self._switch)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _switch(self, old_key: stages.StageKey, new_key: stages.StageKey):
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak[old_key] = max(self.peak[old_key], peak - self._segment_start)
+            self.net[old_key] += current - self._segment_start
+            # Keep a snapshot of what a jurisdiction left allocated before leaving it
+            if old_key[0] and old_key[0] != new_key[0]:
+                self.snapshots[old_key[0]] = tracemalloc.take_snapshot()
+            self._segment_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    def write(self, output_dir: str) -> List[str]:
+        paths = []
+        for jurisdiction, snapshot in self.snapshots.items():
+            directory = os.path.join(output_dir, jurisdiction)
+            os.makedirs(directory, exist_ok=True)
+            snapshot_path = os.path.join(directory, 'memory.tracemalloc')
+            snapshot.dump(snapshot_path)
+            report_path = os.path.join(directory, 'memory.txt')
+            with open(report_path, 'w') as f:
+                f.write(f"Per-stage memory for {jurisdiction}\n")
+                for key in sorted(self.peak, key=_key_name):
+                    if key[0] == jurisdiction:
+                        f.write(f"  {key[1] or 'other':<10} peak {self.peak[key] / 1e6:8.1f} MB  "
+                                f"net {self.net[key] / 1e6:+8.1f} MB\n")
+                f.write(f"\nTop {self.top} allocation sites still held after the run:\n")
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    f.write(f"  {stat}\n")
+            paths.extend([report_path, snapshot_path])
+        return paths
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        lines = []
+        for key in sorted(self.peak, key=_key_name):
+            if key[0] is None:
+                continue
+            lines.append(f"{_key_name(key)}: peak {self.peak[key] / 1e6:.1f} MB, "
+                         f"net {self.net[key] / 1e6:+.1f} MB")
+        return lines
+
+
+def create_profiler(mode: str):
+    """
+    Create a profiler for the given mode.
+
+    Args:
+        mode: One of ``cpu``, ``wall`` or ``memory``
+
+    Returns:
+        Profiler with ``start``, ``stop``, ``write`` and ``summary_lines`` methods
+    """
+    profilers = {
+        'cpu': CpuProfiler,
+        'wall': WallProfiler,
+        'memory': MemoryProfiler,
+    }
+    if mode not in profilers:
+        raise ValueError(f"Unknown profile mode: {mode} (choose from {', '.join(PROFILE_MODES)})")
+    return profilers[mode]()
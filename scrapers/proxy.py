@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+ScrapeOps proxy client with a response cache and a per-run budget.
+
+Sites that block direct requests (Massachusetts) are fetched through the
+paid ScrapeOps proxy. ``ProxyClient`` keeps proxied pages in a disk cache
+under ``.cache/proxy``, so a refresh within the cache lifetime costs no
+credits. It also stops spending once the run has used its credits or its
+seconds of proxy time, and holds concurrent requests to the plan's
+thread limit. Requests go through a shared session, so tracing, retries
+and the proxy's rate limit apply as for any other request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROXY_URL = 'https://proxy.scrapeops.io/v1/'
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'proxy')
+# Facility pages change rarely; a day-old copy is good enough for a refresh
+DEFAULT_CACHE_TTL = 24 * 3600
+DEFAULT_TIMEOUT = 30
+
+# Plan limits, overridable per deployment
+CREDITS_ENV = 'SCRAPE_PROXY_CREDITS'
+CONCURRENCY_ENV = 'SCRAPE_PROXY_CONCURRENCY'
+MAX_SECONDS_ENV = 'SCRAPE_PROXY_MAX_SECONDS'
+# Uncached requests per run (one credit each on a basic plan)
+DEFAULT_CREDITS = 50
+# Concurrent requests allowed by the ScrapeOps free plan
+DEFAULT_CONCURRENCY = 1
+# Seconds of proxy time per run, summed over all requests
+DEFAULT_MAX_SECONDS = 300.0
+
+
+class ProxyBudgetError(requests.exceptions.RequestException):
+    """Raised instead of sending a request once the run's proxy budget is spent."""
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}, using {default}")
+        return default
+
+
+class ProxyClient:
+    """Fetch pages through ScrapeOps with caching, a budget and a concurrency limit."""
+
+    def __init__(self, api_key: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, credits: Optional[int] = None,
+                 concurrency: Optional[int] = None, max_seconds: Optional[float] = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Create a proxy client.
+
+        Args:
+            api_key: ScrapeOps API key
+            cache_dir: Directory for cached responses (None disables the cache)
+            cache_ttl: Seconds a cached response is served without a new request
+            credits: Uncached requests allowed this run (default from SCRAPE_PROXY_CREDITS)
+            concurrency: Requests in flight at once (default from SCRAPE_PROXY_CONCURRENCY)
+            max_seconds: Total proxy seconds allowed this run (default from SCRAPE_PROXY_MAX_SECONDS)
+            timeout: Per-request timeout in seconds
+        """
+        self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.credits = credits if credits is not None else _env_number(CREDITS_ENV, DEFAULT_CREDITS, int)
+        self.concurrency = max(1, concurrency if concurrency is not None
+                               else _env_number(CONCURRENCY_ENV, DEFAULT_CONCURRENCY, int))
+        self.max_seconds = (max_seconds if max_seconds is not None
+                            else _env_number(MAX_SECONDS_ENV, DEFAULT_MAX_SECONDS, float))
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        self.stats = {'requests': 0, 'cache_hits': 0, 'failures': 0, 'refused': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    def get(self, url: str) -> requests.Response:
+        """
+        Fetch a page through the proxy, or from the cache if a fresh copy exists.
+
+        Args:
+            url: Target page URL
+
+        Returns:
+            Response for the target page
+
+        Raises:
+            ProxyBudgetError: The run's credits or proxy time are used up
+            requests.exceptions.RequestException: The proxied request failed
+        """
+        cached = self._read_cache(url)
+        if cached is not None:
+            with self._lock:
+                self.stats['cache_hits'] += 1
+            return cached
+
+        self._reserve(url)
+        with self._slots:
+            start = time.monotonic()
+            try:
+                response = self.session.get(PROXY_URL, params={'api_key': self.api_key, 'url': url},
+                                            timeout=self.timeout)
+                response.raise_for_status()
+            except Exception:
+                with self._lock:
+                    self.stats['failures'] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.stats['seconds'] += time.monotonic() - start
+
+        self._write_cache(url, response)
+        return response
+
+    def _reserve(self, url: str):
+        # Claim a credit before sending, so concurrent callers cannot overspend
+        with self._lock:
+            if self.stats['requests'] >= self.credits:
+                reason = f"all {self.credits} credits used"
+            elif self.stats['seconds'] >= self.max_seconds:
+                reason = f"{self.stats['seconds']:.0f}s of its {self.max_seconds:.0f}s proxy time used"
+            else:
+                self.stats['requests'] += 1
+                return
+            self.stats['refused'] += 1
+        raise ProxyBudgetError(f"Proxy budget exhausted ({reason}), not fetching {url}")
+
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_cache(self, url: str) -> Optional[requests.Response]:
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.cache_ttl:
+                return None
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry['url']
+        response.encoding = entry['encoding']
+        response._content = entry['text'].encode(entry['encoding'])
+        return response
+
+    def _write_cache(self, url: str, response: requests.Response):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(url)
+        entry = {'url': url, 'encoding': response.encoding or 'utf-8', 'text': response.text}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so concurrent readers never see a partial entry
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache proxy response for {url}: {e}")
+
+    def summary(self) -> Dict:
+        """Requests, cache hits, failures, refusals and proxy seconds so far this run."""
+        with self._lock:
+            return dict(self.stats)
+
+    def log_summary(self):
+        """Log the run's proxy usage against its budget."""
+        stats = self.summary()
+        logger.info(f"Proxy: {stats['requests']}/{self.credits} credits, {stats['cache_hits']} cache hits, "
+                    f"{stats['failures']} failures, {stats['refused']} refused, "
+                    f"{stats['seconds']:.1f}/{self.max_seconds:.0f}s proxy time")
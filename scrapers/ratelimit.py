@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-host request pacing.
+
+Replaces the fixed ``time.sleep`` calls in the scrapers with an AIMD
+(additive-increase, multiplicative-decrease) controller per host: the request
+rate creeps up while responses are fast and healthy and is halved on latency
+spikes, 429s, 5xx responses or connection errors. Each host settles near the
+fastest rate it tolerates, and the chosen rates are reported at the end of a run.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import tracing, transport
+from .resilience import parse_retry_after
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pacing sits inside the retry layer so every attempt waits its turn
+MIDDLEWARE_ORDER = 40
+
+# Requests per second: (initial, minimum, maximum)
+DEFAULT_LIMITS = (2.0, 0.1, 8.0)
+HOST_LIMITS = {
+    # Nominatim usage policy: an absolute maximum of one request per second
+    'nominatim.openstreetmap.org': (1.0, 0.1, 1.0),
+    'photon.komoot.io': (1.0, 0.1, 1.0),
+    'maps.googleapis.com': (10.0, 1.0, 25.0),
+    'proxy.scrapeops.io': (1.0, 0.1, 5.0),
+}
+
+
+class HostRate:
+    """AIMD rate state for a single host."""
+
+    def __init__(self, host: str, initial: float, minimum: float, maximum: float,
+                 increase: float = 0.25, decrease: float = 0.5, spike_factor: float = 2.0,
+                 spike_floor: float = 1.0):
+        """
+        Initialize the host rate.
+
+        Args:
+            host: Host name (proxy requests include the target host)
+            initial: Starting rate in requests per second
+            minimum: Slowest rate the controller backs off to
+            maximum: Fastest rate the controller may reach
+            increase: Requests per second added after each healthy response
+            decrease: Factor applied to the rate on throttling, errors or latency spikes
+            spike_factor: Latency above this multiple of the running average is a spike
+            spike_floor: Latencies below this many seconds never count as spikes
+        """
+        self.host = host
+        self.rate = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.spike_floor = spike_floor
+        self.avg_latency: Optional[float] = None
+        self.next_allowed = 0.0
+        self.last_decrease = 0.0
+        self.lowest = initial
+        self.highest = initial
+        self.decreases = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next request slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self.next_allowed)
+            self.next_allowed = start + 1.0 / self.rate
+            self.requests += 1
+            return start - now
+
+    def on_success(self, latency: float):
+        with self._lock:
+            spike = (self.avg_latency is not None and latency > self.spike_floor
+                     and latency > self.spike_factor * self.avg_latency)
+            self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            if spike:
+                self._back_off(f"latency spike ({latency:.1f}s vs {self.avg_latency:.1f}s average)")
+            else:
+                self.rate = min(self.maximum, self.rate + self.increase)
+                self.highest = max(self.highest, self.rate)
+
+    def on_failure(self, reason: str, retry_after: Optional[float] = None):
+        with self._lock:
+            self._back_off(reason)
+            if retry_after:
+                self.next_allowed = max(self.next_allowed, time.monotonic() + retry_after)
+
+    def _back_off(self, reason: str):
+        now = time.monotonic()
+        # One burst of failures should only halve the rate once
+        if now - self.last_decrease < 1.0 / self.rate:
+            return
+        self.last_decrease = now
+        self.rate = max(self.minimum, self.rate * self.decrease)
+        self.lowest = min(self.lowest, self.rate)
+        self.decreases += 1
+        logger.info(f"Slowing {self.host} to {self.rate:.2f} req/s after {reason}")
+
+
+class AdaptiveRateLimiter:
+    """Transport middleware that paces requests per host."""
+
+    def __init__(self, host_limits: Optional[Dict] = None, default_limits=DEFAULT_LIMITS):
+        self.host_limits = dict(HOST_LIMITS, **(host_limits or {}))
+        self.default_limits = default_limits
+        self.hosts: Dict[str, HostRate] = {}
+        self._lock = threading.Lock()
+
+    def host_rate(self, host: str) -> HostRate:
+        with self._lock:
+            if host not in self.hosts:
+                # Proxy hosts read "proxy (target)"; limits apply to the proxy itself
+                base_host = host.split(' ', 1)[0]
+                initial, minimum, maximum = self.host_limits.get(base_host, self.default_limits)
+                self.hosts[host] = HostRate(host, initial, minimum, maximum)
+            return self.hosts[host]
+
+    def __call__(self, request, send, **kwargs):
+        state = self.host_rate(tracing.trace_host(request.url))
+        wait = state.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+        start = time.monotonic()
+        try:
+            response = send(request, **kwargs)
+        except Exception as e:
+            state.on_failure(type(e).__name__)
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            state.on_failure(f"HTTP {response.status_code}",
+                             parse_retry_after(response.headers.get('Retry-After')))
+        else:
+            state.on_success(time.monotonic() - start)
+        return response
+
+    def format_summary(self) -> List[str]:
+        """Render the rate each host settled on as printable lines."""
+        header = f"{'Host':<34} {'Reqs':>5} {'Final req/s':>12} {'Lowest':>8} {'Highest':>8} {'Backoffs':>9}"
+        lines = [header, '-' * len(header)]
+        for state in sorted(self.hosts.values(), key=lambda s: s.host):
+            lines.append(f"{state.host[:34]:<34} {state.requests:>5} {state.rate:>12.2f} "
+                         f"{state.lowest:>8.2f} {state.highest:>8.2f} {state.decreases:>9}")
+        return lines
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+
+
+def install(**kwargs) -> AdaptiveRateLimiter:
+    """Enable adaptive pacing for all scraper requests."""
+    global _limiter
+    if _limiter is None:
+        _limiter = AdaptiveRateLimiter(**kwargs)
+        transport.add_middleware(_limiter, order=MIDDLEWARE_ORDER)
+    return _limiter
+
+
+def get_limiter() -> Optional[AdaptiveRateLimiter]:
+    """Return the installed rate limiter, if any."""
+    return _limiter
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Shared retry and circuit-breaker layer for every scraper request.
+
+Transient failures (timeouts, dropped connections, 429 and 5xx responses) are
+retried with jittered exponential backoff, honoring ``Retry-After``. A
+per-host circuit breaker fails fast once a host keeps failing, so an outage
+costs a few seconds instead of one timeout per facility.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from . import tracing, transport
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Retries wrap everything else so each attempt is paced and traced
+MIDDLEWARE_ORDER = 20
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host."""
+
+    def __init__(self, host: str, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_in_flight:
+                # Let a single trial request through to probe the host
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit for {self.host} closed after successful trial request")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            was_trial = self.trial_in_flight
+            self.trial_in_flight = False
+            if was_trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit for {self.host} opened after {self.failures} consecutive failures; "
+                               f"failing fast for {self.reset_timeout:.0f}s")
+
+    def release_trial(self):
+        # The request ended without a verdict on the host; let the next one probe it
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class RetryPolicy:
+    """Transport middleware: jittered exponential backoff plus per-host circuit breakers."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 max_retry_after: float = 120.0, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total attempts per request, including the first
+            base_delay: Backoff base in seconds (doubles each attempt, full jitter)
+            max_delay: Cap on a single backoff delay
+            max_retry_after: Longest Retry-After we are willing to wait; longer waits give up
+            failure_threshold: Consecutive failures before a host's circuit opens
+            reset_timeout: Seconds an open circuit waits before allowing a trial request
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) attempt."""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def __call__(self, request, send, **kwargs):
+        host = tracing.trace_host(request.url)
+        breaker = self.breaker(host)
+        retryable = request.method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        response = None
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                # Circuit opened during our own retries: hand back the last failure
+                if response is not None:
+                    return response
+                raise CircuitOpenError(f"Circuit open for {host}; skipping {request.url}", request=request)
+
+            try:
+                response = send(request, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                breaker.record_failure()
+                if not retryable or attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{type(e).__name__} from {host} (attempt {attempt}/{self.max_attempts}); "
+                               f"retrying in {delay:.1f}s")
+                self._wait(request, delay)
+                continue
+            except BaseException:
+                # Errors that say nothing about the host (bad URL, budget refusal, interrupt)
+                # must not leave a half-open circuit waiting forever for its trial request
+                breaker.release_trial()
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+
+            # Throttling means the host is alive; only server errors count against the circuit
+            if response.status_code == 429:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            if not retryable or attempt >= self.max_attempts:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None and retry_after > self.max_retry_after:
+                logger.warning(f"{host} asked us to wait {retry_after:.0f}s; giving up on {request.url}")
+                return response
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+            logger.warning(f"HTTP {response.status_code} from {host} (attempt {attempt}/{self.max_attempts}); "
+                           f"retrying in {delay:.1f}s")
+            response.close()
+            self._wait(request, delay)
+
+    def _wait(self, request, delay: float):
+        tracer = tracing.get_tracer()
+        if tracer:
+            tracer.record_retry(request.url)
+        time.sleep(delay)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_policy: Optional[RetryPolicy] = None
+
+
+def install(**kwargs) -> RetryPolicy:
+    """Enable retries and circuit breakers for all scraper requests."""
+    global _policy
+    if _policy is None:
+        _policy = RetryPolicy(**kwargs)
+        transport.add_middleware(_policy, order=MIDDLEWARE_ORDER)
+    return _policy
+
+
+def get_policy() -> Optional[RetryPolicy]:
+    """Return the installed retry policy, if any."""
+    return _policy
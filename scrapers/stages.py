@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Jurisdiction and pipeline-stage context for scraper runs.
+
+``fetch.py`` marks which jurisdiction is running and scrapers mark their
+pipeline stages (discover, details, geocode, export). Profilers and other
+run-level tools subscribe to stage transitions instead of being wired into
+every scraper.
+"""
+
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stage names used by the scrapers
+DISCOVER = 'discover'
+DETAILS = 'details'
+GEOCODE = 'geocode'
+VALIDATE = 'validate'
+ENRICH = 'enrich'
+EXPORT = 'export'
+SCRAPE = 'scrape'
+
+# A stage key identifies where work is being done: (jurisdiction, stage)
+StageKey = Tuple[Optional[str], Optional[str]]
+Listener = Callable[[StageKey, StageKey], None]
+
+_jurisdiction = contextvars.ContextVar('jurisdiction', default=None)
+_stages = contextvars.ContextVar('stages', default=())
+_listeners: List[Listener] = []
+_active: Dict[int, StageKey] = {}
+
+
+def current_jurisdiction() -> Optional[str]:
+    """Return the jurisdiction being scraped in this context."""
+    return _jurisdiction.get()
+
+
+def current_stage() -> Optional[str]:
+    """Return the innermost active stage in this context."""
+    stack = _stages.get()
+    return stack[-1] if stack else None
+
+
+def current_key() -> StageKey:
+    """Return the (jurisdiction, stage) pair for this context."""
+    return (current_jurisdiction(), current_stage())
+
+
+def active_keys() -> Dict[int, StageKey]:
+    """Return the stage key each running thread last entered, by thread id."""
+    return dict(_active)
+
+
+def add_listener(listener: Listener):
+    """Call ``listener(old_key, new_key)`` on every stage transition."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Listener):
+    """Stop notifying a listener."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _transition(old_key: StageKey, new_key: StageKey):
+    _active[threading.get_ident()] = new_key
+    if old_key == new_key:
+        return
+    for listener in list(_listeners):
+        try:
+            listener(old_key, new_key)
+        except Exception as e:
+            logger.warning(f"Error in stage listener: {e}")
+
+
+@contextmanager
+def jurisdiction(name: str):
+    """Mark everything inside the block as work for one jurisdiction."""
+    old_key = current_key()
+    token = _jurisdiction.set(name)
+    stages_token = _stages.set(())
+    _transition(old_key, current_key())
+    try:
+        yield
+    finally:
+        new_key = current_key()
+        _stages.reset(stages_token)
+        _jurisdiction.reset(token)
+        _transition(new_key, current_key())
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Mark a pipeline stage. Works as a context manager or a method decorator.
+
+    Args:
+        name: Stage name, e.g. ``stages.DETAILS``
+    """
+    old_key = current_key()
+    token = _stages.set(_stages.get() + (name,))
+    _transition(old_key, current_key())
+    try:
+        yield
+    finally:
+        new_key = current_key()
+        _stages.reset(token)
+        _transition(new_key, current_key())
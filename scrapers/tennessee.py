@@ -2,15 +2,19 @@
 
 import requests
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, parsing, pipeline, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Facility pages: warden/address blocks and rich-text sections
+DETAIL_STRAINER = SoupStrainer('div', class_=parsing.has_class('textimage-text', 'tn-rte'))
+
 class TennesseeScraper:
     """Scraper for Tennessee Department of Correction facilities."""
     
@@ -49,43 +53,27 @@ class TennesseeScraper:
         
         logger.info(f"Found {len(facility_urls)} facility URLs")
         
-        # Scrape details from each facility page
-        facilities = []
-        for i, (name, url) in enumerate(facility_urls.items(), 1):
-            try:
-                logger.info(f"Processing facility {i}/{len(facility_urls)}: {name}")
-                
-                facility_data = self.scrape_facility_details(name, url)
-                if facility_data:
-                    facilities.append(facility_data)
-                
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.error(f"Error processing {name}: {e}")
-                continue
+        # Fetch detail pages while earlier facilities are being geocoded
+        facilities = pipeline.fetch_and_geocode(
+            list(facility_urls.items()),
+            fetch=lambda item: self.scrape_facility_details(*item),
+            geocode=self.geocode_address,
+            describe=lambda item: item[0],
+        )
         
         logger.info(f"Successfully processed {len(facilities)} facilities")
         return facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facility_urls(self) -> Dict[str, str]:
         """Extract facility URLs from the main directory page."""
         try:
-            # Add retry logic for connection issues
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.session.get(self.facilities_url, timeout=30)
-                    response.raise_for_status()
-                    break
-                except Exception as e:
-                    logger.warning(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt == max_retries - 1:
-                        raise
-                    time.sleep(2)
+            # Connection errors are retried by the shared resilience layer
+            response = self.session.get(self.facilities_url, timeout=30)
+            response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facility_urls = {}
             
             # Find all facility links in the regional sections
@@ -117,13 +105,16 @@ class TennesseeScraper:
             logger.error(f"Error getting facility URLs: {e}")
             return {}
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, name: str, url: str) -> Optional[Dict]:
         """Scrape details from an individual facility page."""
         try:
             response = self.session.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Warden, address and description all live in these two containers
+            soup = parsing.make_soup(response.content, parse_only=DETAIL_STRAINER)
             
             facility = {
                 'name': name,
@@ -143,11 +134,6 @@ class TennesseeScraper:
             # Determine facility type
             facility['facility_type'] = self.determine_facility_type(name)
             
-            # Geocode the address if we have one
-            if facility.get('street_address') and facility.get('city'):
-                coordinates = self.geocode_address(facility)
-                facility.update(coordinates)
-            
             return facility
             
         except Exception as e:
@@ -314,6 +300,8 @@ class TennesseeScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Dict:
         """Geocode facility address to get coordinates."""
         coordinates = {}
@@ -354,13 +342,11 @@ class TennesseeScraper:
             return coords
         
         # Fallback to Nominatim
-        time.sleep(1)  # Rate limiting for free service
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
         
         # Fallback to Photon
-        time.sleep(1)  # Rate limiting
         coords = self.geocode_photon(address)
         if coords:
             return coords
@@ -5,15 +5,40 @@ Texas state prison data scraper for TDCJ facilities.
 import requests
 import pandas as pd
 import re
-import time
 import os
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import urllib3
 
+from . import checkpoint, parsing, stages
+from .extractors import Field, LabelExtractor
+
 # Disable SSL warnings for sites with certificate issues
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Labelled fields on unit pages, compiled once for all facilities
+FACILITY_DETAILS = LabelExtractor({
+    'Unit Full Name': Field('unit_full_name'),
+    'Family Liaison Coordinator': Field('family_liaison'),
+    'Date Unit Established or On Line': Field('date_established'),
+    'Total Employees': Field('total_employees', r'\d+'),
+    'Security Employees': Field('security_employees', r'\d+'),
+    'Non-Security Employees': Field('non_security_employees', r'\d+'),
+    'Windham Education Employees': Field('windham_employees', r'\d+'),
+    'Contract Medical and Mental Health Employees': Field('medical_employees'),
+    'Capacity': Field('capacity', r'[\d,]+'),
+    'Custody Levels Housed': Field('custody_levels'),
+    'Approximate Acreage': Field('acreage'),
+    'Agricultural Operations': Field('agricultural_ops'),
+    'Manufacturing and Logistics Op.': Field('manufacturing_ops'),
+    'Facility Operations': Field('facility_ops'),
+    'Additional Operations': Field('additional_ops'),
+    'Medical Capabilities': Field('medical_capabilities'),
+    'Educational Programs': Field('educational_programs'),
+    'Additional Programs/Services': Field('additional_programs'),
+    'Community Work Projects': Field('community_work'),
+    'Volunteer Initiatives': Field('volunteer_initiatives'),
+})
+
 
 class TexasScraper:
     """Scraper for Texas Department of Criminal Justice (TDCJ) facilities."""
@@ -26,13 +51,15 @@ class TexasScraper:
         self.base_url = 'https://www.tdcj.texas.gov'
         self.unit_directory_url = 'https://www.tdcj.texas.gov/unit_directory/index.html'
 
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def scrape_unit_directory_table(self):
         """Scrape the main unit directory table to get basic facility info and URLs"""
         try:
             response = requests.get(self.unit_directory_url, headers=self.headers, timeout=15, verify=False)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Find the unit directory table
             table = soup.find('table', class_='tdcj_table')
@@ -92,40 +119,9 @@ class TexasScraper:
             if warden_match:
                 details['senior_warden'] = warden_match.group(1).strip()
         
-        # Find all paragraphs with bold labels
+        # Labelled facility details, one scan over all paragraphs
         paragraphs = soup.find_all('p')
-        
-        for p in paragraphs:
-            text = p.get_text()
-            
-            # Extract various facility details using regex patterns
-            patterns = {
-                'unit_full_name': r'Unit Full Name:\s*(.+)',
-                'family_liaison': r'Family Liaison Coordinator:\s*(.+)',
-                'date_established': r'Date Unit Established or On Line:\s*(.+)',
-                'total_employees': r'Total Employees:\s*(\d+)',
-                'security_employees': r'Security Employees:\s*(\d+)',
-                'non_security_employees': r'Non-Security Employees:\s*(\d+)',
-                'windham_employees': r'Windham Education Employees:\s*(\d+)',
-                'medical_employees': r'Contract Medical and Mental Health Employees:\s*(.+)',
-                'capacity': r'Capacity:\s*([\d,]+)',
-                'custody_levels': r'Custody Levels Housed:\s*(.+)',
-                'acreage': r'Approximate Acreage:\s*(.+)',
-                'agricultural_ops': r'Agricultural Operations:\s*(.+)',
-                'manufacturing_ops': r'Manufacturing and Logistics Op\.:\s*(.+)',
-                'facility_ops': r'Facility Operations:\s*(.+)',
-                'additional_ops': r'Additional Operations:\s*(.+)',
-                'medical_capabilities': r'Medical Capabilities:\s*(.+)',
-                'educational_programs': r'Educational Programs:\s*(.+)',
-                'additional_programs': r'Additional Programs/Services:\s*(.+)',
-                'community_work': r'Community Work Projects:\s*(.+)',
-                'volunteer_initiatives': r'Volunteer Initiatives:\s*(.+)'
-            }
-            
-            for key, pattern in patterns.items():
-                match = re.search(pattern, text)
-                if match:
-                    details[key] = match.group(1).strip()
+        details.update(FACILITY_DETAILS.extract_blocks(p.get_text() for p in paragraphs))
         
         # Extract address and phone from the structured sections
         address_divs = soup.find_all('div', class_='div_50_left')
@@ -158,6 +154,8 @@ class TexasScraper:
         
         return details
 
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def scrape_facility_details(self, facility_url):
         """Scrape detailed information from a single facility page"""
         if not facility_url:
@@ -167,7 +165,7 @@ class TexasScraper:
             response = requests.get(facility_url, headers=self.headers, timeout=15, verify=False)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             
             # Parse facility details
             details = self.parse_facility_details(soup)
@@ -178,6 +176,8 @@ class TexasScraper:
             print(f"Error scraping facility details from {facility_url}: {e}")
             return {}
 
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, street_address, city, state, zip_code):
         """Geocode a Texas facility address using multiple methods"""
         # Construct full address
@@ -331,13 +331,6 @@ class TexasScraper:
             latitudes.append(lat)
             longitudes.append(lng)
             
-            # Rate limiting - be respectful to the geocoding service
-            # Use shorter delay for Google API (higher rate limits)
-            if os.getenv('GOOGLE_MAPS_API_KEY'):
-                time.sleep(0.1)  # Google allows higher rate limits
-            else:
-                time.sleep(1)    # Be more conservative with free services
-        
         df['latitude'] = latitudes
         df['longitude'] = longitudes
         
@@ -379,9 +372,6 @@ class TexasScraper:
             
             detailed_facilities.append(facility_data)
             
-            # Rate limiting between requests
-            time.sleep(0.5)
-        
         # Create DataFrame with all data
         df = pd.DataFrame(detailed_facilities)
         
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Per-host HTTP request tracing.
+
+Records DNS, connect, time-to-first-byte and total timings plus response size
+and status for every request that goes through ``requests``, grouped by host,
+so slow or throttling DOC sites show up in the run summary.
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from . import transport
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf')]
+
+# Proxies that carry the real target URL in a ``url`` query parameter
+PROXY_HOSTS = {'proxy.scrapeops.io'}
+
+PHASES = ['dns', 'connect', 'ttfb', 'total']
+
+# Tracing sits just outside the network so each retry attempt is recorded
+MIDDLEWARE_ORDER = 80
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram that also keeps raw samples for percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.samples: List[float] = []
+
+    def add(self, seconds: float):
+        """Record one observation given in seconds."""
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.samples.append(ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the given percentile in milliseconds."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict:
+        """Summarize the histogram as plain data."""
+        labels = [f"<={int(b)}ms" if b != float('inf') else ">30000ms" for b in BUCKETS_MS]
+        return {
+            'count': len(self.samples),
+            'mean_ms': round(sum(self.samples) / len(self.samples), 1) if self.samples else None,
+            'p50_ms': _round(self.percentile(50)),
+            'p95_ms': _round(self.percentile(95)),
+            'max_ms': _round(max(self.samples)) if self.samples else None,
+            'buckets': {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class HostStats:
+    """Aggregated request statistics for a single host."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.requests = 0
+        self.errors = Counter()
+        self.statuses = Counter()
+        self.retries = 0
+        self.redirects = 0
+        self.bytes = 0
+        self.new_connections = 0
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+
+    def to_dict(self) -> Dict:
+        """Summarize the host statistics as plain data."""
+        return {
+            'host': self.host,
+            'requests': self.requests,
+            'retries': self.retries,
+            'redirects': self.redirects,
+            'new_connections': self.new_connections,
+            'bytes': self.bytes,
+            'statuses': dict(sorted(self.statuses.items())),
+            'errors': dict(self.errors),
+            'timings': {phase: hist.to_dict() for phase, hist in self.phases.items()},
+        }
+
+
+class HttpTracer:
+    """Collect per-host timings for every request sent through ``requests``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hosts: Dict[str, HostStats] = {}
+        self.started = time.time()
+
+    def _host(self, host: str) -> HostStats:
+        if host not in self.hosts:
+            self.hosts[host] = HostStats(host)
+        return self.hosts[host]
+
+    def __call__(self, request, send, **kwargs):
+        """Transport middleware: time the request and record the outcome."""
+        outer = getattr(self._local, 'connection', None)
+        if outer is not None and kwargs.get('allow_redirects') is False:
+            # A redirect hop re-entering Session.send: its time, DNS and connections
+            # belong to the request being traced, which is counted once
+            return send(request, **kwargs)
+        host = trace_host(request.url)
+        connection = {'dns': 0.0, 'connect': 0.0, 'opened': False}
+        self._local.connection = connection
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = send(request, **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            total = time.perf_counter() - start
+            self._local.connection = outer
+            self._record(host, total, connection, response, error)
+
+    def _record(self, host, total, connection, response, error):
+        with self._lock:
+            stats = self._host(host)
+            stats.requests += 1
+            stats.phases['total'].add(total)
+            if connection['opened']:
+                stats.new_connections += 1
+                stats.phases['dns'].add(connection['dns'])
+                stats.phases['connect'].add(connection['connect'])
+            if response is not None:
+                stats.statuses[response.status_code] += 1
+                stats.redirects += len(response.history)
+                stats.phases['ttfb'].add(response.elapsed.total_seconds())
+                stats.bytes += _response_size(response)
+            if error is not None:
+                stats.errors[type(error).__name__] += 1
+
+    def record_retry(self, url: str):
+        """Count a retry attempt against the URL's host."""
+        host = trace_host(url)
+        with self._lock:
+            self._host(host).retries += 1
+
+    def _timed_getaddrinfo(self, original):
+        def getaddrinfo(*args, **kwargs):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                connection['dns'] += time.perf_counter() - start
+        return getaddrinfo
+
+    def _timed_create_connection(self, original):
+        def create_connection(*args, **kwargs):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            dns_before = connection['dns']
+            try:
+                return original(*args, **kwargs)
+            finally:
+                # getaddrinfo runs inside create_connection; report it separately
+                elapsed = time.perf_counter() - start
+                connection['connect'] += elapsed - (connection['dns'] - dns_before)
+                connection['opened'] = True
+        return create_connection
+
+    def summary(self) -> Dict:
+        """Return all host statistics, slowest hosts first."""
+        with self._lock:
+            hosts = sorted(self.hosts.values(),
+                           key=lambda s: s.phases['total'].percentile(95) or 0,
+                           reverse=True)
+            return {
+                'started': self.started,
+                'duration_seconds': round(time.time() - self.started, 1),
+                'hosts': [stats.to_dict() for stats in hosts],
+            }
+
+    def format_summary(self) -> List[str]:
+        """Render the summary as printable lines."""
+        lines = []
+        header = f"{'Host':<34} {'Reqs':>5} {'Retry':>5} {'Err':>4} {'429':>4} {'5xx':>4} {'KB':>8} {'TTFB p50':>9} {'Total p50':>10} {'p95':>8} {'max':>8}"
+        lines.append(header)
+        lines.append('-' * len(header))
+        for host in self.summary()['hosts']:
+            statuses = host['statuses']
+            throttled = statuses.get(429, 0)
+            server_errors = sum(count for status, count in statuses.items() if status >= 500)
+            total = host['timings']['total']
+            ttfb = host['timings']['ttfb']
+            lines.append(
+                f"{host['host'][:34]:<34} {host['requests']:>5} {host['retries']:>5} "
+                f"{sum(host['errors'].values()):>4} {throttled:>4} {server_errors:>4} "
+                f"{host['bytes'] / 1024:>8.0f} {_ms(ttfb['p50_ms']):>9} {_ms(total['p50_ms']):>10} "
+                f"{_ms(total['p95_ms']):>8} {_ms(total['max_ms']):>8}"
+            )
+        return lines
+
+    def write_json(self, path: str):
+        """Write the full summary, including histogram buckets, to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info(f"Wrote HTTP trace summary to {path}")
+
+
+def trace_host(url: str) -> str:
+    """Return the host a request is attributed to, seeing through the ScrapeOps proxy."""
+    parts = urlsplit(url)
+    host = parts.hostname or 'unknown'
+    if host in PROXY_HOSTS:
+        target = parse_qs(parts.query).get('url')
+        if target:
+            return f"{host} ({urlsplit(target[0]).hostname})"
+    return host
+
+
+def _response_size(response) -> int:
+    if getattr(response, '_content_consumed', False) and response._content is not None:
+        return len(response._content)
+    try:
+        return int(response.headers.get('Content-Length', 0))
+    except ValueError:
+        return 0
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def _ms(value):
+    return f"{value:.0f}ms" if value is not None else '-'
+
+
+_tracer: Optional[HttpTracer] = None
+_patched = []
+
+
+def enable() -> HttpTracer:
+    """Start tracing every HTTP request and return the active tracer."""
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    _tracer = HttpTracer()
+    transport.add_middleware(_tracer, order=MIDDLEWARE_ORDER)
+
+    # Time DNS and connection setup where urllib3 opens new sockets
+    try:
+        from urllib3.util import connection as urllib3_connection
+        _patched.append((urllib3_connection, 'create_connection', urllib3_connection.create_connection))
+        urllib3_connection.create_connection = _tracer._timed_create_connection(urllib3_connection.create_connection)
+    except ImportError:
+        logger.debug("urllib3 not available; connect timings disabled")
+    _patched.append((socket, 'getaddrinfo', socket.getaddrinfo))
+    socket.getaddrinfo = _tracer._timed_getaddrinfo(socket.getaddrinfo)
+    return _tracer
+
+
+def disable():
+    """Stop tracing and restore patched functions."""
+    global _tracer
+    if _tracer is None:
+        return
+    transport.remove_middleware(_tracer)
+    while _patched:
+        module, name, original = _patched.pop()
+        setattr(module, name, original)
+    _tracer = None
+
+
+def get_tracer() -> Optional[HttpTracer]:
+    """Return the active tracer, if tracing is enabled."""
+    return _tracer
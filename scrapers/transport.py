@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport hooks for the scrapers.
+
+Scrapers mix module-level ``requests.get``, ``self.session.get`` and the
+ScrapeOps proxy. All of those end up in ``requests.Session.send``, so patching
+that one method gives a single place to observe and shape every request
+without touching each scraper.
+"""
+
+import functools
+import logging
+import threading
+from typing import Callable, List, Tuple
+
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Middleware signature: middleware(request, send, **kwargs) -> requests.Response
+# where ``send(request, **kwargs)`` calls the next middleware (or the network).
+Middleware = Callable[..., requests.Response]
+
+_lock = threading.Lock()
+_middleware: List[Tuple[int, int, Middleware]] = []
+_counter = 0
+_original_send = None
+
+
+def install():
+    """Patch ``requests.Session.send`` so registered middleware sees every request."""
+    global _original_send
+    with _lock:
+        if _original_send is not None:
+            return
+        _original_send = requests.Session.send
+
+        @functools.wraps(_original_send)
+        def send(session, request, **kwargs):
+            return _dispatch(session, request, kwargs)
+
+        requests.Session.send = send
+        logger.debug("Installed HTTP transport hooks")
+
+
+def uninstall():
+    """Restore the original ``requests.Session.send``."""
+    global _original_send
+    with _lock:
+        if _original_send is None:
+            return
+        requests.Session.send = _original_send
+        _original_send = None
+
+
+def add_middleware(middleware: Middleware, order: int = 50):
+    """
+    Register a middleware around every HTTP request.
+
+    Args:
+        middleware: Callable taking ``(request, send, **kwargs)``
+        order: Lower values wrap higher ones (outermost first)
+    """
+    global _counter
+    install()
+    with _lock:
+        if any(existing is middleware for _, _, existing in _middleware):
+            return
+        _counter += 1
+        _middleware.append((order, _counter, middleware))
+        _middleware.sort(key=lambda item: item[:2])
+
+
+def remove_middleware(middleware: Middleware):
+    """Unregister a previously added middleware."""
+    with _lock:
+        _middleware[:] = [item for item in _middleware if item[2] is not middleware]
+
+
+def _dispatch(session, request, kwargs):
+    """Run the middleware chain for a single ``Session.send`` call."""
+    chain = [item[2] for item in _middleware]
+
+    def call(index, request, **kwargs):
+        if index == len(chain):
+            return _original_send(session, request, **kwargs)
+        return chain[index](request, functools.partial(call, index + 1), **kwargs)
+
+    return call(0, request, **kwargs)
@@ -5,7 +5,8 @@ import re
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, name_index, parsing, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -59,9 +60,6 @@ class VirginiaScraper:
                 
                 processed_facilities.append(facility)
                 
-                # Rate limiting - be respectful
-                time.sleep(0.2)
-                
             except Exception as e:
                 logger.error(f"Error processing {facility.get('name', 'Unknown')}: {e}")
                 processed_facilities.append(facility)  # Add anyway without coordinates
@@ -70,13 +68,15 @@ class VirginiaScraper:
         logger.info(f"Successfully processed {len(processed_facilities)} facilities")
         return processed_facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facilities_from_main_page(self) -> List[Dict]:
         """Extract facility information from the main facilities page."""
         try:
             response = self.session.get(self.facilities_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facilities = []
             
             # Get all text content and split into lines for processing
@@ -275,14 +275,14 @@ class VirginiaScraper:
     
     def merge_facility_data(self, main_facilities: List[Dict], dropdown_names: List[str]) -> List[Dict]:
         """Merge facility data from main page with dropdown facility names."""
-        # Create a set of names from main facilities for quick lookup
-        main_names = {self.normalize_facility_name(f['name']) for f in main_facilities}
+        # Index the main facility names; near-miss spellings still match
+        main_names = name_index.NameIndex()
+        for facility in main_facilities:
+            main_names.add(facility['name'], facility['name'])
         
         # Add any dropdown facilities that aren't in the main list
         for dropdown_name in dropdown_names:
-            normalized_dropdown = self.normalize_facility_name(dropdown_name)
-            
-            if normalized_dropdown not in main_names:
+            if dropdown_name not in main_names:
                 # Create a basic facility entry
                 facility = {
                     'name': dropdown_name,
@@ -291,13 +291,10 @@ class VirginiaScraper:
                     'facility_type': self.determine_facility_type(dropdown_name)
                 }
                 main_facilities.append(facility)
+                main_names.add(dropdown_name, dropdown_name)
         
         return main_facilities
     
-    def normalize_facility_name(self, name: str) -> str:
-        """Normalize facility name for comparison."""
-        return re.sub(r'[^\w\s]', '', name.lower()).strip()
-    
     def determine_facility_type(self, name: str) -> str:
         """Determine facility type based on name."""
         name_lower = name.lower()
@@ -323,6 +320,8 @@ class VirginiaScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.GEOCODE)
+    @checkpoint.checkpointed(stages.GEOCODE)
     def geocode_address(self, facility: Dict) -> Optional[Tuple[float, float]]:
         """Geocode facility address to get coordinates."""
         try:
@@ -367,13 +366,11 @@ class VirginiaScraper:
             coords = self.geocode_google(address, google_api_key)
             if coords:
                 return coords
-            time.sleep(0.1)  # Rate limiting
         
         # Try Nominatim (OpenStreetMap)
         coords = self.geocode_nominatim(address)
         if coords:
             return coords
-        time.sleep(1)  # Rate limiting for free service
         
         # Try Photon (another free service)
         coords = self.geocode_photon(address)
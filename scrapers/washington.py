@@ -2,15 +2,19 @@
 
 import requests
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import Dict, List, Optional, Tuple
 import logging
-import time
+
+from . import checkpoint, name_index, parsing, stages
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Detail pages are searched as text; the <head> (scripts, styles, metadata) is never read
+DETAIL_STRAINER = SoupStrainer('body')
+
 class WashingtonScraper:
     """Scraper for Washington Department of Corrections facilities."""
     
@@ -58,9 +62,6 @@ class WashingtonScraper:
                 
                 enhanced_facilities.append(facility)
                 
-                # Rate limiting - be respectful
-                time.sleep(0.3)
-                
             except Exception as e:
                 logger.error(f"Error processing {facility.get('name', 'Unknown')}: {e}")
                 enhanced_facilities.append(facility)  # Add anyway
@@ -69,13 +70,15 @@ class WashingtonScraper:
         logger.info(f"Successfully processed {len(enhanced_facilities)} facilities")
         return enhanced_facilities
     
+    @stages.stage(stages.DISCOVER)
+    @checkpoint.checkpointed(stages.DISCOVER)
     def get_facilities_from_map_page(self) -> List[Dict]:
         """Extract facility information from the map page with embedded coordinates."""
         try:
             response = self.session.get(self.facilities_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content)
             facilities = []
             
             # Find all geolocation elements with facility data
@@ -245,23 +248,22 @@ class WashingtonScraper:
     
     def merge_facility_data(self, map_facilities: List[Dict], table_facilities: List[Dict]) -> List[Dict]:
         """Merge facility data from map and table sources."""
-        # Create a lookup for table facilities by name
-        table_lookup = {}
-        for facility in table_facilities:
-            name = self.normalize_facility_name(facility['name'])
-            table_lookup[name] = facility
+        # Index table facilities by name; near-miss spellings still match
+        table_index = name_index.NameIndex()
+        for position, facility in enumerate(table_facilities):
+            table_index.add(facility['name'], position)
         
         # Merge map facilities with table data
         merged_facilities = []
-        seen_names = set()
+        matched_positions = set()
         
         for map_facility in map_facilities:
-            name = self.normalize_facility_name(map_facility['name'])
-            seen_names.add(name)
+            position = table_index.find(map_facility['name'])
             
             # Merge with table data if available
-            if name in table_lookup:
-                table_data = table_lookup[name]
+            if position is not None:
+                matched_positions.add(position)
+                table_data = table_facilities[position]
                 # Map data takes precedence for coordinates
                 merged = {**table_data, **map_facility}
                 merged_facilities.append(merged)
@@ -269,20 +271,12 @@ class WashingtonScraper:
                 merged_facilities.append(map_facility)
         
         # Add any table facilities not found in map data
-        for table_facility in table_facilities:
-            name = self.normalize_facility_name(table_facility['name'])
-            if name not in seen_names:
+        for position, table_facility in enumerate(table_facilities):
+            if position not in matched_positions:
                 merged_facilities.append(table_facility)
         
         return merged_facilities
     
-    def normalize_facility_name(self, name: str) -> str:
-        """Normalize facility name for comparison."""
-        # Remove common abbreviations and normalize
-        normalized = re.sub(r'\s*\([^)]*\)\s*', '', name)  # Remove parenthetical abbreviations
-        normalized = re.sub(r'[^\w\s]', '', normalized.lower()).strip()
-        return normalized
-    
     def determine_facility_type(self, name: str) -> str:
         """Determine facility type based on name."""
         name_lower = name.lower()
@@ -302,6 +296,8 @@ class WashingtonScraper:
         else:
             return 'Correctional Facility'
     
+    @stages.stage(stages.DETAILS)
+    @checkpoint.checkpointed(stages.DETAILS)
     def get_facility_details(self, detail_url: str) -> Dict:
         """Get additional facility details from individual facility page."""
         details = {}
@@ -310,7 +306,8 @@ class WashingtonScraper:
             response = self.session.get(detail_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parsing.make_soup(response.content, parse_only=DETAIL_STRAINER)
+            page_text = soup.get_text()
             
             # Look for "At a Glance" section with facility details
             glance_section = soup.find('div', class_='field--name-field-at-a-glance')
@@ -320,22 +317,22 @@ class WashingtonScraper:
             
             # Look for other structured data
             # Extract capacity information
-            capacity_match = re.search(r'Capacity:\s*(\d+)', soup.get_text(), re.IGNORECASE)
+            capacity_match = re.search(r'Capacity:\s*(\d+)', page_text, re.IGNORECASE)
             if capacity_match:
                 details['capacity'] = int(capacity_match.group(1))
             
             # Extract custody level
-            custody_match = re.search(r'Custody Level:\s*([^\n\r]+)', soup.get_text(), re.IGNORECASE)
+            custody_match = re.search(r'Custody Level:\s*([^\n\r]+)', page_text, re.IGNORECASE)
             if custody_match:
                 details['custody_level'] = custody_match.group(1).strip()
             
             # Extract year opened
-            year_match = re.search(r'Year Opened:\s*(\d{4})', soup.get_text(), re.IGNORECASE)
+            year_match = re.search(r'Year Opened:\s*(\d{4})', page_text, re.IGNORECASE)
             if year_match:
                 details['year_opened'] = int(year_match.group(1))
             
             # Extract gender information
-            text_content = soup.get_text().lower()
+            text_content = page_text.lower()
             if 'male inmates' in text_content:
                 details['gender'] = 'Male'
             elif 'female inmates' in text_content or 'women' in text_content:
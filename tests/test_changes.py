@@ -0,0 +1,28 @@
+import pandas as pd
+
+from prisons import changes
+
+
+def make_export(**extra):
+    return pd.DataFrame([{'name': 'Bibb County Correctional Facility', 'latitude': 32.95,
+                          'longitude': -87.13, 'capacity': 1000, **extra}])
+
+
+def test_new_columns_are_a_change():
+    changeset = changes.diff_exports(make_export(), make_export(county_fips='01007', county_name='Bibb'), 'alabama')
+    assert changeset['columns_added'] == ['county_fips', 'county_name']
+    assert changes.has_changes(changeset)
+    assert changes.describe(changeset) == '2 columns added (county_fips, county_name)'
+
+
+def test_removed_column_is_a_change():
+    changeset = changes.diff_exports(make_export(congressional_district='07'), make_export(), 'alabama')
+    assert changeset['columns_removed'] == ['congressional_district']
+    assert changes.describe(changeset) == '1 column removed (congressional_district)'
+
+
+def test_identical_exports_have_no_changes():
+    changeset = changes.diff_exports(make_export(), make_export(), 'alabama')
+    assert not changes.has_changes(changeset)
+    # Changesets written before column tracking
+    assert not changes.has_changes({'summary': {change: 0 for change in changes.CHANGE_TYPES}})
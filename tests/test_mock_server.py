@@ -0,0 +1,27 @@
+import json
+
+from mock_server import MockDocServer, MockSettings
+from scrapers.fixtures import normalize_url
+
+
+def make_server(tmp_path, path_fallback=False):
+    for page in (1, 2):
+        stem = f"page{page}"
+        (tmp_path / f"{stem}.body").write_text(f"page {page}")
+        (tmp_path / f"{stem}.json").write_text(json.dumps({
+            'key': normalize_url(f"https://doc.mo.gov/facilities?page={page}"), 'body_file': f"{stem}.body"}))
+    server = MockDocServer(('127.0.0.1', 0), str(tmp_path), MockSettings(), path_fallback=path_fallback)
+    server.server_close()
+    return server
+
+
+def test_unrecorded_query_string_is_not_served_another_page(tmp_path):
+    server = make_server(tmp_path)
+    assert server.lookup(normalize_url("https://doc.mo.gov/facilities?page=2"))['body_file'] == 'page2.body'
+    assert server.lookup(normalize_url("https://doc.mo.gov/facilities?page=3")) is None
+
+
+def test_path_fallback_is_opt_in_and_reproducible(tmp_path):
+    server = make_server(tmp_path, path_fallback=True)
+    assert server.lookup(normalize_url("https://doc.mo.gov/facilities?page=3"))['body_file'] == 'page1.body'
+    assert server.stats['path_fallback'] == 1
@@ -0,0 +1,101 @@
+from scrapers.coordinates import CoordinateIndex
+from scrapers.georgia import GeorgiaScraper
+from scrapers.name_index import NameIndex, distinctive_key
+from scrapers.virginia import VirginiaScraper
+from scrapers.washington import WashingtonScraper
+
+
+def make_index(*names):
+    index = NameIndex()
+    for name in names:
+        index.add(name, name)
+    return index
+
+
+def test_names_one_letter_apart_are_different_facilities():
+    pairs = [
+        ("Bacon Transitional Center", "Macon Transitional Center"),
+        ("Goodman Unit", "Woodman Unit"),
+        ("Clemens Unit", "Clements Unit"),
+    ]
+    for indexed, query in pairs:
+        assert make_index(indexed).find(query) is None
+        assert make_index(query).find(indexed) is None
+
+
+def test_repeated_words_are_counted():
+    index = make_index("South Florida Reception Center")
+    assert index.find("South Florida Reception Center, South Unit") is None
+    assert distinctive_key("South Florida Reception Center, South Unit") != \
+        distinctive_key("South Florida Reception Center")
+
+
+def test_extra_distinctive_word_is_a_different_facility():
+    index = make_index("Washington Corrections Center", "Greensville Correctional Center")
+    assert index.find("Washington Corrections Center for Women") is None
+    assert index.find("Greensville Work Center") is None
+    assert index.find("California Institution for Men") is None
+
+
+def test_spelling_variants_of_the_same_facility_match():
+    index = make_index("Airway Heights Corrections Center", "Coyote Ridge Corrections Center",
+                       "Washington Corrections Center for Women", "Greensville Correctional Center")
+    assert index.find("Airway Heights Correction Center (AHCC)") == "Airway Heights Corrections Center"
+    assert index.find("Coyote Ridge Correctional Complex") == "Coyote Ridge Corrections Center"
+    assert index.find("Washington Corrections Centre for Women's") == "Washington Corrections Center for Women"
+    assert index.find("Greensville CC") == "Greensville Correctional Center"
+
+
+def test_shared_distinctive_words_are_ambiguous():
+    index = make_index("Greensville Correctional Center", "Greensville State Prison")
+    assert index.find("Greensville Correctional Center") == "Greensville Correctional Center"
+    assert index.find("Greensville Correctional Complex") is None
+
+
+def test_georgia_keeps_bacon_and_macon():
+    def feature(title):
+        return {'properties': {'data': {'title': f'<a href="/facilities/x">{title}</a>'}}}
+
+    facilities = GeorgiaScraper().filter_state_facilities([
+        feature("Bacon Transitional Center"),
+        feature("Macon Transitional Center"),
+        feature("Macon Transitional Center "),
+    ])
+    assert len(facilities) == 2
+
+
+def test_virginia_dropdown_keeps_near_miss_names():
+    merged = VirginiaScraper().merge_facility_data(
+        [{'name': 'Bacon Correctional Center'}],
+        ['Macon Correctional Center', 'Bacon Correctional Centre'],
+    )
+    assert [facility['name'] for facility in merged] == ['Bacon Correctional Center', 'Macon Correctional Center']
+
+
+def test_coordinate_index_does_not_borrow_a_near_miss_point():
+    index = CoordinateIndex([("California Institution for Women (CIW)", 33.96, -117.64)])
+    assert index.match("California Institution for Men", "CIM") is None
+    assert index.match("California Institution for Women") == (33.96, -117.64)
+
+
+def test_curly_and_straight_apostrophes_are_the_same_name():
+    index = make_index("California Men’s Colony", "Central California Women's Facility")
+    assert index.find("California Men's Colony") == "California Men’s Colony"
+    assert index.find("California Mens Colony") == "California Men’s Colony"
+    assert index.find("Central California Women’s Facility") == "Central California Women's Facility"
+    assert index.find("Central California Womenʼs Facility") == "Central California Women's Facility"
+
+
+def test_coordinate_index_matches_across_apostrophes():
+    index = CoordinateIndex([("California Men's Colony (CMC)", 35.32, -120.70),
+                             ("Central California Women's Facility (CCWF)", 37.04, -120.03)])
+    assert index.match("California Men’s Colony") == (35.32, -120.70)
+    assert index.match("Central California Women’s Facility") == (37.04, -120.03)
+
+
+def test_washington_merge_matches_across_apostrophes():
+    merged = WashingtonScraper().merge_facility_data(
+        [{'name': 'Washington Corrections Center for Women’s', 'latitude': 47.1, 'longitude': -122.6}],
+        [{'name': "Washington Corrections Center for Women's", 'street_address': '9601 Bujacich Rd NW'}],
+    )
+    assert len(merged) == 1
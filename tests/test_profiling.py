@@ -0,0 +1,30 @@
+import contextvars
+import threading
+
+from scrapers import profiling, stages
+from scrapers.concurrency import ContextThreadPoolExecutor
+
+
+def busy_detail(n):
+    return sum(i * i for i in range(n))
+
+
+def scrape():
+    with stages.jurisdiction('texas'), stages.stage(stages.DETAILS):
+        with ContextThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(busy_detail, [1000] * 4))
+
+
+def test_cpu_profile_covers_scheduler_and_pool_threads():
+    profiler = profiling.create_profiler('cpu')
+    profiler.start()
+    # Like the scheduler: the jurisdiction runs on its own thread
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(scrape,))
+    thread.start()
+    thread.join()
+    profiler.stop()
+
+    stats = profiler._stats(('texas', stages.DETAILS))
+    functions = {name for _, _, name in stats.stats}
+    assert 'busy_detail' in functions
+    assert 'scrape' not in {name for _, _, name in profiler._stats((None, None)).stats}
@@ -0,0 +1,39 @@
+import pytest
+import requests
+
+from scrapers.resilience import CircuitOpenError, RetryPolicy
+
+
+def open_circuit(policy, host='example.org'):
+    breaker = policy.breaker(host)
+    for _ in range(policy.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= policy.reset_timeout
+    return breaker
+
+
+def test_unexpected_error_in_trial_request_releases_the_circuit():
+    policy = RetryPolicy(base_delay=0)
+    breaker = open_circuit(policy)
+    request = requests.Request('GET', 'https://example.org/facilities').prepare()
+
+    def fail(request, **kwargs):
+        raise ValueError('not a transport error')
+
+    with pytest.raises(ValueError):
+        policy(request, fail)
+    assert breaker.state == 'half-open'
+    assert not breaker.trial_in_flight
+
+    response = requests.Response()
+    response.status_code = 200
+    assert policy(request, lambda request, **kwargs: response) is response
+    assert breaker.state == 'closed'
+
+
+def test_open_circuit_fails_fast():
+    policy = RetryPolicy()
+    open_circuit(policy).opened_at += policy.reset_timeout
+    request = requests.Request('GET', 'https://example.org/facilities').prepare()
+    with pytest.raises(CircuitOpenError):
+        policy(request, lambda request, **kwargs: None)
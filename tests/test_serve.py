@@ -0,0 +1,21 @@
+import pandas as pd
+
+from prisons.serve import Dataset
+
+
+def make_dataset():
+    return Dataset(pd.DataFrame([
+        {'jurisdiction': 'texas', 'name': 'Huntsville Unit', 'facility_type': 'Prison',
+         'latitude': 30.72, 'longitude': -95.55},
+        {'jurisdiction': 'texas', 'name': 'Ellis Unit', 'facility_type': 'Prison',
+         'latitude': 30.83, 'longitude': -95.57},
+        {'jurisdiction': 'georgia', 'name': 'Macon Transitional Center', 'facility_type': 'Transitional Center',
+         'latitude': 32.84, 'longitude': -83.63},
+    ]))
+
+
+def test_repeated_jurisdiction_returns_each_row_once():
+    dataset = make_dataset()
+    assert list(dataset.select({'jurisdiction': 'texas,texas'})) == [0, 1]
+    assert list(dataset.select({'jurisdiction': 'Texas, texas,georgia'})) == [0, 1, 2]
+    assert list(dataset.select({'jurisdiction': 'texas,texas', 'bbox': '-100,25,-80,35'})) == [0, 1]
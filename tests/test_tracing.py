@@ -0,0 +1,39 @@
+import requests
+
+from scrapers.tracing import HttpTracer
+
+
+def make_response(status, url, history=()):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.history = list(history)
+    response._content = b''
+    return response
+
+
+def test_redirect_hops_count_as_one_request():
+    tracer = HttpTracer()
+    request = requests.Request('GET', 'http://doc.example.gov/facilities').prepare()
+    hop = requests.Request('GET', 'https://doc.example.gov/facilities').prepare()
+
+    def send(request, **kwargs):
+        # Like Session.send: follow the redirect through the patched send again
+        redirect = make_response(301, request.url)
+        final = tracer(hop, lambda hop, **kwargs: make_response(200, hop.url), allow_redirects=False)
+        final.history = [redirect]
+        return final
+
+    tracer(request, send, allow_redirects=True)
+    host = tracer.summary()['hosts'][0]
+    assert host['requests'] == 1
+    assert host['redirects'] == 1
+    assert host['timings']['total']['count'] == 1
+
+
+def test_requests_without_redirects_are_each_counted():
+    tracer = HttpTracer()
+    request = requests.Request('GET', 'https://doc.example.gov/facilities').prepare()
+    for _ in range(2):
+        tracer(request, lambda request, **kwargs: make_response(200, request.url), allow_redirects=False)
+    assert tracer.summary()['hosts'][0]['requests'] == 2
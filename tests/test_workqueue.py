@@ -0,0 +1,72 @@
+import json
+import threading
+
+import pytest
+
+from scrapers import checkpoint, stages
+from workqueue import DETAILS, DISCOVER, QueueServer, RemoteQueue, WorkQueue, restore_journal
+
+
+class Scraper:
+    @checkpoint.checkpointed(stages.DISCOVER)
+    def discover(self, page):
+        return [f"facility-{page}"]
+
+    @checkpoint.checkpointed(stages.DETAILS)
+    def details(self, facility):
+        return {'name': facility}
+
+
+def scrape(scraper):
+    return [scraper.details(facility) for facility in scraper.discover(1)]
+
+
+def test_stage_limit_hands_off_at_the_next_stage_and_resumes_from_the_journal(tmp_path):
+    with checkpoint.journal('texas', directory=str(tmp_path)), checkpoint.stage_limit(stages.DISCOVER):
+        with pytest.raises(checkpoint.StageHandoff) as handoff:
+            scrape(Scraper())
+    assert handoff.value.stage == stages.DETAILS
+
+    with checkpoint.journal('texas', resume=True, directory=str(tmp_path)) as journal, \
+            checkpoint.stage_limit(stages.DETAILS):
+        assert scrape(Scraper()) == [{'name': 'facility-1'}]
+    assert journal.replayed == 1
+
+
+def test_restore_journal_drops_entries_older_than_the_task(tmp_path):
+    path = tmp_path / 'texas.jsonl'
+    path.write_text(json.dumps({'stage': 'details', 'fn': 'stale', 'key': '1', 'value': 1}) + '\n')
+    handed = [{'stage': 'discover', 'fn': 'discover', 'key': '1', 'value': ['a']}]
+    restore_journal(str(path), handed, since=path.stat().st_mtime + 1)
+    assert [json.loads(line)['fn'] for line in path.read_text().splitlines()] == ['discover']
+
+    restore_journal(str(path), handed, since=0)
+    assert [json.loads(line)['fn'] for line in path.read_text().splitlines()] == ['discover', 'discover']
+
+
+def test_remote_queue_leases_stage_tasks_over_http(tmp_path):
+    server = QueueServer(('127.0.0.1', 0), WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=60), token='secret')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        with pytest.raises(RuntimeError):
+            RemoteQueue(url, token='wrong', attempts=1)
+
+        queue = RemoteQueue(url, token='secret')
+        assert queue.lease_seconds == 60
+        first = queue.enqueue(DISCOVER, 'texas', {'upload_s3': False})
+        assert queue.enqueue(DISCOVER, 'texas') == first
+
+        task = queue.lease('node-a:1', 'node-a')
+        assert (task['kind'], task['payload']) == (DISCOVER, {'upload_s3': False})
+        assert queue.lease('node-b:1', 'node-b') is None
+        assert queue.heartbeat(task['id'], 'node-a:1')
+        assert not queue.heartbeat(task['id'], 'node-b:1')
+
+        queue.enqueue(DETAILS, 'texas', {'journal': []})
+        queue.complete(task['id'], 'node-a:1', {'status': 'handoff'})
+        assert queue.lease('node-b:1', 'node-b')['kind'] == DETAILS
+        assert queue.counts() == {'done': 1, 'leased': 1}
+    finally:
+        server.shutdown()
+        server.server_close()
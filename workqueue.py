@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""
+Work-queue mode: scrape jurisdictions with workers on one or more nodes.
+
+``fetch.py --queue`` enqueues a ``discover`` task per jurisdiction instead
+of scraping. Workers lease tasks, run them and report results; a lease
+lasts ``lease_seconds`` and is renewed by a heartbeat while the task runs,
+so a task whose worker dies is reclaimed by another worker once its lease
+expires. Failed tasks are retried up to ``max_attempts``.
+
+Leases are per pipeline stage. A ``discover`` task runs the jurisdiction's
+scraper until it first needs a detail page; it then stops and queues a
+``details`` task carrying its checkpoint journal, and so on through
+``geocode`` and ``export``. Each stage can run on a different node, so a
+slow jurisdiction's requests are spread over several workers' IP
+addresses. Scrapers that geocode each facility as they fetch it hand
+over at their first geocoding request. The ``export`` task writes the
+files and, with ``--upload-s3``, queues an upload pinned to its node.
+
+The queue itself is a SQLite file in WAL mode, which only works for
+processes on one host. To use workers on other nodes, serve it over HTTP
+from that host with ``python workqueue.py serve`` and pass workers the
+URL (``--queue http://host:8766``). ``WORKQUEUE_TOKEN`` sets a shared
+token both sides must present.
+
+Example:
+    python fetch.py --states texas,michigan --queue .cache/queue.db
+    python workqueue.py serve --queue .cache/queue.db --host 0.0.0.0
+    python workqueue.py worker --queue http://queue-host:8766    # on each node
+"""
+
+import argparse
+import hmac
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join('.cache', 'queue.db')
+DEFAULT_PORT = 8766
+TOKEN_ENV = 'WORKQUEUE_TOKEN'
+
+# Task kinds: one per pipeline stage (named as in scrapers.stages), then uploads
+DISCOVER = 'discover'
+DETAILS = 'details'
+GEOCODE = 'geocode'
+EXPORT = 'export'
+UPLOAD = 'upload'
+STAGE_TASKS = [DISCOVER, DETAILS, GEOCODE, EXPORT]
+
+# Task states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    jurisdiction TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    node TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, lease_until);
+"""
+
+
+class WorkQueue:
+    """Durable task queue in a SQLite file with time-limited leases."""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, lease_seconds: float = 300):
+        """
+        Open (and create if needed) a queue.
+
+        Args:
+            path: SQLite database file on a local disk (serve it for workers on other nodes)
+            lease_seconds: How long a worker owns a task without a heartbeat
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            # WAL lets status readers run alongside a writing worker, but its shared-memory
+            # index only works between processes on one host, not over a network filesystem
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front so two workers never lease the same task
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def info(self) -> Dict:
+        """Queue settings workers need, such as the lease length."""
+        return {'lease_seconds': self.lease_seconds}
+
+    def enqueue(self, kind: str, jurisdiction: str, payload: Optional[Dict] = None,
+                node: Optional[str] = None, max_attempts: int = 3) -> int:
+        """
+        Add a task unless an identical one is already pending or running.
+
+        Args:
+            kind: Task kind (a pipeline stage or upload)
+            jurisdiction: Jurisdiction the task works on
+            payload: JSON-serializable task options
+            node: Only let workers on this host run the task (for local files)
+            max_attempts: Attempts before the task is marked failed
+
+        Returns:
+            ID of the new or existing task
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            existing = conn.execute(
+                "SELECT id FROM tasks WHERE kind = ? AND jurisdiction = ? AND status IN (?, ?)",
+                (kind, jurisdiction, PENDING, LEASED)).fetchone()
+            if existing:
+                return existing['id']
+            cursor = conn.execute(
+                "INSERT INTO tasks (kind, jurisdiction, payload, node, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, jurisdiction, json.dumps(payload or {}), node, max_attempts, now, now))
+            return cursor.lastrowid
+
+    def lease(self, worker: str, node: Optional[str] = None) -> Optional[Dict]:
+        """
+        Claim the oldest runnable task, including tasks whose lease expired.
+
+        Args:
+            worker: Worker ID recorded on the task
+            node: Host name of the worker, for node-pinned tasks
+
+        Returns:
+            The leased task as a dict, or None if nothing is runnable
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE (status = ? OR (status = ? AND lease_until < ?)) "
+                "AND (node IS NULL OR node = ?) ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now, node)).fetchone()
+            if row is None:
+                return None
+            if row['status'] == LEASED:
+                logger.warning(f"Lease on task {row['id']} ({row['kind']} {row['jurisdiction']}) "
+                               f"held by {row['worker']} expired; reclaiming")
+            conn.execute(
+                "UPDATE tasks SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?, "
+                "updated_at = ? WHERE id = ?",
+                (LEASED, worker, now + self.lease_seconds, now, row['id']))
+            task = dict(row)
+            task['payload'] = json.loads(task['payload'])
+            task['attempts'] += 1
+            return task
+
+    def heartbeat(self, task_id: int, worker: str) -> bool:
+        """Extend a lease; returns False if the task was reclaimed by another worker."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (now + self.lease_seconds, now, task_id, worker, LEASED))
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker: str, result: Optional[Dict] = None):
+        """Mark a task done and store its result."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (DONE, json.dumps(result or {}), time.time(), task_id, worker))
+
+    def fail(self, task_id: int, worker: str, error: str):
+        """Record a failure; the task is retried until it runs out of attempts."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+                "error = ?, lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ?",
+                (FAILED, PENDING, error, time.time(), task_id, worker))
+
+    def tasks(self) -> List[Dict]:
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM tasks ORDER BY id")]
+        finally:
+            conn.close()
+
+    def counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status")
+            return {row['status']: row['n'] for row in rows}
+        finally:
+            conn.close()
+
+
+# Queue methods a QueueServer exposes, called as POST /<method> with keyword arguments
+REMOTE_METHODS = ['info', 'enqueue', 'lease', 'heartbeat', 'complete', 'fail', 'tasks', 'counts']
+
+
+class QueueServer(ThreadingHTTPServer):
+    """Serve a local WorkQueue to workers on other nodes."""
+
+    daemon_threads = True
+
+    def __init__(self, address, queue: WorkQueue, token: Optional[str] = None):
+        """
+        Create a queue server.
+
+        Args:
+            address: (host, port) to bind
+            queue: Queue to serve
+            token: Shared token clients must send as ``Authorization: Bearer <token>``
+        """
+        super().__init__(address, QueueRequestHandler)
+        self.queue = queue
+        self.token = token
+
+
+class QueueRequestHandler(BaseHTTPRequestHandler):
+    """Handle ``POST /<method>`` with a JSON object of keyword arguments."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        method = self.path.strip('/')
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {token}"):
+            self.send_json(401, {'error': 'Missing or wrong queue token'})
+            return
+        if method not in REMOTE_METHODS:
+            self.send_json(404, {'error': f"Unknown queue method {method}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            kwargs = json.loads(self.rfile.read(length) or b'{}')
+            result = getattr(self.server.queue, method)(**kwargs)
+        except (TypeError, ValueError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except sqlite3.Error as e:
+            logger.error(f"Queue {method} failed: {e}")
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, {'result': result})
+
+    def send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class RemoteQueue:
+    """Client for a QueueServer, with the same methods as WorkQueue."""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 30, attempts: int = 3):
+        """
+        Connect to a queue server.
+
+        Args:
+            url: Server base URL, e.g. ``http://queue-host:8766``
+            token: Shared token configured on the server
+            timeout: Seconds per call
+            attempts: Tries per call before a connection error is raised
+        """
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.attempts = attempts
+        self.lease_seconds = self._call('info')['lease_seconds']
+
+    def _call(self, method: str, **kwargs):
+        # urllib rather than requests: queue traffic must not be traced, paced,
+        # budgeted or sent to a mock server like the scrapers' requests
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        data = json.dumps(kwargs).encode('utf-8')
+        for attempt in range(1, self.attempts + 1):
+            request = urllib.request.Request(f"{self.url}/{method}", data=data, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.load(response)['result']
+            except urllib.error.HTTPError as e:
+                raise RuntimeError(f"Queue server refused {method}: {e.code} {e.read().decode(errors='replace')}")
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.attempts:
+                    raise ConnectionError(f"Queue server {self.url} unreachable: {e}")
+                logger.warning(f"Queue server {self.url} unreachable ({e}); retrying")
+                time.sleep(attempt)
+
+    def info(self) -> Dict:
+        return self._call('info')
+
+    def enqueue(self, kind: str, jurisdiction: str, payload: Optional[Dict] = None,
+                node: Optional[str] = None, max_attempts: int = 3) -> int:
+        return self._call('enqueue', kind=kind, jurisdiction=jurisdiction, payload=payload,
+                          node=node, max_attempts=max_attempts)
+
+    def lease(self, worker: str, node: Optional[str] = None) -> Optional[Dict]:
+        return self._call('lease', worker=worker, node=node)
+
+    def heartbeat(self, task_id: int, worker: str) -> bool:
+        try:
+            return self._call('heartbeat', task_id=task_id, worker=worker)
+        except ConnectionError as e:
+            # Keep working; the lease only lapses if the server stays unreachable
+            logger.warning(str(e))
+            return True
+
+    def complete(self, task_id: int, worker: str, result: Optional[Dict] = None):
+        self._call('complete', task_id=task_id, worker=worker, result=result)
+
+    def fail(self, task_id: int, worker: str, error: str):
+        self._call('fail', task_id=task_id, worker=worker, error=error)
+
+    def tasks(self) -> List[Dict]:
+        return self._call('tasks')
+
+    def counts(self) -> Dict[str, int]:
+        return self._call('counts')
+
+
+def open_queue(location: str = DEFAULT_QUEUE_PATH, lease_seconds: float = 300):
+    """
+    Open a queue by location.
+
+    Args:
+        location: ``http(s)://`` URL of a queue server, or a local SQLite file
+        lease_seconds: Lease length for a local queue (a server uses its own)
+
+    Returns:
+        RemoteQueue or WorkQueue
+    """
+    if location.startswith(('http://', 'https://')):
+        return RemoteQueue(location, token=os.getenv(TOKEN_ENV))
+    return WorkQueue(location, lease_seconds=lease_seconds)
+
+
+class Worker:
+    """Pull tasks from a queue and run them until it is empty."""
+
+    def __init__(self, queue, worker_id: Optional[str] = None, checkpoint_dir: Optional[str] = None,
+                 budget: Optional[float] = None, output_dir: str = 'data', poll_interval: float = 5.0):
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Queue to pull from (WorkQueue or RemoteQueue)
+            worker_id: Unique worker name (defaults to host:pid)
+            checkpoint_dir: Checkpoint journal directory
+            budget: Seconds each stage task may run before falling back to the last good export
+            output_dir: Base directory for exports
+            poll_interval: Seconds to wait for new tasks before exiting (with --wait) or checking again
+        """
+        self.queue = queue
+        self.node = socket.gethostname()
+        self.worker_id = worker_id or f"{self.node}:{os.getpid()}"
+        self.checkpoint_dir = checkpoint_dir
+        self.budget = budget
+        self.output_dir = output_dir
+        self.poll_interval = poll_interval
+
+    def run(self, wait: bool = False, max_tasks: Optional[int] = None) -> int:
+        """
+        Process tasks until the queue is empty (or forever with ``wait``).
+
+        Returns:
+            Number of tasks processed
+        """
+        processed = 0
+        while max_tasks is None or processed < max_tasks:
+            task = self.queue.lease(self.worker_id, self.node)
+            if task is None:
+                if not wait:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run_task(task)
+            processed += 1
+        return processed
+
+    def run_task(self, task: Dict):
+        """Run one leased task, keeping its lease alive while it works."""
+        logger.info(f"{self.worker_id}: running {task['kind']} {task['jurisdiction']} "
+                     f"(task {task['id']}, attempt {task['attempts']}/{task['max_attempts']})")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task['id'], stop), daemon=True)
+        heartbeat.start()
+        try:
+            if task['kind'] in STAGE_TASKS:
+                result = self._run_stage(task)
+            elif task['kind'] == UPLOAD:
+                result = self._upload(task)
+            else:
+                raise ValueError(f"Unknown task kind: {task['kind']}")
+        except Exception as e:
+            logger.error(f"Task {task['id']} failed: {e}")
+            self.queue.fail(task['id'], self.worker_id, str(e))
+        else:
+            self.queue.complete(task['id'], self.worker_id, result)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(task_id, self.worker_id):
+                logger.warning(f"Lost lease on task {task_id}")
+                return
+
+    def _run_stage(self, task: Dict) -> Dict:
+        # Imported here so queue bookkeeping (status, serve, enqueue) does not load every scraper
+        import fetch
+        from scheduler import DEFAULT_BUDGET, DEFAULT_HISTORY_PATH, DeadlineScheduler
+        from scrapers import checkpoint
+
+        state = task['jurisdiction']
+        if state not in fetch.SCRAPERS:
+            raise ValueError(f"Unknown jurisdiction: {state}")
+
+        checkpoint_dir = self.checkpoint_dir or checkpoint.DEFAULT_CHECKPOINT_DIR
+        journal_path = os.path.join(checkpoint_dir, f"{state}.jsonl")
+        restore_journal(journal_path, task['payload'].get('journal', []), since=task['created_at'])
+
+        handoff = {}
+
+        def run_stage(name):
+            try:
+                with checkpoint.stage_limit(task['kind']):
+                    return fetch.run_jurisdiction(name, True, checkpoint_dir)
+            except checkpoint.StageHandoff as e:
+                handoff['stage'] = e.stage
+                return fetch.pd.DataFrame()
+
+        # A stage's duration says nothing about a whole run, so keep it out of fetch.py's history
+        history_path = DEFAULT_HISTORY_PATH.replace('.json', f"_{task['kind']}.json")
+        scheduler = DeadlineScheduler(budget=self.budget or DEFAULT_BUDGET, history_path=history_path,
+                                      output_dir=self.output_dir)
+        results = scheduler.run([state], run_stage)
+        df = results[state]
+        status = scheduler.statuses[state]
+        if status == 'failed':
+            raise RuntimeError(f"{task['kind']} stage failed for {state}")
+
+        # Reached a later stage: pass the journal on so any node can continue from here
+        if handoff and status == 'ok':
+            journal = read_journal(journal_path)
+            next_id = self.queue.enqueue(handoff['stage'], state, {**task['payload'], 'journal': journal})
+            os.remove(journal_path)
+            return {'status': 'handoff', 'next': handoff['stage'], 'next_task': next_id,
+                    'journaled': len(journal), 'worker': self.worker_id}
+
+        changeset = fetch.CHANGESETS.get(state)
+        changed = fetch.changes.has_changes(changeset)
+
+        # Exports are local files, so the upload has to run on this node
+        if task['payload'].get('upload_s3') and status == 'ok' and not df.empty:
+            if changed or task['payload'].get('upload_all'):
+                payload = {key: value for key, value in task['payload'].items() if key != 'journal'}
+                self.queue.enqueue(UPLOAD, state, payload, node=self.node)
+        result = {'facilities': len(df), 'status': status, 'worker': self.worker_id}
+        if changeset:
+            result['changes'] = changeset['summary']
+        return result
+
+    def _upload(self, task: Dict) -> Dict:
+        from s3_upload import S3Uploader
+
+        state = task['jurisdiction']
+        payload = task['payload']
+        uploader = S3Uploader(bucket_name=payload.get('s3_bucket', 'stilesdata.com'),
+                              profile_name=payload.get('aws_profile'))
+        uploaded = uploader.upload_directory(os.path.join(self.output_dir, state), f"prisons/{state}")
+        if not uploaded:
+            raise RuntimeError(f"No files uploaded for {state}")
+        return {'files_uploaded': len(uploaded)}
+
+
+def read_journal(path: str) -> List[Dict]:
+    """Entries of a checkpoint journal file, skipping a truncated last line."""
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def restore_journal(path: str, entries: List[Dict], since: float):
+    """
+    Write the journal a stage task starts from.
+
+    Entries handed over by the previous stage come first. Entries already in
+    the file are kept only if written after ``since`` (the task's creation),
+    i.e. by an earlier attempt at this task, so a worker that took over a
+    reclaimed task on the same node or shared checkpoint directory resumes
+    where it stopped, while a stale journal from an older run is dropped.
+    """
+    local = read_journal(path) if os.path.exists(path) and os.path.getmtime(path) >= since else []
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        for entry in entries + local:
+            f.write(json.dumps(entry) + '\n')
+
+
+def print_status(queue):
+    """Print each task's state and a count per state."""
+    print(f"{'ID':>4} {'Kind':<8} {'Jurisdiction':<16} {'Status':<8} {'Tries':>5} {'Worker':<24} Result")
+    for task in queue.tasks():
+        detail = task['result'] or task['error'] or ''
+        print(f"{task['id']:>4} {task['kind']:<8} {task['jurisdiction']:<16} {task['status']:<8} "
+              f"{task['attempts']:>5} {(task['worker'] or '')[:24]:<24} {detail[:60]}")
+    print(', '.join(f"{status}: {count}" for status, count in sorted(queue.counts().items())))
+
+
+def serve(queue: WorkQueue, host: str, port: int):
+    """Serve a local queue to workers on other nodes until interrupted."""
+    token = os.getenv(TOKEN_ENV)
+    server = QueueServer((host, port), queue, token=token)
+    url = f"http://{host}:{server.server_port}"
+    print(f"Work queue {queue.path} served on {url}" + ('' if token else f" (no {TOKEN_ENV} set)"))
+    print(f"Start workers on any node with: python workqueue.py worker --queue {url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    """Command line interface for queue workers and the queue server."""
+    parser = argparse.ArgumentParser(description='Run stage tasks queued by fetch.py --queue')
+    parser.add_argument('command', choices=['worker', 'status', 'serve'],
+                        help='Run a worker, show queue status, or serve the queue to other nodes')
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH,
+                        help='Local SQLite queue file, or http://host:port of a queue server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface the queue server binds (serve)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port the queue server listens on (serve)')
+    parser.add_argument('--worker-id', help='Worker name (defaults to host:pid)')
+    parser.add_argument('--checkpoint-dir', help='Checkpoint journal directory')
+    parser.add_argument('--budget', type=float, help='Seconds each stage task may run')
+    parser.add_argument('--output-dir', default='data', help='Base output directory for data files')
+    parser.add_argument('--lease', type=float, default=300, help='Seconds a task stays leased without a heartbeat')
+    parser.add_argument('--wait', action='store_true', help='Keep polling for new tasks instead of exiting when idle')
+    parser.add_argument('--max-tasks', type=int, help='Exit after this many tasks')
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue, lease_seconds=args.lease)
+
+    if args.command == 'status':
+        print_status(queue)
+        return
+    if args.command == 'serve':
+        if not isinstance(queue, WorkQueue):
+            parser.error('serve needs a local queue file, not a URL')
+        serve(queue, args.host, args.port)
+        return
+
+    # Honor PRISONS_MOCK_SERVER so workers can be load tested offline
+    from scrapers import fixtures
+    fixtures.redirect_to()
+
+    worker = Worker(queue, worker_id=args.worker_id, checkpoint_dir=args.checkpoint_dir,
+                    budget=args.budget, output_dir=args.output_dir)
+    processed = worker.run(wait=args.wait, max_tasks=args.max_tasks)
+    print(f"{worker.worker_id} processed {processed} tasks")
+    print_status(queue)
+
+
+if __name__ == "__main__":
+    main()